@@ -1 +1,5 @@
 from enhanced_md.enhanced_md import EnhancedMD
+from enhanced_md.compiled_styles import CompiledStyles
+from enhanced_md.parse_cache import ParseCache
+from enhanced_md.stats import EnhancedMDStats
+from enhanced_md.text_index import TextIndex
@@ -0,0 +1,2 @@
+from enhanced_md.benchmark.synthetic_docx import SyntheticDocxConfig, generate_synthetic_docx, get_synthetic_styles
+from enhanced_md.benchmark.run_benchmark import benchmark_docx, run_benchmark
@@ -0,0 +1,4 @@
+from enhanced_md.benchmark.run_benchmark import main
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable
+
+from enhanced_md.enhanced_md import EnhancedMD
+from enhanced_md.compiled_styles import CompiledStyles
+from enhanced_md.config import ENHANCED_MD_VERSION
+from enhanced_md.benchmark.synthetic_docx import SyntheticDocxConfig, generate_synthetic_docx, get_synthetic_styles
+
+# Phases timed by the benchmark (in execution order)
+BENCHMARK_PHASES = ("docx_load", "process_docx_document", "build_doc_graph", "build_doc_flat", "build_repr")
+
+
+def _run_phases(docx_file_path: str, styles: CompiledStyles, iterparse: bool,
+                on_phase: Callable[[str, Callable], None]) -> EnhancedMD:
+	"""
+	Builds the document phase by phase (processing the whole docx document before building the doc graph)
+	:param docx_file_path:
+	:param styles:
+	:param iterparse: Ingest the document with the pull parsing engine
+	:param on_phase: Called with the name and the function of each phase (which must run it)
+	:return emd: Built document
+	"""
+
+	emd = None
+
+	def docx_load():
+		nonlocal emd
+		emd = EnhancedMD(docx_file_path=docx_file_path, styles=styles, iterparse=iterparse)
+
+	def process_docx_document():
+		emd.aux_doc_graph = list(emd._process_docx_document())
+
+	def build_doc_graph():
+		emd.aux_doc_graph = iter(emd.aux_doc_graph)
+		emd.doc_graph = []
+		for _ in emd._build_doc_graph():
+			pass
+
+	for phase, phase_function in zip(BENCHMARK_PHASES, (docx_load, process_docx_document, build_doc_graph,
+	                                                    lambda: emd.build_doc_flat(), lambda: emd.build_repr())):
+		on_phase(phase, phase_function)
+
+	return emd
+
+
+def benchmark_docx(docx_file_path: str, styles: dict | CompiledStyles, iterparse: bool = False,
+                   repeat: int = 3) -> dict:
+	"""
+	Times each EnhancedMD phase (best of the repetitions) and measures its peak traced memory (in a separate run,
+	so tracing does not distort the timings)
+	:param docx_file_path:
+	:param styles:
+	:param iterparse: Ingest the document with the pull parsing engine
+	:param repeat: Number of timed repetitions
+	:return benchmark_result:
+	"""
+
+	styles = styles if isinstance(styles, CompiledStyles) else CompiledStyles(styles=styles)
+
+	phase_seconds = {phase: float("inf") for phase in BENCHMARK_PHASES}
+
+	def time_phase(phase: str, phase_function: Callable):
+		start = time.perf_counter()
+		phase_function()
+		phase_seconds[phase] = min(phase_seconds[phase], time.perf_counter() - start)
+
+	for _ in range(repeat):
+		emd = _run_phases(docx_file_path=docx_file_path, styles=styles, iterparse=iterparse, on_phase=time_phase)
+	n_elements = len(emd.doc_flat)
+
+	phase_peak_memory = {}
+
+	def trace_phase(phase: str, phase_function: Callable):
+		tracemalloc.reset_peak()
+		phase_function()
+		phase_peak_memory[phase] = tracemalloc.get_traced_memory()[1]
+
+	tracemalloc.start()
+	try:
+		_run_phases(docx_file_path=docx_file_path, styles=styles, iterparse=iterparse, on_phase=trace_phase)
+	finally:
+		tracemalloc.stop()
+
+	total_seconds = sum(phase_seconds.values())
+	return {
+		"docx_file_path": docx_file_path,
+		"docx_file_size": os.path.getsize(docx_file_path),
+		"iterparse": iterparse,
+		"n_elements": n_elements,
+		"phase_seconds": phase_seconds,
+		"total_seconds": total_seconds,
+		"elements_per_second": n_elements/total_seconds if total_seconds else None,
+		"phase_peak_memory_bytes": phase_peak_memory,
+		"peak_memory_bytes": max(phase_peak_memory.values())
+	}
+
+
+def run_benchmark(configs: list[SyntheticDocxConfig], iterparse: bool = False, repeat: int = 3,
+                  docx_dir: str | None = None) -> dict:
+	"""
+	Generates a synthetic docx document for each configuration and benchmarks it
+	:param configs:
+	:param iterparse: Ingest the documents with the pull parsing engine
+	:param repeat: Number of timed repetitions of each document
+	:param docx_dir: Directory the synthetic documents are kept in (temporary if None)
+	:return benchmark_report: Machine readable report (JSON serializable)
+	"""
+
+	results = []
+	with contextlib.ExitStack() as stack:
+		if docx_dir is None:
+			docx_dir = stack.enter_context(tempfile.TemporaryDirectory())
+		os.makedirs(docx_dir, exist_ok=True)
+
+		for i, config in enumerate(configs):
+			docx_file_path = os.path.join(docx_dir, f"synthetic_{i}.docx")
+			generate_synthetic_docx(docx_file_path=docx_file_path, config=config)
+			result = benchmark_docx(docx_file_path=docx_file_path, styles=get_synthetic_styles(depth=config.depth),
+			                        iterparse=iterparse, repeat=repeat)
+			result["config"] = config.to_dict()
+			results.append(result)
+
+	return {
+		"enhanced_md_version": ENHANCED_MD_VERSION,
+		"python_version": platform.python_version(),
+		"platform": platform.platform(),
+		"repeat": repeat,
+		"results": results
+	}
+
+
+def main(argv: list[str] | None = None):
+	parser = argparse.ArgumentParser(prog="python -m enhanced_md.benchmark",
+	                                 description="Benchmarks EnhancedMD over synthetic docx documents")
+	parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000],
+	                    help="Number of paragraphs of each synthetic document")
+	parser.add_argument("--depth", type=int, default=3)
+	parser.add_argument("--paragraphs-per-heading", type=int, default=5)
+	parser.add_argument("--numbering-density", type=float, default=0.1)
+	parser.add_argument("--hyperlink-density", type=float, default=0.1)
+	parser.add_argument("--runs-per-paragraph", type=int, default=1)
+	parser.add_argument("--words-per-paragraph", type=int, default=20)
+	parser.add_argument("--seed", type=int, default=0)
+	parser.add_argument("--iterparse", action="store_true", help="Ingest with the pull parsing engine")
+	parser.add_argument("--repeat", type=int, default=3)
+	parser.add_argument("--docx-dir", help="Keep the synthetic documents in this directory")
+	parser.add_argument("--output", help="JSON report file (defaults to the standard output)")
+	args = parser.parse_args(argv)
+
+	configs = [
+		SyntheticDocxConfig(n_paragraphs=size, depth=args.depth, paragraphs_per_heading=args.paragraphs_per_heading,
+		                    numbering_density=args.numbering_density, hyperlink_density=args.hyperlink_density,
+		                    runs_per_paragraph=args.runs_per_paragraph, words_per_paragraph=args.words_per_paragraph,
+		                    seed=args.seed)
+		for size in args.sizes
+	]
+	benchmark_report = run_benchmark(configs=configs, iterparse=args.iterparse, repeat=args.repeat,
+	                                 docx_dir=args.docx_dir)
+
+	if args.output is not None:
+		with open(args.output, "w") as output_file:
+			json.dump(benchmark_report, output_file, indent=2)
+	else:
+		json.dump(benchmark_report, sys.stdout, indent=2)
+		sys.stdout.write("\n")
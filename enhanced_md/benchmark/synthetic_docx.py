@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import random
+
+import docx
+from docx.document import Document as DocxDocument
+from docx.enum.style import WD_STYLE_TYPE
+from docx.opc.constants import RELATIONSHIP_TYPE as RT
+from docx.oxml import OxmlElement, parse_xml
+from docx.oxml.ns import nsdecls, qn
+
+SYNTHETIC_TEXT_WORDS = ("lorem", "ipsum", "dolor", "sit", "amet", "consectetur", "adipiscing", "elit", "sed", "do",
+                        "eiusmod", "tempor", "incididunt", "ut", "labore", "et", "dolore", "magna", "aliqua")
+
+
+class SyntheticDocxConfig:
+    """
+    Shape of a synthetic docx document:
+    - n_paragraphs: Number of docx paragraphs (headings included)
+    - depth: Number of heading and paragraph hierarchy levels
+    - paragraphs_per_heading: Number of paragraphs following each heading
+    - numbering_density: Fraction of paragraphs with numbering (numPr referencing a multilevel abstractNum)
+    - hyperlink_density: Fraction of paragraphs ending with a hyperlink
+    - runs_per_paragraph: Number of runs (alternating direct font formatting) each paragraph text is split into
+    - words_per_paragraph: Number of words of each paragraph text
+    - seed: Random seed (same configuration and seed generate the same document)
+    """
+
+    __slots__ = ("n_paragraphs", "depth", "paragraphs_per_heading", "numbering_density", "hyperlink_density",
+                 "runs_per_paragraph", "words_per_paragraph", "seed")
+
+    def __init__(self, n_paragraphs: int = 1000, depth: int = 3, paragraphs_per_heading: int = 5,
+                 numbering_density: float = 0.1, hyperlink_density: float = 0.1, runs_per_paragraph: int = 1,
+                 words_per_paragraph: int = 20, seed: int = 0):
+        if depth < 1:
+            raise ValueError("Synthetic docx depth must be at least 1")
+        if runs_per_paragraph < 1:
+            raise ValueError("Synthetic docx runs per paragraph must be at least 1")
+
+        self.n_paragraphs: int = n_paragraphs
+        self.depth: int = depth
+        self.paragraphs_per_heading: int = paragraphs_per_heading
+        self.numbering_density: float = numbering_density
+        self.hyperlink_density: float = hyperlink_density
+        self.runs_per_paragraph: int = runs_per_paragraph
+        self.words_per_paragraph: int = words_per_paragraph
+        self.seed: int = seed
+
+    def to_dict(self) -> dict:
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+
+def set_synthetic_docx_styles(docx_doc: DocxDocument, depth: int):
+    """
+    Creates a heading and a paragraph style for each hierarchy level
+    :param docx_doc:
+    :param depth:
+    """
+
+    for hierarchy_level in range(1, depth + 1):
+        docx_doc.styles.add_style(name=f"synthetic_h{hierarchy_level}", style_type=WD_STYLE_TYPE.PARAGRAPH)
+        docx_doc.styles.add_style(name=f"synthetic_p{hierarchy_level}", style_type=WD_STYLE_TYPE.PARAGRAPH)
+
+
+def get_synthetic_styles(depth: int) -> dict:
+    """
+    :param depth:
+    :return styles: Input style dictionary of the synthetic docx documents
+    """
+
+    return {
+        "heading": {0: [], **{hierarchy_level: [f"synthetic_h{hierarchy_level}"]
+                              for hierarchy_level in range(1, depth + 1)}},
+        "paragraph": {0: [], **{hierarchy_level: [f"synthetic_p{hierarchy_level}"]
+                                for hierarchy_level in range(1, depth + 1)}},
+        "ignore": []
+    }
+
+
+def add_synthetic_numbering(docx_doc: DocxDocument, depth: int) -> str:
+    """
+    Adds a decimal multilevel numbering definition ("1.", "1.1.", ...) with one level per hierarchy level
+    :param docx_doc:
+    :param depth:
+    :return num_id:
+    """
+
+    numbering = docx_doc.part.numbering_part.element
+    abstract_num_id = max([int(abstract_num.get(qn("w:abstractNumId")))
+                           for abstract_num in numbering.iterchildren(qn("w:abstractNum"))], default=-1) + 1
+
+    lvls = "".join(
+        f'<w:lvl w:ilvl="{ilvl}"><w:start w:val="1"/><w:numFmt w:val="decimal"/>'
+        f'<w:lvlText w:val="{"".join(f"%{i + 1}." for i in range(ilvl + 1))}"/></w:lvl>'
+        for ilvl in range(depth)
+    )
+    abstract_num = parse_xml(f'<w:abstractNum {nsdecls("w")} w:abstractNumId="{abstract_num_id}">{lvls}'
+                             f'</w:abstractNum>')
+
+    # Abstract numbering definitions precede the numbering instances
+    first_num = numbering.find(qn("w:num"))
+    if first_num is not None:
+        first_num.addprevious(abstract_num)
+    else:
+        numbering.append(abstract_num)
+
+    return str(numbering.add_num(abstract_num_id).numId)
+
+
+def add_synthetic_paragraph(docx_doc: DocxDocument, config: SyntheticDocxConfig, rnd: random.Random, style: str,
+                            ilvl: int, num_id: str):
+    """
+    :param docx_doc:
+    :param config:
+    :param rnd:
+    :param style:
+    :param ilvl: Numbering level (of the paragraph hierarchy level)
+    :param num_id: Synthetic numbering numId
+    """
+
+    docx_paragraph = docx_doc.add_paragraph(style=style)
+
+    if rnd.random() < config.numbering_density:
+        num_pr = docx_paragraph._p.get_or_add_pPr().get_or_add_numPr()
+        num_pr.get_or_add_ilvl().val = ilvl
+        num_pr.get_or_add_numId().val = int(num_id)
+
+    # Paragraph text split into runs alternating direct font formatting
+    words = [rnd.choice(SYNTHETIC_TEXT_WORDS) for _ in range(config.words_per_paragraph)]
+    n_runs = min(config.runs_per_paragraph, len(words)) or 1
+    for i in range(n_runs):
+        run_words = words[i*len(words)//n_runs:(i + 1)*len(words)//n_runs]
+        docx_run = docx_paragraph.add_run(" ".join(run_words) + (" " if i < n_runs - 1 else ""))
+        docx_run.bold = i % 3 == 1 or None
+        docx_run.italic = i % 3 == 2 or None
+
+    if rnd.random() < config.hyperlink_density:
+        docx_hyperlink = OxmlElement("w:hyperlink")
+        docx_hyperlink.set(qn("r:id"), docx_paragraph.part.relate_to(
+            f"https://example.com/{rnd.randrange(1 << 16)}", RT.HYPERLINK, is_external=True
+        ))
+        docx_hyperlink.append(docx_paragraph.add_run(" link")._r)
+        docx_paragraph._p.append(docx_hyperlink)
+
+
+def generate_synthetic_docx(docx_file_path: str, config: SyntheticDocxConfig | None = None):
+    """
+    Generates a synthetic docx document of sections made of a heading (cycling through the hierarchy levels)
+    followed by paragraphs nesting down to the configured depth
+    :param docx_file_path:
+    :param config:
+    """
+
+    config = config if config is not None else SyntheticDocxConfig()
+    rnd = random.Random(config.seed)
+
+    docx_doc = docx.Document()
+    set_synthetic_docx_styles(docx_doc=docx_doc, depth=config.depth)
+    num_id = add_synthetic_numbering(docx_doc=docx_doc, depth=config.depth)
+
+    n_paragraphs = 0
+    n_sections = 0
+    while n_paragraphs < config.n_paragraphs:
+        heading_level = n_sections % config.depth + 1
+        add_synthetic_paragraph(docx_doc=docx_doc, config=config, rnd=rnd, style=f"synthetic_h{heading_level}",
+                                ilvl=heading_level - 1, num_id=num_id)
+        n_paragraphs += 1
+        n_sections += 1
+
+        for i in range(min(config.paragraphs_per_heading, config.n_paragraphs - n_paragraphs)):
+            paragraph_level = i % config.depth + 1
+            add_synthetic_paragraph(docx_doc=docx_doc, config=config, rnd=rnd,
+                                    style=f"synthetic_p{paragraph_level}", ilvl=paragraph_level - 1, num_id=num_id)
+            n_paragraphs += 1
+
+    docx_doc.save(docx_file_path)
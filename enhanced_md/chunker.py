@@ -0,0 +1,148 @@
+"""
+Heading aware chunking of a document into chunks of its plain texts bounded by a size budget (characters by default,
+or tokens of any tokenizer through the size function), for retrieval pipelines:
+
+- Chunks are contiguous runs of the flat document, so an element is never split (an element larger than the budget is
+  a chunk on its own)
+- The document is scanned once in document order: the whole subtree of an element is taken at once when it fits the
+  budget, otherwise the element is taken alone and the scan goes on with its children. A subtree that does not fit the
+  current chunk closes it, so chunks start at heading subtree boundaries whenever possible. A chunk holding only the
+  ancestors of the next element (e.g. a heading) is not closed, the scan goes into the subtree instead
+- Each chunk carries the heading path of its first element and the identifiers of its elements
+
+The elements are consumed as a stream (e.g. while the document is built) and chunks are yielded as soon as they are
+closed, so only the chunk being filled and a lookahead bounded by the budget are kept in memory
+"""
+
+from __future__ import annotations
+
+from typing import Callable, Iterable, Iterator
+
+from enhanced_md.enhanced_elements import TOKEN_REGEX
+
+
+def count_tokens(text: str) -> int:
+    """
+    :param text:
+    :return n_tokens: Number of non whitespace tokens of the text (split as the content spans tokens)
+    """
+
+    return sum(1 for token in TOKEN_REGEX.findall(text) if not token.isspace())
+
+
+class Chunk:
+    """
+    Contiguous run of elements of the flat document
+    """
+
+    __slots__ = ("docx_file_path", "start", "end", "heading_path", "identifiers", "text", "size")
+
+    def __init__(self, docx_file_path: str, start: int, end: int, heading_path: tuple[str, ...],
+                 identifiers: tuple[str, ...], text: str, size: int):
+        self.docx_file_path: str = docx_file_path
+        # Range of the chunk elements in the flat document
+        self.start: int = start
+        self.end: int = end
+        # Texts of the heading ancestors of the first element, from the root
+        self.heading_path: tuple[str, ...] = heading_path
+        self.identifiers: tuple[str, ...] = identifiers
+        self.text: str = text
+        self.size: int = size
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
+    def __repr__(self) -> str:
+        return (f"{self.docx_file_path}@@@{self.identifiers[0]}..{self.identifiers[-1]}@@@{self.size} "
+                f"{list(self.heading_path)}")
+
+
+def iter_chunks(elements: Iterable[tuple[int, str, str, bool]], docx_file_path: str, max_size: int,
+                size_function: Callable[[str], int] = len, separator: str = "\n") -> Iterator[Chunk]:
+    """
+    :param elements: (depth, identifier, plain text, is heading) of each element in flat document order, consumed
+    lazily (e.g. from a document being built)
+    :param docx_file_path:
+    :param max_size: Chunk size budget (in size function units)
+    :param size_function: Text size (e.g. len for characters, count_tokens or an embedding tokenizer token count)
+    :param separator: Separator between the texts of the chunk elements (its size counts towards the budget)
+    :return chunks: Iterator of the chunks in document order
+    """
+
+    if max_size <= 0:
+        raise ValueError("Chunk max size must be positive")
+
+    elements = iter(elements)
+    separator_size = size_function(separator)
+    # Elements from the flat document index offset on: the chunk being filled and the lookahead of the subtree being
+    # sized (bounded by the budget), as (depth, identifier, text, heading path)
+    window = []
+    offset = 0
+    # Size of the window elements before each window index (each one followed by a separator)
+    cumulative_sizes = [0]
+    heading_stack = []  # (depth, text) of the heading ancestors of the last pulled element
+
+    def has_element(i: int) -> bool:
+        # Pulls the elements up to the flat document index i
+        while i >= offset + len(window):
+            element = next(elements, None)
+            if element is None:
+                return False
+            depth, identifier, text, is_heading = element
+            while heading_stack and heading_stack[-1][0] >= depth:
+                heading_stack.pop()
+            window.append((depth, identifier, text, tuple(heading_text for _, heading_text in heading_stack)))
+            cumulative_sizes.append(cumulative_sizes[-1] + size_function(text) + separator_size)
+            if is_heading:
+                heading_stack.append((depth, text))
+        return True
+
+    def get_depth(i: int) -> int:
+        return window[i - offset][0]
+
+    def get_size(start: int, end: int) -> int:
+        return cumulative_sizes[end - offset] - cumulative_sizes[start - offset] - separator_size
+
+    def get_fitting_subtree_end(start: int, i: int) -> int | None:
+        # End of the subtree of the element i if the elements from start to it fit the budget (None otherwise),
+        # looking ahead no further than the budget
+        end = i + 1
+        while get_size(start=start, end=end) <= max_size:
+            if not (has_element(end) and get_depth(end) > get_depth(i)):
+                return end
+            end += 1
+        return None
+
+    def make_chunk(start: int, end: int) -> Chunk:
+        chunk_elements = window[start - offset:end - offset]
+        return Chunk(
+            docx_file_path=docx_file_path, start=start, end=end, heading_path=chunk_elements[0][3],
+            identifiers=tuple(identifier for _, identifier, _, _ in chunk_elements),
+            text=separator.join(text for _, _, text, _ in chunk_elements), size=get_size(start=start, end=end)
+        )
+
+    chunk_start = i = 0
+    is_ancestors_chunk = True  # The chunk only holds ancestors of the current element (taken alone)
+    while has_element(i):
+        has_children = has_element(i + 1) and get_depth(i + 1) > get_depth(i)
+        # Whole subtree if it fits the budget, otherwise the element alone (and its children next)
+        subtree_end = get_fitting_subtree_end(start=i, i=i)
+        if subtree_end is not None and is_ancestors_chunk and chunk_start < i and has_children:
+            # Go into the subtree rather than leaving its ancestors (e.g. a heading) alone in a chunk
+            subtree_end = subtree_end if get_size(start=chunk_start, end=subtree_end) <= max_size else None
+        end = subtree_end if subtree_end is not None else i + 1
+        is_split_subtree = subtree_end is None and has_children
+
+        if chunk_start < i and (get_size(start=chunk_start, end=end) > max_size
+                                or (is_split_subtree and not is_ancestors_chunk)):
+            # Close the chunk before a subtree that does not fit it (or that does not fit any chunk)
+            yield make_chunk(start=chunk_start, end=i)
+            # Only the elements of the next chunk are kept
+            del window[:i - offset], cumulative_sizes[:i - offset]
+            chunk_start = offset = i
+            is_ancestors_chunk = True
+        is_ancestors_chunk = is_ancestors_chunk and is_split_subtree
+        i = end
+
+    if chunk_start < i:
+        yield make_chunk(start=chunk_start, end=i)
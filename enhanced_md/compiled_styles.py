@@ -0,0 +1,152 @@
+import hashlib
+
+
+class CompiledStyles:
+	"""
+	Checked style dictionary compiled into a hash map of style name -> (directed element type, hierarchy level, ignore),
+	independent of any docx document so that it can be reused across many EnhancedMD instances:
+	- Defined styles map to their resolved directed element type and hierarchy level
+	- Conflicting styles (hierarchy level 0 for both heading and paragraph) map to (None, 0)
+	- Ignored styles not defined for any directed element type map to (None, None)
+	- Undefined styles are not present
+	"""
+
+	__slots__ = ("heading_styles", "paragraph_styles", "ignore_styles", "style_table", "fingerprint")
+
+	def __init__(self, styles: dict):
+		"""
+		:param styles: Input style dictionary
+		"""
+
+		self._check_and_unpack_styles(styles=styles)
+		self._compile_style_table()
+
+	def _check_and_unpack_styles(self, styles: dict):
+		"""
+		Checks the style dictionary correctness
+		and unpacks into separated style dictionaries for each type of directed element
+		:param styles: Input style dictionary
+		"""
+
+		# Check heading styles
+		try:
+			self.heading_styles = styles["heading"]
+			self._check_style_dict(style_dict=self.heading_styles, element_name="heading")
+		except KeyError:
+			raise KeyError("styles dictionary missing \"heading\"")
+
+		# Check paragraph styles
+		try:
+			self.paragraph_styles = styles["paragraph"]
+			self._check_style_dict(style_dict=self.paragraph_styles, element_name="paragraph")
+		except KeyError:
+			raise KeyError("styles dictionary missing \"paragraph\"")
+
+		# Check ignore styles
+		try:
+			self.ignore_styles = styles["ignore"]
+		except KeyError:
+			raise KeyError("styles dictionary missing \"ignore\"")
+
+		# TODO: Check that styles for different elements are not the same (except level 0)
+
+	@staticmethod
+	def _check_style_dict(style_dict: dict, element_name: str):
+		"""
+		Checks the correctness of the directed element specific style dictionary:
+		- Integers keys representing the hierarchy level (including 0 which represents undefined)
+		- The hierarchy levels cannot be empty except the undefined one
+		:param style_dict: Directed element specific style dictionary
+		"""
+
+		hierarchy_levels = style_dict.keys()
+
+		# Check style dictionary hierarchy levels consist only of integers
+		if not all(isinstance(key, int) for key in hierarchy_levels):
+			raise KeyError(f"{element_name} style dictionary hierarchy levels keys must consist only of integers")
+
+		# Check style dictionary hierarchy levels range from 0 to the maximum level without any gaps
+		# and that no hierarchy level is empty except for hierarchy level 0
+		for key in range(max(hierarchy_levels) + 1):
+			try:
+				# Checks first for KeyError and only can raise ValueError for hierarchy levels higher than 0
+				if not style_dict[key] and key:
+					raise ValueError(f"{element_name} style dictionary, {key} hierarchy level cannot be empty")
+				if any([type(style) is not str for style in style_dict[key]]):
+					raise ValueError(f"{element_name} style dictionary, {key} hierarchy level "
+					                 f"must be an array containing strings")
+			except KeyError:
+				raise KeyError(f"{element_name} style dictionary, {key} hierarchy level must be defined")
+
+	def _compile_style_table(self):
+		"""
+		Resolves every style name directed element type and hierarchy level once
+		"""
+
+		heading_hierarchy_levels = self._compile_hierarchy_levels(style_dict=self.heading_styles)
+		paragraph_hierarchy_levels = self._compile_hierarchy_levels(style_dict=self.paragraph_styles)
+
+		self.style_table = {}
+		for style_name in {*heading_hierarchy_levels, *paragraph_hierarchy_levels, *self.ignore_styles}:
+			directed_element_type, hierarchy_level = self._resolve_directed_element_type_and_hierarchy_level(
+				heading_hl=heading_hierarchy_levels.get(style_name),
+				paragraph_hl=paragraph_hierarchy_levels.get(style_name)
+			)
+			self.style_table[style_name] = (directed_element_type, hierarchy_level, style_name in self.ignore_styles)
+
+		# Stable digest of the style table (independent of the style dictionary order)
+		self.fingerprint = hashlib.sha256(repr(sorted(self.style_table.items())).encode()).hexdigest()
+
+	@staticmethod
+	def _compile_hierarchy_levels(style_dict: dict) -> dict[str, int]:
+		"""
+		:param style_dict: Directed element specific style dictionary
+		:return hierarchy_levels: Style name -> first hierarchy level (in dictionary order) defining it
+		"""
+
+		hierarchy_levels = {}
+		for hierarchy_level in style_dict:
+			for style_name in style_dict[hierarchy_level]:
+				hierarchy_levels.setdefault(style_name, hierarchy_level)
+
+		return hierarchy_levels
+
+	@staticmethod
+	def _resolve_directed_element_type_and_hierarchy_level(heading_hl: int | None,
+	                                                        paragraph_hl: int | None) -> tuple[str | None, int | None]:
+		"""
+		:param heading_hl:
+		:param paragraph_hl:
+		:return directed_element_type, hierarchy_level:
+		"""
+
+		#
+		if heading_hl is not None and heading_hl:
+			return "heading", heading_hl
+
+		#
+		if paragraph_hl is not None and paragraph_hl:
+			return "paragraph", paragraph_hl
+
+		#
+		if heading_hl is None:
+			if paragraph_hl is None:
+				# Undefined for both directed element types
+				return None, None
+			else:
+				return "paragraph", 1
+		else:
+			if paragraph_hl is None:
+				return "heading", 1
+			else:
+				# Both heading hierarchy levels are 0, conflict to be solved when found
+				return None, 0
+
+	def is_ignored(self, style_name: str) -> bool:
+		try:
+			return self.style_table[style_name][2]
+		except KeyError:
+			return False
+
+	def get(self, style_name: str) -> tuple[str | None, int | None, bool] | None:
+		return self.style_table.get(style_name)
@@ -1,5 +1,9 @@
 import roman
 
+# Library version, single source of the package version read by setup.py (part of the parse cache keys, so documents
+# built by other versions are not reused)
+ENHANCED_MD_VERSION = "0.1"
+
 
 NUMBERING_TYPE_REGEX = {
     "bullet": r"\u2022",  # •, TODO: Find commonly used bullet characters
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+# Version of the detached element and document layout (part of the parse cache keys, bumped whenever the layout
+# changes so entries pickled with another layout are not reused)
+DETACHED_FORMAT_VERSION = 2
+
+# Directed element type letters used in the document representation
+DIRECTED_ELEMENT_TYPES_REPR = {
+    "Heading": "H",
+    "Paragraph": "P",
+    "Table": "T"
+}
+
+
+def construct_repr_string(element_type: str, identifier: str, item: list[int] | tuple[int, ...],
+                          heading_item: list[int] | tuple[int, ...] | None, style: str, numbering: str | None,
+                          text: str) -> str:
+    """
+    Constructs the document representation line of a single directed element
+    :param element_type: Directed element class name
+    :param identifier: Directed element identifier string
+    :param item:
+    :param heading_item:
+    :param style:
+    :param numbering: Formatted numbering (None if the directed element has no numbering)
+    :param text:
+    :return repr_string:
+    """
+
+    heading_item_len = 0 if element_type == "Heading" or heading_item is None else len(heading_item)
+    space = "·"*5*(len(item) + heading_item_len - 1)
+    marker = "" if heading_item_len == 0 and len(item) == 1 else "+----"
+    numbering = "" if numbering is None else f"${numbering}$ "
+    return (f"@@@{identifier}@@@{DIRECTED_ELEMENT_TYPES_REPR[element_type]}|{space}{marker}"
+            f"{list(item)}({style}) {numbering}->{repr(text)}")
+
+
+class DetachedElement:
+    """
+    Plain copy of a built directed element without any docx reference,
+    parent and children are stored as indices of the detached document elements
+    and hyperlinks as (start, end, link, link type name) spans of the text
+    """
+
+    __slots__ = ("element_type", "identifier", "text", "style", "hierarchy_level", "item", "heading_item",
+                 "numbering", "parent", "children", "hyperlinks", "plain_text")
+
+    def __init__(self, element_type: str, identifier: str, text: str, style: str, hierarchy_level: int,
+                 item: tuple[int, ...], heading_item: tuple[int, ...] | None, numbering: str | None,
+                 parent: int | None, children: tuple[int, ...],
+                 hyperlinks: tuple[tuple[int, int, str, str], ...] = (), plain_text: str | None = None):
+        self.element_type: str = element_type
+        self.identifier: str = identifier
+        self.text: str = text
+        # Text without markup (the same string object as the text if they are equal, so it is pickled once)
+        self.plain_text: str = plain_text if plain_text is not None else text
+        self.style: str = style
+        self.hierarchy_level: int = hierarchy_level
+        self.item: tuple[int, ...] = item
+        self.heading_item: tuple[int, ...] | None = heading_item
+        self.numbering: str | None = numbering
+        self.parent: int | None = parent
+        self.children: tuple[int, ...] = children
+        self.hyperlinks: tuple[tuple[int, int, str, str], ...] = hyperlinks
+
+    def __reduce__(self):
+        # Pickle as a plain positional tuple instead of the default slots state dictionary
+        return DetachedElement, (self.element_type, self.identifier, self.text, self.style, self.hierarchy_level,
+                                 self.item, self.heading_item, self.numbering, self.parent, self.children,
+                                 self.hyperlinks, self.plain_text)
+
+    def __repr__(self) -> str:
+        return construct_repr_string(
+            element_type=self.element_type, identifier=self.identifier, item=self.item,
+            heading_item=self.heading_item, style=self.style, numbering=self.numbering, text=self.text
+        )
+
+
+class DetachedDocument:
+    """
+    Plain copy of a built EnhancedMD document without any docx reference,
+    elements are stored in flat document order and doc graph holds the indices of the root elements
+    """
+
+    __slots__ = ("docx_file_path", "docx_metadata", "elements", "doc_graph")
+
+    def __init__(self, docx_file_path: str, docx_metadata: dict, elements: list[DetachedElement],
+                 doc_graph: tuple[int, ...]):
+        self.docx_file_path: str = docx_file_path
+        self.docx_metadata: dict = docx_metadata
+        self.elements: list[DetachedElement] = elements
+        self.doc_graph: tuple[int, ...] = doc_graph
+
+    def __reduce__(self):
+        return DetachedDocument, (self.docx_file_path, self.docx_metadata, self.elements, self.doc_graph)
+
+    def __len__(self) -> int:
+        return len(self.elements)
+
+    def __iter__(self):
+        return iter(self.elements)
+
+    def __repr__(self) -> str:
+        return f"~{repr(self.docx_metadata['title'])}\n"+"\n".join(map(repr, self.elements))
+
+    def get_parent(self, element: DetachedElement) -> DetachedElement | None:
+        return None if element.parent is None else self.elements[element.parent]
+
+    def get_children(self, element: DetachedElement) -> list[DetachedElement]:
+        return [self.elements[child] for child in element.children]
@@ -0,0 +1,190 @@
+"""
+Structural diff between two built documents, aligning their elements by hashing instead of comparing texts pairwise:
+
+1. Elements are matched by (heading path, content) key, then the remaining ones by content key only, where the content
+   key is the element type, style and text (numbering is left out so that renumbered elements still match) and the
+   heading path is the content keys of the heading ancestors
+2. The longest increasing subsequence of the matched elements (in both documents order) is kept as anchors, the other
+   matched elements have been moved
+3. Unmatched elements between the same consecutive anchors are paired in order by element type as modified,
+   the rest have been inserted or deleted
+
+Everything is linear but the longest increasing subsequence (n log n)
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from collections import deque
+from enum import Enum, auto
+
+from enhanced_md.detached_elements import DetachedElement, DetachedDocument
+
+
+class DiffType(Enum):
+    INSERTED = auto()
+    DELETED = auto()
+    MOVED = auto()
+    MODIFIED = auto()
+
+
+class ElementDiff:
+    """
+    Difference of a single element between the old and the new document
+    (old or new index and identifier are None for inserted or deleted elements respectively)
+    """
+
+    __slots__ = ("diff_type", "old_index", "new_index", "old_identifier", "new_identifier", "old_text", "new_text")
+
+    def __init__(self, diff_type: DiffType, old_element: DetachedElement | None, new_element: DetachedElement | None,
+                 old_index: int | None, new_index: int | None):
+        self.diff_type: DiffType = diff_type
+        # Indexes in the flat documents
+        self.old_index: int | None = old_index
+        self.new_index: int | None = new_index
+        self.old_identifier: str | None = old_element.identifier if old_element is not None else None
+        self.new_identifier: str | None = new_element.identifier if new_element is not None else None
+        self.old_text: str | None = old_element.text if old_element is not None else None
+        self.new_text: str | None = new_element.text if new_element is not None else None
+
+    def __repr__(self) -> str:
+        return f"{self.diff_type.name} {self.old_identifier!r} -> {self.new_identifier!r}"
+
+
+def _get_content_key(element: DetachedElement) -> tuple[str, str, str]:
+    return element.element_type, element.style, element.text
+
+
+def _get_keys(document: DetachedDocument) -> tuple[list[tuple], list[int]]:
+    """
+    :param document:
+    :return content_keys, path_keys: Content key and heading path hash of each element
+    """
+
+    content_keys = [_get_content_key(element=element) for element in document.elements]
+    path_keys = []
+    for element in document.elements:
+        # Parents precede their children in the flat document
+        if element.parent is None:
+            path_keys.append(0)
+        elif document.elements[element.parent].element_type == "Heading":
+            path_keys.append(hash((path_keys[element.parent], content_keys[element.parent])))
+        else:
+            path_keys.append(path_keys[element.parent])
+
+    return content_keys, path_keys
+
+
+def _match_elements(old_document: DetachedDocument, new_document: DetachedDocument) -> list[int | None]:
+    """
+    :param old_document:
+    :param new_document:
+    :return matches: Matched old element index of each new element (None if unmatched)
+    """
+
+    old_content_keys, old_path_keys = _get_keys(document=old_document)
+    new_content_keys, new_path_keys = _get_keys(document=new_document)
+
+    # Same content under the same heading path, in document order
+    old_indexes = {}
+    for i, key in enumerate(zip(old_path_keys, old_content_keys)):
+        old_indexes.setdefault(key, deque()).append(i)
+    matches = []
+    matched_old_indexes = set()
+    for key in zip(new_path_keys, new_content_keys):
+        _old_indexes = old_indexes.get(key)
+        matches.append(_old_indexes.popleft() if _old_indexes else None)
+        if matches[-1] is not None:
+            matched_old_indexes.add(matches[-1])
+
+    # Same content anywhere else
+    old_indexes = {}
+    for i, key in enumerate(old_content_keys):
+        if i not in matched_old_indexes:
+            old_indexes.setdefault(key, deque()).append(i)
+    for j, key in enumerate(new_content_keys):
+        if matches[j] is None:
+            _old_indexes = old_indexes.get(key)
+            if _old_indexes:
+                matches[j] = _old_indexes.popleft()
+
+    return matches
+
+
+def _get_anchors(matches: list[int | None]) -> set[int]:
+    """
+    :param matches:
+    :return anchors: New indexes of the longest increasing subsequence of matched old indexes
+    """
+
+    tails = []  # Old index ending the increasing subsequences of each length
+    tail_indexes = []  # New index ending the increasing subsequences of each length
+    predecessors = {}
+    for j, i in enumerate(matches):
+        if i is None:
+            continue
+        length = bisect_left(tails, i)
+        if length == len(tails):
+            tails.append(i)
+            tail_indexes.append(j)
+        else:
+            tails[length] = i
+            tail_indexes[length] = j
+        predecessors[j] = tail_indexes[length - 1] if length else None
+
+    anchors = set()
+    j = tail_indexes[-1] if tail_indexes else None
+    while j is not None:
+        anchors.add(j)
+        j = predecessors[j]
+
+    return anchors
+
+
+def diff_documents(old_document: DetachedDocument, new_document: DetachedDocument) -> list[ElementDiff]:
+    """
+    :param old_document:
+    :param new_document:
+    :return element_diffs: Inserted, deleted, moved and modified elements (in new document order,
+    deleted elements placed where they would be in the new document)
+    """
+
+    matches = _match_elements(old_document=old_document, new_document=new_document)
+    anchors = _get_anchors(matches=matches)
+    matched_old_indexes = {i for i in matches if i is not None}
+
+    element_diffs = []
+    old_elements = old_document.elements
+    new_elements = new_document.elements
+
+    def diff_gap(old_start: int, old_end: int, new_start: int, new_end: int):
+        # Unmatched elements between two consecutive anchors, paired in order by element type
+        unmatched_old_indexes = {}
+        for i in range(old_start, old_end):
+            if i not in matched_old_indexes:
+                unmatched_old_indexes.setdefault(old_elements[i].element_type, deque()).append(i)
+
+        for j in range(new_start, new_end):
+            i = matches[j]
+            if i is not None:
+                element_diffs.append(ElementDiff(DiffType.MOVED, old_elements[i], new_elements[j], i, j))
+                continue
+
+            _unmatched_old_indexes = unmatched_old_indexes.get(new_elements[j].element_type)
+            if _unmatched_old_indexes:
+                i = _unmatched_old_indexes.popleft()
+                element_diffs.append(ElementDiff(DiffType.MODIFIED, old_elements[i], new_elements[j], i, j))
+            else:
+                element_diffs.append(ElementDiff(DiffType.INSERTED, None, new_elements[j], None, j))
+
+        for i in sorted(i for _unmatched_old_indexes in unmatched_old_indexes.values()
+                        for i in _unmatched_old_indexes):
+            element_diffs.append(ElementDiff(DiffType.DELETED, old_elements[i], None, i, None))
+
+    old_start = new_start = 0
+    for j in sorted(anchors):
+        diff_gap(old_start=old_start, old_end=matches[j], new_start=new_start, new_end=j)
+        old_start, new_start = matches[j] + 1, j + 1
+    diff_gap(old_start=old_start, old_end=len(old_elements), new_start=new_start, new_end=len(new_elements))
+
+    return element_diffs
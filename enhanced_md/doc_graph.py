@@ -0,0 +1,292 @@
+"""
+Array backed doc graph storage (struct of arrays), keeping each directed element field in a contiguous NumPy array
+indexed by the element position in the flat document (pre-order) instead of a linked Python object per element:
+
+- Element type, hierarchy level, depth, style (index into the distinct styles), numbering (index into the distinct
+  numberings, -1 if None), parent (-1 if root) and subtree end (first position after the element subtree)
+- Texts concatenated into a single string, sliced by text offsets (elements + 1)
+- Items and heading items stored in an int pool, sliced by their offsets (elements + 1, heading item length -1 if None)
+
+The subtree of an element is the contiguous range [position, subtree end), so queries restricted to a subtree (e.g.
+the paragraphs under an annex) are vectorised over the arrays slice (boolean masks of the matching fields).
+DocGraphElement views give back the directed element API (text, style, item, parent, children, ...) on demand
+"""
+
+from __future__ import annotations
+
+from array import array
+from typing import Iterator
+
+import numpy
+
+from enhanced_md.detached_elements import DetachedDocument, DIRECTED_ELEMENT_TYPES_REPR, construct_repr_string
+
+# Element type code -> directed element class name
+ELEMENT_TYPES = tuple(DIRECTED_ELEMENT_TYPES_REPR)
+
+
+class DocGraph:
+    """
+    Struct of arrays storage of a built doc graph
+    """
+
+    __slots__ = ("docx_file_path", "docx_metadata", "element_types", "hierarchy_levels", "depths", "style_indexes",
+                 "numbering_indexes", "parents", "subtree_ends", "text", "text_offsets", "items", "item_offsets",
+                 "heading_item_offsets", "styles", "numberings")
+
+    def __init__(self, docx_file_path: str, docx_metadata: dict):
+        self.docx_file_path: str = docx_file_path
+        self.docx_metadata: dict = docx_metadata
+
+        self.element_types: numpy.ndarray = numpy.zeros(0, dtype=numpy.int8)
+        self.hierarchy_levels: numpy.ndarray = numpy.zeros(0, dtype=numpy.int16)
+        self.depths: numpy.ndarray = numpy.zeros(0, dtype=numpy.int16)
+        self.style_indexes: numpy.ndarray = numpy.zeros(0, dtype=numpy.int32)
+        self.numbering_indexes: numpy.ndarray = numpy.zeros(0, dtype=numpy.int32)
+        self.parents: numpy.ndarray = numpy.zeros(0, dtype=numpy.int32)
+        self.subtree_ends: numpy.ndarray = numpy.zeros(0, dtype=numpy.int32)
+        self.text: str = ""
+        self.text_offsets: numpy.ndarray = numpy.zeros(1, dtype=numpy.int32)
+        self.items: numpy.ndarray = numpy.zeros(0, dtype=numpy.int32)
+        self.item_offsets: numpy.ndarray = numpy.zeros(1, dtype=numpy.int32)
+        self.heading_item_offsets: numpy.ndarray = numpy.zeros(0, dtype=numpy.int32)
+        # Distinct strings referenced by index
+        self.styles: list[str] = []
+        self.numberings: list[str] = []
+
+    @classmethod
+    def from_detached_document(cls, detached_document: DetachedDocument) -> DocGraph:
+        """
+        :param detached_document: Detached document (elements in flat document order)
+        :return doc_graph:
+        """
+
+        doc_graph = cls(docx_file_path=detached_document.docx_file_path,
+                        docx_metadata=detached_document.docx_metadata)
+        element_type_codes = {element_type: i for i, element_type in enumerate(ELEMENT_TYPES)}
+        style_indexes = {}
+        numbering_indexes = {}
+        texts = []
+        text_offset = 0
+
+        # Columns are appended to typed arrays, then wrapped (without copies) into NumPy arrays
+        columns = {
+            "element_types": array("b"), "hierarchy_levels": array("h"), "depths": array("h"),
+            "style_indexes": array("i"), "numbering_indexes": array("i"), "parents": array("i"),
+            "text_offsets": array("i", [0]), "items": array("i"), "item_offsets": array("i", [0]),
+            "heading_item_offsets": array("i")
+        }
+        depths = columns["depths"]
+        items = columns["items"]
+        for element in detached_document.elements:
+            columns["element_types"].append(element_type_codes[element.element_type])
+            columns["hierarchy_levels"].append(element.hierarchy_level)
+            columns["parents"].append(element.parent if element.parent is not None else -1)
+            # Parents precede their children in the flat document
+            depths.append(depths[element.parent] + 1 if element.parent is not None else 0)
+            columns["style_indexes"].append(style_indexes.setdefault(element.style, len(style_indexes)))
+            columns["numbering_indexes"].append(
+                numbering_indexes.setdefault(element.numbering, len(numbering_indexes))
+                if element.numbering is not None else -1
+            )
+
+            texts.append(element.text)
+            text_offset += len(element.text)
+            columns["text_offsets"].append(text_offset)
+
+            items.extend(element.item)
+            columns["heading_item_offsets"].append(len(items) if element.heading_item is not None else -1)
+            if element.heading_item is not None:
+                items.extend(element.heading_item)
+            columns["item_offsets"].append(len(items))
+
+        for name, values in columns.items():
+            setattr(doc_graph, name, numpy.frombuffer(values, dtype=values.typecode))
+
+        # The subtree of an element ends where the next element not deeper than it starts
+        subtree_ends = array("i", [len(depths)])*len(depths)
+        open_positions = []
+        for position, depth in enumerate(depths):
+            while open_positions and depths[open_positions[-1]] >= depth:
+                subtree_ends[open_positions.pop()] = position
+            open_positions.append(position)
+        doc_graph.subtree_ends = numpy.frombuffer(subtree_ends, dtype=subtree_ends.typecode)
+
+        doc_graph.text = "".join(texts)
+        doc_graph.styles = list(style_indexes)
+        doc_graph.numberings = list(numbering_indexes)
+
+        return doc_graph
+
+    def __len__(self) -> int:
+        return len(self.element_types)
+
+    def __getitem__(self, position: int) -> DocGraphElement:
+        if not -len(self) <= position < len(self):
+            raise IndexError("Doc graph position out of range")
+        return DocGraphElement(doc_graph=self, position=position % len(self))
+
+    def __iter__(self) -> Iterator[DocGraphElement]:
+        return (DocGraphElement(doc_graph=self, position=position) for position in range(len(self)))
+
+    def __repr__(self) -> str:
+        return f"~{repr(self.docx_metadata['title'])}\n"+"\n".join(map(repr, self))
+
+    @property
+    def nbytes(self) -> int:
+        # Bytes of the arrays and the text characters (strings tables excluded)
+        return sum(values.nbytes for values in (
+            self.element_types, self.hierarchy_levels, self.depths, self.style_indexes, self.numbering_indexes,
+            self.parents, self.subtree_ends, self.text_offsets, self.items, self.item_offsets,
+            self.heading_item_offsets
+        )) + len(self.text.encode())
+
+    def get_roots(self) -> list[int]:
+        """
+        :return positions: Positions of the doc graph root elements
+        """
+
+        return numpy.flatnonzero(self.depths == 0).tolist()
+
+    def get_children(self, position: int) -> list[int]:
+        """
+        :param position:
+        :return positions: Positions of the element children (each child subtree is skipped over)
+        """
+
+        start, end = position + 1, self.subtree_ends[position]
+        return (numpy.flatnonzero(self.depths[start:end] == self.depths[position] + 1) + start).tolist()
+
+    def find(self, element_type: str | None = None, style: str | None = None, hierarchy_level: int | None = None,
+             depth: int | None = None, within: int | None = None) -> list[int]:
+        """
+        Scans the element arrays for the elements matching every given field
+        (e.g. find(element_type="Paragraph", hierarchy_level=3, within=annex) for the level 3 paragraphs of an annex)
+        :param element_type: Directed element class name
+        :param style:
+        :param hierarchy_level:
+        :param depth: Depth in the doc graph (0 for the roots)
+        :param within: Position of the element whose subtree (itself excluded) is scanned (whole graph if None)
+        :return positions: Positions of the matching elements in document order
+        """
+
+        start, end = (within + 1, self.subtree_ends[within]) if within is not None else (0, len(self))
+        mask = numpy.ones(end - start, dtype=bool)
+        if element_type is not None:
+            mask &= self.element_types[start:end] == ELEMENT_TYPES.index(element_type)
+        if style is not None:
+            if style not in self.styles:
+                return []
+            mask &= self.style_indexes[start:end] == self.styles.index(style)
+        if hierarchy_level is not None:
+            mask &= self.hierarchy_levels[start:end] == hierarchy_level
+        if depth is not None:
+            mask &= self.depths[start:end] == depth
+
+        return (numpy.flatnonzero(mask) + start).tolist()
+
+    def get_depth_histogram(self) -> list[int]:
+        """
+        :return depth_histogram: Number of elements at each depth
+        """
+
+        return numpy.bincount(self.depths).tolist()
+
+
+class DocGraphElement:
+    """
+    View of a single element of an array backed doc graph, giving back the directed element API
+    (fields are read from the doc graph arrays on access)
+    """
+
+    __slots__ = ("doc_graph", "position")
+
+    def __init__(self, doc_graph: DocGraph, position: int):
+        self.doc_graph: DocGraph = doc_graph
+        self.position: int = position
+
+    def __eq__(self, other) -> bool:
+        return (isinstance(other, DocGraphElement) and self.doc_graph is other.doc_graph
+                and self.position == other.position)
+
+    def __hash__(self) -> int:
+        return hash((id(self.doc_graph), self.position))
+
+    def __repr__(self) -> str:
+        return construct_repr_string(
+            element_type=self.element_type, identifier=self.construct_identifier_string(), item=self.item,
+            heading_item=self.heading_item, style=self.style, numbering=self.numbering, text=self.text
+        )
+
+    def _get_element(self, position: int | None) -> DocGraphElement | None:
+        return DocGraphElement(doc_graph=self.doc_graph, position=position) if position is not None else None
+
+    @property
+    def element_type(self) -> str:
+        return ELEMENT_TYPES[self.doc_graph.element_types[self.position]]
+
+    @property
+    def text(self) -> str:
+        return self.doc_graph.text[self.doc_graph.text_offsets[self.position]:
+                                   self.doc_graph.text_offsets[self.position + 1]]
+
+    @property
+    def style(self) -> str:
+        return self.doc_graph.styles[self.doc_graph.style_indexes[self.position]]
+
+    @property
+    def hierarchy_level(self) -> int:
+        return int(self.doc_graph.hierarchy_levels[self.position])
+
+    @property
+    def depth(self) -> int:
+        return int(self.doc_graph.depths[self.position])
+
+    @property
+    def has_numbering(self) -> bool:
+        return self.doc_graph.numbering_indexes[self.position] != -1
+
+    @property
+    def numbering(self) -> str | None:
+        numbering_index = self.doc_graph.numbering_indexes[self.position]
+        return self.doc_graph.numberings[numbering_index] if numbering_index != -1 else None
+
+    @property
+    def item(self) -> list[int]:
+        heading_item_offset = self.doc_graph.heading_item_offsets[self.position]
+        item_end = heading_item_offset if heading_item_offset != -1 else self.doc_graph.item_offsets[self.position + 1]
+        return self.doc_graph.items[self.doc_graph.item_offsets[self.position]:item_end].tolist()
+
+    @property
+    def heading_item(self) -> list[int] | None:
+        heading_item_offset = self.doc_graph.heading_item_offsets[self.position]
+        if heading_item_offset == -1:
+            return None
+        return self.doc_graph.items[heading_item_offset:self.doc_graph.item_offsets[self.position + 1]].tolist()
+
+    @property
+    def parent(self) -> DocGraphElement | None:
+        parent = int(self.doc_graph.parents[self.position])
+        return self._get_element(position=parent if parent != -1 else None)
+
+    @property
+    def children(self) -> list[DocGraphElement]:
+        return [self._get_element(position=child) for child in self.doc_graph.get_children(position=self.position)]
+
+    @property
+    def previous(self) -> DocGraphElement | None:
+        # Previous and next directed elements chain the flat document order
+        return self._get_element(position=self.position - 1 if self.position > 0 else None)
+
+    @property
+    def next(self) -> DocGraphElement | None:
+        return self._get_element(position=self.position + 1 if self.position + 1 < len(self.doc_graph) else None)
+
+    def construct_identifier_string(self) -> str:
+        identifier = ".".join(str(x + 1) for x in self.item)
+        if self.element_type == "Heading":
+            return identifier
+
+        heading_item = self.heading_item
+        return (f"{'.'.join(str(x + 1) for x in heading_item) if heading_item is not None else 'NONE'}."
+                f"{'T_' if self.element_type == 'Table' else ''}{identifier}")
@@ -0,0 +1,208 @@
+"""
+Compact doc graph file format, storing a detached document as flat little endian arrays so it is loaded with a single
+read instead of re-parsing the docx document (or the document representation):
+
+- Header: magic b"EMDG", format version (uint16), 2 padding bytes and the uint32 sizes of the following sections
+  (metadata bytes, string table bytes, strings, elements, ints, hyperlinks and doc graph roots)
+- Metadata: UTF-8 JSON object with the docx file path, the docx metadata and the keys of the datetime metadata values
+  (stored as ISO 8601 strings)
+- String table: int32 character offsets of each distinct string (strings + 1) followed by their UTF-8 concatenation
+- Elements: ELEMENT_FIELDS int32 per element in flat document order: element type, identifier, text and style
+  (string indexes), hierarchy level, numbering (string index, -1 if None), parent (element index, -1 if None),
+  item, heading item and children (offset and length into the ints, heading item length -1 if None),
+  hyperlinks (offset and length into the hyperlinks) and plain text (string index)
+- Ints: int32 pool of the items, heading items and children
+- Hyperlinks: HYPERLINK_FIELDS int32 per hyperlink: start, end, link and link type name (string indexes)
+- Doc graph: int32 element indexes of the doc graph roots
+"""
+
+from __future__ import annotations
+
+import json
+import struct
+import sys
+from array import array
+from datetime import datetime
+
+from enhanced_md.detached_elements import DetachedElement, DetachedDocument
+from enhanced_md.exceptions import DocGraphFileError
+
+MAGIC = b"EMDG"
+FORMAT_VERSION = 2
+HEADER = struct.Struct("<4sH2x7I")
+ELEMENT_FIELDS = 16
+HYPERLINK_FIELDS = 4
+
+
+def _to_little_endian_bytes(values: array) -> bytes:
+    if sys.byteorder != "little":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _from_little_endian_bytes(data: memoryview) -> array:
+    values = array("i")
+    values.frombytes(data)
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values
+
+
+class _StringTable:
+    """
+    Distinct strings of the document, each stored once and referenced by index
+    """
+
+    __slots__ = ("indexes", "strings")
+
+    def __init__(self):
+        self.indexes: dict[str, int] = {}
+        self.strings: list[str] = []
+
+    def get_index(self, string: str | None) -> int:
+        if string is None:
+            return -1
+
+        try:
+            return self.indexes[string]
+        except KeyError:
+            self.indexes[string] = len(self.strings)
+            self.strings.append(string)
+            return self.indexes[string]
+
+    def to_bytes(self) -> bytes:
+        offsets = array("i", [0])
+        for string in self.strings:
+            offsets.append(offsets[-1] + len(string))
+
+        return _to_little_endian_bytes(offsets) + "".join(self.strings).encode("utf-8")
+
+
+def save_detached_document(detached_document: DetachedDocument, file_path: str):
+    """
+    :param detached_document:
+    :param file_path:
+    """
+
+    string_table = _StringTable()
+    elements = array("i")
+    ints = array("i")
+    hyperlinks = array("i")
+    for element in detached_document.elements:
+        item_offset = len(ints)
+        ints.extend(element.item)
+        heading_item_offset = len(ints)
+        if element.heading_item is not None:
+            ints.extend(element.heading_item)
+        children_offset = len(ints)
+        ints.extend(element.children)
+
+        hyperlinks_offset = len(hyperlinks) // HYPERLINK_FIELDS
+        for start, end, link, link_type in element.hyperlinks:
+            hyperlinks.extend((start, end, string_table.get_index(link), string_table.get_index(link_type)))
+
+        elements.extend((
+            string_table.get_index(element.element_type),
+            string_table.get_index(element.identifier),
+            string_table.get_index(element.text),
+            string_table.get_index(element.style),
+            element.hierarchy_level,
+            string_table.get_index(element.numbering),
+            element.parent if element.parent is not None else -1,
+            item_offset, len(element.item),
+            heading_item_offset, len(element.heading_item) if element.heading_item is not None else -1,
+            children_offset, len(element.children),
+            hyperlinks_offset, len(element.hyperlinks),
+            string_table.get_index(element.plain_text)
+        ))
+
+    metadata = json.dumps({
+        "docx_file_path": detached_document.docx_file_path,
+        "docx_metadata": {key: value.isoformat() if isinstance(value, datetime) else value
+                          for key, value in detached_document.docx_metadata.items()},
+        "datetime_keys": [key for key, value in detached_document.docx_metadata.items()
+                          if isinstance(value, datetime)]
+    }).encode("utf-8")
+    strings = string_table.to_bytes()
+    roots = array("i", detached_document.doc_graph)
+
+    with open(file_path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(metadata), len(strings), len(string_table.strings),
+                               len(elements) // ELEMENT_FIELDS, len(ints), len(hyperlinks) // HYPERLINK_FIELDS,
+                               len(roots)))
+        file.write(metadata)
+        file.write(strings)
+        for values in (elements, ints, hyperlinks, roots):
+            file.write(_to_little_endian_bytes(values))
+
+
+def load_detached_document(file_path: str) -> DetachedDocument:
+    """
+    :param file_path:
+    :return detached_document:
+    """
+
+    with open(file_path, "rb") as file:
+        data = memoryview(file.read())
+
+    if len(data) < HEADER.size:
+        raise DocGraphFileError(f"{file_path} is not a doc graph file")
+    (magic, format_version, n_metadata_bytes, n_string_bytes, n_strings, n_elements, n_ints, n_hyperlinks,
+     n_roots) = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise DocGraphFileError(f"{file_path} is not a doc graph file")
+    if format_version != FORMAT_VERSION:
+        raise DocGraphFileError(f"{file_path} doc graph file format version {format_version} is not supported")
+
+    # Split the sections
+    sections = []
+    offset = HEADER.size
+    for size in (n_metadata_bytes, 4*(n_strings + 1), n_string_bytes - 4*(n_strings + 1),
+                 4*ELEMENT_FIELDS*n_elements, 4*n_ints, 4*HYPERLINK_FIELDS*n_hyperlinks, 4*n_roots):
+        sections.append(data[offset:offset + size])
+        offset += size
+    if offset != len(data):
+        raise DocGraphFileError(f"{file_path} doc graph file is truncated or corrupted")
+    metadata, string_offsets, string_chars, elements, ints, hyperlinks, roots = sections
+
+    metadata = json.loads(bytes(metadata))
+    docx_metadata = metadata["docx_metadata"]
+    for key in metadata["datetime_keys"]:
+        docx_metadata[key] = datetime.fromisoformat(docx_metadata[key])
+
+    string_offsets = _from_little_endian_bytes(string_offsets).tolist()
+    string_chars = str(string_chars, "utf-8")
+    strings = [string_chars[start:end] for start, end in zip(string_offsets, string_offsets[1:])]
+    elements = _from_little_endian_bytes(elements).tolist()
+    ints = _from_little_endian_bytes(ints).tolist()
+    hyperlinks = _from_little_endian_bytes(hyperlinks).tolist()
+
+    detached_elements = []
+    for i in range(0, len(elements), ELEMENT_FIELDS):
+        (element_type, identifier, text, style, hierarchy_level, numbering, parent, item_offset, item_length,
+         heading_item_offset, heading_item_length, children_offset, children_length, hyperlinks_offset,
+         hyperlinks_length, plain_text) = elements[i:i + ELEMENT_FIELDS]
+        hyperlinks_start = HYPERLINK_FIELDS*hyperlinks_offset
+        detached_elements.append(DetachedElement(
+            element_type=strings[element_type],
+            identifier=strings[identifier],
+            text=strings[text],
+            style=strings[style],
+            hierarchy_level=hierarchy_level,
+            item=tuple(ints[item_offset:item_offset + item_length]),
+            heading_item=(tuple(ints[heading_item_offset:heading_item_offset + heading_item_length])
+                          if heading_item_length != -1 else None),
+            numbering=strings[numbering] if numbering != -1 else None,
+            parent=parent if parent != -1 else None,
+            children=tuple(ints[children_offset:children_offset + children_length]),
+            hyperlinks=tuple(
+                (hyperlinks[j], hyperlinks[j + 1], strings[hyperlinks[j + 2]], strings[hyperlinks[j + 3]])
+                for j in range(hyperlinks_start, hyperlinks_start + HYPERLINK_FIELDS*hyperlinks_length,
+                               HYPERLINK_FIELDS)
+            ),
+            plain_text=strings[plain_text]
+        ))
+
+    return DetachedDocument(docx_file_path=metadata["docx_file_path"], docx_metadata=docx_metadata,
+                            elements=detached_elements, doc_graph=tuple(_from_little_endian_bytes(roots)))
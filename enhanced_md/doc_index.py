@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import enhanced_md.enhanced_elements as ee
+from enhanced_md.detached_elements import DetachedDocument, DetachedElement
+
+
+class DocIndex:
+    """
+    Index over a built doc graph (or a detached document, e.g. loaded from the parse cache, indexing its detached
+    elements instead), built once in a single traversal:
+    - Identifier (construct_identifier_string(), computed once per directed element), style name and element type
+      -> directed elements in document order
+    - Pre-order position and subtree end of each directed element, so the subtree of a directed element is
+      a contiguous range of the pre-order and ancestry is checked with an interval comparison
+    """
+
+    __slots__ = ("elements", "positions", "subtree_ends", "identifiers", "identifier_index", "style_index",
+                 "type_index")
+
+    def __init__(self, doc_graph: list[ee.DirectedElement] | None = None):
+        """
+        :param doc_graph: Doc graph root directed elements (empty index if None)
+        """
+
+        self.elements: list[ee.DirectedElement] = []  # Pre-order
+        self.positions: dict[ee.DirectedElement, int] = {}
+        self.subtree_ends: list[int] = []
+        self.identifiers: list[str] = []
+        self.identifier_index: dict[str, list[ee.DirectedElement]] = {}
+        self.style_index: dict[str, list[ee.DirectedElement]] = {}
+        self.type_index: dict[str, list[ee.DirectedElement]] = {}
+        if doc_graph is not None:
+            self._build(doc_graph=doc_graph)
+
+    @classmethod
+    def from_detached_document(cls, detached_document: DetachedDocument) -> DocIndex:
+        """
+        :param detached_document: Detached document (elements in flat document order, which is the pre-order)
+        :return doc_index: Index of the detached elements
+        """
+
+        doc_index = cls()
+        open_positions = []  # Ancestors of the current element
+        for element in detached_document.elements:
+            while open_positions and open_positions[-1] != element.parent:
+                doc_index.subtree_ends[open_positions.pop()] = len(doc_index.elements)
+            open_positions.append(len(doc_index.elements))
+            doc_index._add_element(element=element, identifier=element.identifier, element_type=element.element_type)
+        for position in open_positions:
+            doc_index.subtree_ends[position] = len(doc_index.elements)
+
+        return doc_index
+
+    def _add_element(self, element: ee.DirectedElement | DetachedElement, identifier: str, element_type: str):
+        self.positions[element] = len(self.elements)
+        self.elements.append(element)
+        self.subtree_ends.append(-1)
+        self.identifiers.append(identifier)
+        self.identifier_index.setdefault(identifier, []).append(element)
+        self.style_index.setdefault(element.style, []).append(element)
+        self.type_index.setdefault(element_type, []).append(element)
+
+    def _build(self, doc_graph: list[ee.DirectedElement]):
+        # Explicit stack pre-order traversal (the subtree end is known once the traversal leaves the subtree)
+        stack = [(directed_element, False) for directed_element in reversed(doc_graph)]
+        while stack:
+            directed_element, is_left = stack.pop()
+            if is_left:
+                self.subtree_ends[self.positions[directed_element]] = len(self.elements)
+                continue
+
+            self._add_element(element=directed_element, identifier=directed_element.construct_identifier_string(),
+                              element_type=type(directed_element).__name__)
+
+            stack.append((directed_element, True))
+            stack.extend((child, False) for child in reversed(directed_element.children))
+
+    def __len__(self) -> int:
+        return len(self.elements)
+
+    def get_identifier(self, directed_element: ee.DirectedElement) -> str:
+        return self.identifiers[self.positions[directed_element]]
+
+    def get_by_identifier(self, identifier: str) -> list[ee.DirectedElement]:
+        """
+        :param identifier:
+        :return directed_elements: Directed elements with the identifier (e.g. a heading and a paragraph of
+        the previous heading can share it)
+        """
+
+        return self.identifier_index.get(identifier, [])
+
+    def get_by_style(self, style: str) -> list[ee.DirectedElement]:
+        return self.style_index.get(style, [])
+
+    def get_by_type(self, element_type: type[ee.DirectedElement] | str) -> list[ee.DirectedElement]:
+        """
+        :param element_type: Directed element class or class name (e.g. ee.Heading or "Heading")
+        :return directed_elements:
+        """
+
+        return self.type_index.get(element_type if isinstance(element_type, str) else element_type.__name__, [])
+
+    def get_subtree(self, directed_element: ee.DirectedElement,
+                    include_root: bool = True) -> list[ee.DirectedElement]:
+        """
+        :param directed_element:
+        :param include_root: Include the directed element itself
+        :return subtree: Directed element descendants in pre-order (document order)
+        """
+
+        position = self.positions[directed_element]
+        return self.elements[position + (0 if include_root else 1):self.subtree_ends[position]]
+
+    def get_subtree_range(self, directed_element: ee.DirectedElement) -> tuple[int, int]:
+        """
+        :param directed_element:
+        :return start, end: Pre-order range of the directed element subtree
+        """
+
+        position = self.positions[directed_element]
+        return position, self.subtree_ends[position]
+
+    def is_descendant(self, directed_element: ee.DirectedElement, ancestor: ee.DirectedElement) -> bool:
+        position = self.positions[ancestor]
+        return position < self.positions[directed_element] < self.subtree_ends[position]
@@ -1,17 +1,19 @@
 from __future__ import annotations
 
+import copy
 import re
 from abc import ABC
-from enum import Enum, auto
+from enum import Enum, IntFlag, auto
 from enhanced_md.exceptions import UndefinedTextFormatError
 from enhanced_md.config import NUMBERING_TYPE_REGEX, NUMBERING_TYPE_INT_TO_STR, NUMBERING_TYPE_STR_TO_INT
+from enhanced_md.numbering_xml_index import NumberingXmlIndex, xpath
 
 from docx.text.paragraph import Paragraph as DocxParagraph
 from docx.text.hyperlink import Hyperlink as DocxHyperlink
-from docx.table import Table as DocxTable
+from docx.table import Table as DocxTable, _Cell as DocxCell
 
 # Define general docx element type
-DocxElement = DocxHyperlink | DocxParagraph | DocxTable
+DocxElement = DocxHyperlink | DocxParagraph | DocxTable | DocxCell
 
 class TextFormat(Enum):
     HTML = auto()
@@ -25,57 +27,104 @@ class LinkType(Enum):
     NONE = auto()
 
 
+class FontStyle(IntFlag):
+    ITALIC = auto()
+    BOLD = auto()
+    UNDERLINE = auto()
+    STRIKE = auto()
+    SUPERSCRIPT = auto()
+    SUBSCRIPT = auto()
+
+
+# Font style attribute name for each font style flag (in the font_style dictionary view order)
+FONT_STYLE_NAMES = (
+    ("italic", FontStyle.ITALIC),
+    ("bold", FontStyle.BOLD),
+    ("underline", FontStyle.UNDERLINE),
+    ("strike", FontStyle.STRIKE),
+    ("superscript", FontStyle.SUPERSCRIPT),
+    ("subscript", FontStyle.SUBSCRIPT),
+)
+
+# Tags wrapping the string for each font style flag (applied from the innermost to the outermost)
+FONT_STYLE_HTML_TAGS = (
+    (FontStyle.ITALIC, "<i>", "</i>"),
+    (FontStyle.BOLD, "<b>", "</b>"),
+    (FontStyle.UNDERLINE, "<u>", "</u>"),
+    (FontStyle.STRIKE, "<strike>", "</strike>"),
+    (FontStyle.SUPERSCRIPT, "<sup>", "</sup>"),
+    (FontStyle.SUBSCRIPT, "<sub>", "</sub>"),
+)
+FONT_STYLE_MD_TAGS = (
+    (FontStyle.ITALIC, "*", "*"),
+    (FontStyle.BOLD, "**", "**"),
+    (FontStyle.STRIKE, "~~", "~~"),
+    # For underline, superscript and subscript, Markdown doesn't have a standard notation, so HTML tags are used
+    (FontStyle.UNDERLINE, "<u>", "</u>"),
+    (FontStyle.SUPERSCRIPT, "<sup>", "</sup>"),
+    (FontStyle.SUBSCRIPT, "<sub>", "</sub>"),
+)
+
+
+# Split by spaces, sequences of word characters ('-' included), and punctuation characters
+TOKEN_REGEX = re.compile(r"(\s|[\w-]+|\W)")
+
+# Split numbering format strings into ilvl placeholders (%1, %2, ...) and literal parts
+NUMBERING_FORMAT_REGEX = re.compile(r"%\d+|[^%]+")
+
+
 class Content:
-    __slots__ = ("string", "font_style")
+    """
+    Span of text sharing the same font style (a whole docx run, or consecutive runs joined mid-word)
+    """
+
+    __slots__ = ("string", "font_flags")
 
     def __init__(
             self, string: str,
             italic: bool = False, bold: bool = False, underline: bool = False, strike: bool = False,
-            superscript: bool = False, subscript: bool = False
+            superscript: bool = False, subscript: bool = False, font_flags: int | None = None
     ):
         self.string: str = string
-        self.font_style: dict[str, bool] = {
-            "italic": italic, "bold": bold, "underline": underline, "strike": strike,
-            "superscript": superscript, "subscript": subscript
-        }
+        # Font style attributes packed into a FontStyle bitmask (plain int so small values are shared)
+        self.font_flags: int = font_flags if font_flags is not None else int(
+            (FontStyle.ITALIC if italic else 0) | (FontStyle.BOLD if bold else 0)
+            | (FontStyle.UNDERLINE if underline else 0) | (FontStyle.STRIKE if strike else 0)
+            | (FontStyle.SUPERSCRIPT if superscript else 0) | (FontStyle.SUBSCRIPT if subscript else 0)
+        )
+
+    @property
+    def font_style(self) -> dict[str, bool]:
+        # Dictionary view of the font style bitmask
+        return {name: bool(self.font_flags & flag) for name, flag in FONT_STYLE_NAMES}
+
+    @property
+    def tokens(self) -> list[str]:
+        # Token boundaries are only computed when requested
+        return TOKEN_REGEX.findall(self.string)
 
     def __repr__(self) -> str:
         return f"string text: {repr(self.string)}\t(font style: {self.font_style})"
 
     def string_to_html(self) -> str:
-        html_tags = {
-            "italic": ("i", "i"),
-            "bold": ("b", "b"),
-            "underline": ("u", "u"),
-            "strike": ("strike", "strike"),
-            "superscript": ("sup", "sup"),
-            "subscript": ("sub", "sub"),
-        }
         html_string = self.string.replace('\n', '<br>')
-        for style, (start_tag, end_tag) in html_tags.items():
-            if self.font_style[style]:
-                html_string = f"<{start_tag}>{html_string}</{end_tag}>"
+        if self.font_flags:
+            for flag, start_tag, end_tag in FONT_STYLE_HTML_TAGS:
+                if self.font_flags & flag:
+                    html_string = f"{start_tag}{html_string}{end_tag}"
         return html_string
 
     def string_to_md(self) -> str:
-        md_tags = {
-            "italic": ("*", "*"),
-            "bold": ("**", "**"),
-            "strike": ("~~", "~~"),
-            # For underline, superscript and subscript, Markdown doesn't have a standard notation, so HTML tags are used
-            "underline": ("<u>", "</u>"),
-            "superscript": ("<sup>", "</sup>"),
-            "subscript": ("<sub>", "</sub>"),
-        }
         md_string = self.string
-        for style, (start, end) in md_tags.items():
-            if self.font_style[style]:
-                md_string = f"{start}{md_string}{end}"
+        if self.font_flags:
+            for flag, start, end in FONT_STYLE_MD_TAGS:
+                if self.font_flags & flag:
+                    md_string = f"{start}{md_string}{end}"
         return md_string
 
 
 class BaseElement(ABC):
-    __slots__ = ("content", "docx_element", "text_format", "text")
+    __slots__ = ("content", "docx_element", "text_format", "rendered_texts")
 
     def __init__(self, content: list[Content | BaseElement], docx_element: DocxElement,
                  text_format: TextFormat = TextFormat.HTML):
@@ -83,104 +132,207 @@ class BaseElement(ABC):
         self.docx_element: DocxElement = docx_element
         self._check_text_format(text_format)
         self.text_format: TextFormat = text_format
-        self.text: str = self._construct_text_from_content()
+        # Text rendered for each text format, constructed on first access
+        self.rendered_texts: dict[TextFormat, str] | None = None
 
     @staticmethod
     def _check_text_format(text_format: TextFormat):
-        if text_format not in TextFormat:
+        if not isinstance(text_format, TextFormat):
             raise UndefinedTextFormatError(
                 f"Undefined text format found: {text_format}. Options are: [\"html\", \"md\", \"plain\"]")
 
-    def _construct_text_from_content(self) -> str:
-        construct_method = {
-            "html": self._construct_html_text_from_content,
-            "md": self._construct_md_text_from_content,
-            "plain": self._construct_plain_text_from_content,
-        }.get(str(self.text_format), self._construct_plain_text_from_content)
-        return construct_method()
+    @property
+    def text(self) -> str:
+        return self.render(text_format=self.text_format)
 
-    @staticmethod
-    def clean_html_tags(text: str) -> str:
-        # Define tag pairs to be cleaned
-        tag_pairs = {
-            "italic": ("i", "i"),
-            "bold": ("b", "b"),
-            "underline": ("u", "u"),
-            "strike": ("strike", "strike"),
-            "superscript": ("sup", "sup"),
-            "subscript": ("sub", "sub"),
-        }
-
-        # Iterate through tag pairs and replace consecutive tags
-        for tag in tag_pairs.values():
-            opening_tag, closing_tag = tag
-            pattern = re.compile(f"</{closing_tag}>\\s*<{opening_tag}>")
-            text = pattern.sub(" ", text)
+    def render(self, text_format: TextFormat) -> str:
+        """
+        Renders the element text in the given text format, memoized per text format
+        :param text_format:
+        :return text:
+        """
+
+        if self.rendered_texts is None:
+            self.rendered_texts = {}
+        else:
+            try:
+                return self.rendered_texts[text_format]
+            except KeyError:
+                pass
 
+        self._check_text_format(text_format)
+        text = self._construct_text_from_content(text_format=text_format)
+        self.rendered_texts[text_format] = text
         return text
 
-    @staticmethod
-    def clean_and_merge_markdown(text: str) -> str:
-        # Patterns to identify Markdown syntax for bold, italic, strikethrough, superscript, and subscript
-        markdown_patterns = {
-            "bold": r"\*\*(.*?)\*\*",
-            "italic": r"\*(.*?)\*",
-            "strike": r"~~(.*?)~~",
-            "superscript": r"<sup>(.*?)</sup>",
-            "subscript": r"<sub>(.*?)</sub>",
-        }
-
-        # Pattern to find unnecessary repeated Markdown without content
-        cleanup_patterns = {
-            "bold": r"\*\*\s*\*\*",
-            "italic": r"\*\s*\*",
-            "strike": r"~~\s*~~",
-            "superscript": r"<sup>\s*</sup>",
-            "subscript": r"<sub>\s*</sub>",
-        }
-
-        # First, remove any unnecessary repeated Markdown syntax
-        for pattern in cleanup_patterns.values():
-            text = re.sub(pattern, " ", text)
-
-        # Now, merge adjacent markdown patterns
-        for key, pattern in markdown_patterns.items():
-            # Create a regex to find adjacent patterns
-            merge_regex = re.compile(f"({pattern})\s+({pattern})")
-            while True:
-                # Look for matches to merge
-                match = merge_regex.search(text)
-                if not match:
-                    break  # Exit loop if no more matches
-                # Extract matched texts without the Markdown syntax
-                text1, text2 = match.group(1), match.group(3)
-                # Determine the Markdown syntax based on the key
-                if key in ["bold", "italic", "strike"]:
-                    md_open, md_close = match.group(2)[0] * 2, match.group(2)[-1] * 2
-                else:  # For superscript and subscript
-                    md_open = f"<{key}>"
-                    md_close = f"</{key}>"
-                # Replace the matched text with merged version
-                merged_text = f"{md_open}{text1} {text2}{md_close}"
-                text = text[:match.start()] + merged_text + text[match.end():]
+    def _construct_text_from_content(self, text_format: TextFormat) -> str:
+        construct_method = {
+            TextFormat.HTML: self._construct_html_text_from_content,
+            TextFormat.MD: self._construct_md_text_from_content,
+            TextFormat.PLAIN: self._construct_plain_text_from_content,
+        }[text_format]
+        return construct_method()
 
-        return text
+    def get_nested_spans(self, text_format: TextFormat) -> list[tuple[int, int, BaseElement]]:
+        """
+        Locates the nested elements (e.g. hyperlinks) in the element text rendered in the given text format
+        :param text_format:
+        :return nested_spans: (start, end, nested element) of each nested element rendering
+        """
 
-    def _construct_html_text_from_content(self) -> str:
-        return self.clean_html_tags(
-            ''.join([content.string_to_html() if isinstance(content, Content)
-                     else content._construct_html_text_from_content() for content in self.content])
+        self._check_text_format(text_format)
+        nested_spans = []
+        {
+            TextFormat.HTML: self._construct_html_text_from_content,
+            TextFormat.MD: self._construct_md_text_from_content,
+            TextFormat.PLAIN: self._construct_plain_text_from_content,
+        }[text_format](nested_spans=nested_spans)
+        return nested_spans
+
+    def _get_rendered_content(self) -> list[Content | BaseElement]:
+        return self.content
+
+    def release_source(self) -> int:
+        """
+        Drops the docx element references of the element and its nested elements (once the text is resolved)
+        :return n_released: Number of released elements
+        """
+
+        self.docx_element = None
+        return 1 + sum(content.release_source() for content in self.content if isinstance(content, BaseElement))
+
+    def _construct_html_text_from_content(self, nested_spans: list | None = None) -> str:
+        return self._construct_markup_text_from_content(
+            text_format=TextFormat.HTML, tags=FONT_STYLE_HTML_TAGS, line_break="<br>", nested_spans=nested_spans
         )
 
-    def _construct_md_text_from_content(self) -> str:
-        return self.clean_and_merge_markdown(
-            ''.join([content.string_to_md() if isinstance(content, Content)
-                     else content._construct_md_text_from_content() for content in self.content])
+    def _construct_md_text_from_content(self, nested_spans: list | None = None) -> str:
+        return self._construct_markup_text_from_content(
+            text_format=TextFormat.MD, tags=FONT_STYLE_MD_TAGS, line_break="\n", nested_spans=nested_spans
         )
 
-    def _construct_plain_text_from_content(self) -> str:
-        return ''.join([content.string if isinstance(content, Content)
-                        else content._construct_plain_text_from_content() for content in self.content])
+    def _construct_markup_text_from_content(self, text_format: TextFormat, tags: tuple, line_break: str,
+                                            nested_spans: list | None = None) -> str:
+        """
+        Constructs the text with font style markup in a single pass over the content, merging the markup of adjacent
+        spans sharing font style flags instead of closing and reopening it (whitespace only spans are kept inside the
+        markup shared by both neighbour spans)
+        :param text_format: Text format of nested elements
+        :param tags: Font style flag tags (from the innermost to the outermost)
+        :param line_break: Line break replacement
+        :param nested_spans: List collecting the (start, end, nested element) of each nested element rendering
+        :return text:
+        """
+
+        content = self._get_rendered_content()
+
+        # Font style flags of the next non whitespace span of each content (0 if a nested element comes first)
+        next_font_flags = [0]*len(content)
+        font_flags = 0
+        for i in range(len(content) - 1, -1, -1):
+            next_font_flags[i] = font_flags
+            _content = content[i]
+            if not isinstance(_content, Content):
+                font_flags = 0
+            elif _content.string and not _content.string.isspace():
+                font_flags = _content.font_flags
+
+        text_parts = []
+        # Length of the text parts counted so far (only counted when locating the nested elements)
+        text_length = 0
+        n_counted_text_parts = 0
+        open_tags = []  # (flag, end tag) from the outermost to the innermost
+        open_font_flags = 0
+        for i, _content in enumerate(content):
+            if not isinstance(_content, Content):
+                # Nested elements are rendered outside any font style markup
+                while open_tags:
+                    text_parts.append(open_tags.pop()[1])
+                open_font_flags = 0
+                nested_text = _content.render(text_format=text_format)
+                if nested_spans is not None:
+                    for text_part in text_parts[n_counted_text_parts:]:
+                        text_length += len(text_part)
+                    n_counted_text_parts = len(text_parts)
+                    nested_spans.append((text_length, text_length + len(nested_text), _content))
+                text_parts.append(nested_text)
+                continue
+
+            string = _content.string
+            if not string:
+                continue
+            font_flags = (open_font_flags & next_font_flags[i]) if string.isspace() else _content.font_flags
+
+            # Close the markup not shared with the span (and any markup opened inside it)
+            n_kept_tags = 0
+            while n_kept_tags < len(open_tags) and font_flags & open_tags[n_kept_tags][0]:
+                n_kept_tags += 1
+            while len(open_tags) > n_kept_tags:
+                flag, end_tag = open_tags.pop()
+                open_font_flags &= ~flag
+                text_parts.append(end_tag)
+
+            # Open the missing markup
+            for flag, start_tag, end_tag in reversed(tags):
+                if font_flags & flag and not open_font_flags & flag:
+                    open_font_flags |= flag
+                    open_tags.append((flag, end_tag))
+                    text_parts.append(start_tag)
+
+            text_parts.append(string.replace("\n", line_break))
+
+        while open_tags:
+            text_parts.append(open_tags.pop()[1])
+
+        return "".join(text_parts)
+
+    def _construct_plain_text_from_content(self, nested_spans: list | None = None) -> str:
+        if nested_spans is None:
+            return ''.join([content.string if isinstance(content, Content)
+                            else content._construct_plain_text_from_content()
+                            for content in self._get_rendered_content()])
+
+        text_parts = []
+        start = 0
+        for content in self._get_rendered_content():
+            if isinstance(content, Content):
+                text_parts.append(content.string)
+            else:
+                text_parts.append(content._construct_plain_text_from_content())
+                nested_spans.append((start, start + len(text_parts[-1]), content))
+            start += len(text_parts[-1])
+
+        return "".join(text_parts)
+
+    @staticmethod
+    def skip_content_chars(content: list[Content | BaseElement], n_chars: int) -> list[Content | BaseElement]:
+        """
+        Removes the first characters of the content strings (nested elements content included)
+        :param content:
+        :param n_chars: Number of characters to remove
+        :return skipped_content:
+        """
+
+        skipped_content = []
+        for i, _content in enumerate(content):
+            if n_chars <= 0:
+                skipped_content.extend(content[i:])
+                break
+
+            if isinstance(_content, Content):
+                if n_chars < len(_content.string):
+                    skipped_content.append(Content(string=_content.string[n_chars:], font_flags=_content.font_flags))
+                n_chars -= len(_content.string)
+            else:
+                n_content_chars = sum(len(c.string) for c in _content.content if isinstance(c, Content))
+                if n_chars < n_content_chars:
+                    _content = copy.copy(_content)
+                    _content.content = BaseElement.skip_content_chars(content=_content.content, n_chars=n_chars)
+                    _content.rendered_texts = None
+                    skipped_content.append(_content)
+                n_chars -= n_content_chars
+
+        return skipped_content
 
 
 class Hyperlink(BaseElement):
@@ -195,19 +347,32 @@ class Hyperlink(BaseElement):
         self.type = LinkType.URL if address else LinkType.JUMP if fragment else LinkType.NONE
         super().__init__(content=content, docx_element=docx_element, text_format=text_format)
 
-    def _construct_html_text_from_content(self) -> str:
+    def copy_processed(self, docx_element: DocxElement) -> Hyperlink:
+        """
+        Copies the processed hyperlink to be placed in another build of the same docx element
+        :param docx_element: Docx element of the other build
+        :return hyperlink:
+        """
+
+        hyperlink = copy.copy(self)
+        hyperlink.docx_element = docx_element
+        hyperlink.content = self.content.copy()
+        hyperlink.rendered_texts = self.rendered_texts.copy() if self.rendered_texts is not None else None
+        return hyperlink
+
+    def _construct_html_text_from_content(self, nested_spans: list | None = None) -> str:
         full_content = super()._construct_html_text_from_content()
         if self.type in [LinkType.URL, LinkType.JUMP]:
             return f'<a href="{self.link}">{full_content}</a>'
         return full_content
 
-    def _construct_md_text_from_content(self) -> str:
+    def _construct_md_text_from_content(self, nested_spans: list | None = None) -> str:
         full_content = super()._construct_md_text_from_content()
         if self.type in [LinkType.URL, LinkType.JUMP]:
             return f'[{full_content}]({self.link})'
         return full_content
 
-    def _construct_plain_text_from_content(self) -> str:
+    def _construct_plain_text_from_content(self, nested_spans: list | None = None) -> str:
         full_content = super()._construct_plain_text_from_content()
         if self.type == LinkType.URL:
             return f'{full_content} ({self.link})'
@@ -217,7 +382,8 @@ class Hyperlink(BaseElement):
 class DirectedElement(BaseElement):
 
     __slots__ = ("style", "hierarchy_level", "parent", "children", "previous", "next", "item",
-                 "has_numbering", "numbering_xml_info", "numbering_index_in_text", "numbering_index", "numbering")
+                 "has_numbering", "numbering_xml_index", "numbering_xml_info", "numbering_index_in_text",
+                 "numbering_length_in_text", "numbering_index", "numbering")
 
     def __init__(
             self, content: list[Content], docx_element: DocxElement, style: str, hierarchy_level: int,
@@ -225,9 +391,13 @@ class DirectedElement(BaseElement):
             parent_element: DirectedElement | None = None,
             children_elements: list[DirectedElement | None] = None,
             previous_element: DirectedElement | None = None,
-            next_element: DirectedElement | None = None
+            next_element: DirectedElement | None = None,
+            numbering_xml_index: NumberingXmlIndex | None = None
     ):
         super().__init__(content=content, docx_element=docx_element, text_format=text_format)
+        # Document numbering definitions index (built from the docx element if not shared by the caller)
+        self.numbering_xml_index: NumberingXmlIndex = (numbering_xml_index if numbering_xml_index is not None
+                                                       else NumberingXmlIndex.from_part(part=docx_element.part))
         self.style: str = style
         self.hierarchy_level: int = hierarchy_level
         self.parent: DirectedElement = parent_element
@@ -238,6 +408,7 @@ class DirectedElement(BaseElement):
         self.has_numbering: bool | None = None
         self.numbering_xml_info: dict | None = None
         self.numbering_index_in_text: int | None = None
+        self.numbering_length_in_text: int = 0  # Characters of numbering in text, skipped when rendering
         self._has_numbering()
         self.numbering_index: int | None = None
         self.numbering: str | None = None
@@ -253,13 +424,54 @@ class DirectedElement(BaseElement):
     def construct_identifier_string(self) -> str:
         return f"{'.'.join(map(str, [x+1 for x in self.item]))}"
 
+    def copy_processed(self, docx_element: DocxElement, numbering_xml_index: NumberingXmlIndex) -> DirectedElement:
+        """
+        Copies the processed directed element (content, style, hierarchy level, numbering definition and rendered
+        texts) without its doc graph position, to be placed in another build of the same docx element
+        :param docx_element: Docx element of the other build
+        :param numbering_xml_index: Numbering definitions index of the other build
+        :return directed_element:
+        """
+
+        directed_element = copy.copy(self)
+        directed_element.docx_element = docx_element
+        directed_element.numbering_xml_index = numbering_xml_index
+        directed_element.rendered_texts = self.rendered_texts.copy() if self.rendered_texts is not None else None
+        # Nested hyperlinks are copied too, bound to the same position w:hyperlink of the other build docx element
+        directed_element.content = []
+        for content in self.content:
+            if isinstance(content, Hyperlink):
+                hyperlink = content.docx_element._element
+                content = content.copy_processed(docx_element=DocxHyperlink(
+                    docx_element._element[hyperlink.getparent().index(hyperlink)], docx_element
+                ))
+            directed_element.content.append(content)
+        directed_element.parent = None
+        directed_element.children = []
+        directed_element.previous = None
+        directed_element.next = None
+        directed_element.item = None
+        directed_element.numbering_index = None
+        directed_element.numbering = None
+        return directed_element
+
+    def release_source(self) -> int:
+        # Numbering is already formatted, so the numbering definitions are not needed anymore
+        self.numbering_xml_index = None
+        return super().release_source()
+
+    def _get_rendered_content(self) -> list[Content | BaseElement]:
+        if self.numbering_length_in_text:
+            return self.skip_content_chars(content=self.content, n_chars=self.numbering_length_in_text)
+        return self.content
+
     def _has_numbering(self):
         num_id, ilvl = self._obtain_num_id_and_ilvl()
         if num_id is None:  # If no numPr has been found inside pPr or style then it has no numbering
             return
 
         # Detect whether there exists a num with given numId inside numbering.xml
-        if len(self.docx_element.part.numbering_part._element.xpath(f".//w:num[@w:numId={num_id}]")) != 0:
+        if self.numbering_xml_index.has_num(num_id=num_id):
             self.has_numbering = True
             self.numbering_xml_info = self._obtain_numbering_xml_info(num_id=num_id, ilvl=ilvl)
         else:
@@ -268,69 +480,50 @@ class DirectedElement(BaseElement):
     def _obtain_num_id_and_ilvl(self) -> tuple[str | None, str | None]:
 
         # Detect whether style numPr has been overridden in pPr and obtain numId and ilvl inside numPr
-        if len(self.docx_element._element.xpath(".//w:numPr")) != 0:
+        if len(xpath(self.docx_element._element, ".//w:numPr", stats=self.numbering_xml_index.stats)) != 0:
             
-            num_id = self.docx_element._element.xpath(".//w:numPr/w:numId/@w:val")[0]
+            num_id = xpath(self.docx_element._element, ".//w:numPr/w:numId/@w:val",
+                           stats=self.numbering_xml_index.stats)[0]
             if num_id == "0":
                 # numId cannot be 0, if present indicates numbering artifact
                 self.has_numbering = False
                 return None, None
             
-            ilvl = self.docx_element._element.xpath(".//w:numPr/w:ilvl/@w:val")
+            ilvl = xpath(self.docx_element._element, ".//w:numPr/w:ilvl/@w:val",
+                         stats=self.numbering_xml_index.stats)
             if len(ilvl) == 0:
                 ilvl = "0"
             else:
                 ilvl = ilvl[0]
         else:
             # Detect whether numPr exists inside style
-            if len(self.docx_element.style._element.xpath(".//w:numPr")) == 0:
+            style_id = self._get_style_id()
+            style_xml_info = self.numbering_xml_index.get_style(style_id=style_id)
+            if not style_xml_info["num_pr"]:
                 self.has_numbering = False
                 return None, None  # Return None to signal has_numbering already assigned and stop procedure
 
-            num_id = self.docx_element.style._element.xpath(".//w:numPr/w:numId/@w:val")
-            if len(num_id) == 0:
-                num_id = self._get_based_on_style_num_id(style_element=self.docx_element.style._element)
-            else:
-                num_id = num_id[0]
-            ilvl = self.docx_element.style._element.xpath(".//w:numPr/w:ilvl/@w:val")
-            if len(ilvl) == 0:
+            num_id = style_xml_info["num_id"]
+            if num_id is None:
+                num_id = self._get_based_on_style_num_id(style_id=style_id)
+            ilvl = style_xml_info["ilvl"]
+            if ilvl is None:
                 ilvl = "0"
-            else:
-                ilvl = ilvl[0]
 
         return num_id, ilvl
 
+    def _get_style_id(self) -> str:
+        # Resolve the applied styleId from the paragraph pStyle (as docx_element.style does) through the index cache
+        return self.numbering_xml_index.get_paragraph_style_id(p_style_id=self.docx_element._p.style)
+
     def _obtain_numbering_xml_info(self, num_id: str, ilvl: str) -> dict:
-        abstract_num_id = self.docx_element.part.numbering_part._element.xpath(
-            f".//w:num[@w:numId={num_id}]/w:abstractNumId/@w:val")[0]
-
-        #
-        if len(self.docx_element.part.numbering_part._element.xpath(
-                f".//w:abstractNum[@w:abstractNumId={abstract_num_id}]/w:lvl[@w:ilvl={ilvl}]")) == 0:
-            style_link_id = self.docx_element.part.numbering_part._element.xpath(
-                f".//w:abstractNum[@w:abstractNumId={abstract_num_id}]/w:numStyleLink/@w:val")[0]
-            style_link = self.docx_element.part.styles._element.xpath(f".//w:style[@w:styleId='{style_link_id}']")[0]
-            num_id = style_link.xpath(".//w:numPr/w:numId/@w:val")[0]
-            _ilvl = style_link.xpath(".//w:numPr/w:ilvl/@w:val")
-            if len(_ilvl) != 0:
-                ilvl = _ilvl[0]
-            return self._obtain_numbering_xml_info(num_id=num_id, ilvl=ilvl)
-        else:
-            start_query = self.docx_element.part.numbering_part._element.xpath(
-                    f".//w:abstractNum[@w:abstractNumId={abstract_num_id}]/w:lvl[@w:ilvl={ilvl}]/w:start/@w:val")
-            return {
-                "num_id": num_id,
-                "ilvl": ilvl,
-                "type": self.docx_element.part.numbering_part._element.xpath(
-                    f".//w:abstractNum[@w:abstractNumId={abstract_num_id}]/w:lvl[@w:ilvl={ilvl}]/w:numFmt/@w:val")[0],
-                "format": self.docx_element.part.numbering_part._element.xpath(
-                    f".//w:abstractNum[@w:abstractNumId={abstract_num_id}]/w:lvl[@w:ilvl={ilvl}]/w:lvlText/@w:val")[0],
-                "start": int(start_query[0]) if len(start_query) > 0 else 1
-            }
+        return self.numbering_xml_index.get_numbering_xml_info(num_id=num_id, ilvl=ilvl)
 
     def _overriden_inexisting_numbering(self, num_id: str, ilvl: str):
         # Detect whether numPr exists inside style
-        if len(self.docx_element.style._element.xpath(".//w:numPr")) == 0:
+        style_id = self._get_style_id()
+        style_xml_info = self.numbering_xml_index.get_style(style_id=style_id)
+        if not style_xml_info["num_pr"]:
             # Set general numbering_xml_info
             self.numbering_xml_info = {
                 "num_id": num_id,
@@ -340,36 +533,22 @@ class DirectedElement(BaseElement):
                 "start": 1
             }  # TODO: Upgrade logic
         else:
-            num_id = self._get_based_on_style_num_id(style_element=self.docx_element.style._element)
-            ilvl = self.docx_element.style._element.xpath(".//w:numPr/w:ilvl/@w:val")
-            if len(ilvl) == 0:
+            num_id = self._get_based_on_style_num_id(style_id=style_id)
+            ilvl = style_xml_info["ilvl"]
+            if ilvl is None:
                 ilvl = "0"  # TODO: Upgrade logic in case missing ilvl
-            else:
-                ilvl = ilvl[0]
             self.numbering_xml_info = self._obtain_numbering_xml_info(num_id=num_id, ilvl=ilvl)
 
         self._detect_numbering_in_text()
 
-    def _get_based_on_style_num_id(self, style_element):
-        num_id = style_element.xpath(".//w:numPr/w:numId/@w:val")
-        if (len(num_id) == 0
-                or len(self.docx_element.part.numbering_part._element.xpath(f".//w:num[@w:numId={num_id[0]}]")) == 0):
-            # Get based_on style
-            based_style_id = style_element.xpath(".//w:basedOn/@w:val")
-            if len(based_style_id) == 0:
-                return None
-
-            based_style = self.docx_element.part.styles._element.xpath(
-                f".//w:style[@w:styleId='{based_style_id[0]}']")[0]
-            return self._get_based_on_style_num_id(style_element=based_style)
-        else:
-            return num_id[0]
+    def _get_based_on_style_num_id(self, style_id: str) -> str | None:
+        return self.numbering_xml_index.get_based_on_style_num_id(style_id=style_id)
 
     def _detect_numbering_in_text(self):
         numbering_pattern = self._construct_numbering_pattern_regex()
 
         # Detect if numbering pattern is present in text
-        if re.search(numbering_pattern, self.text):
+        if re.search(numbering_pattern, self.render(text_format=TextFormat.PLAIN)):
             self.has_numbering = True
             self.numbering_index_in_text = self._get_numbering_index_in_text(numbering_pattern=numbering_pattern)
         else:
@@ -378,7 +557,7 @@ class DirectedElement(BaseElement):
     def _construct_numbering_pattern_regex(self) -> str:
 
         # Separate format string
-        format_str = re.findall(r"%\d+|[^%]+", self.numbering_xml_info["format"])
+        format_str = NUMBERING_FORMAT_REGEX.findall(self.numbering_xml_info["format"])
 
         # ^: Ensures match at the beginning of the string
         numbering_pattern = r"^\t*"
@@ -411,16 +590,14 @@ class DirectedElement(BaseElement):
 
     def _construct_numbering_str(self) -> str:
         # Separate format string
-        format_str = re.findall(r"%\d+|[^%]+", self.numbering_xml_info["format"])
+        format_str = NUMBERING_FORMAT_REGEX.findall(self.numbering_xml_info["format"])
         
         ancestor_numbering_indexes = self._get_ancestors_numbering_index()
         numbering_str = ""
         for format_str_part in format_str:
             if format_str_part[0] == "%":
                 _ilvl = str(int(format_str_part[1:]) - 1)
-                print(_ilvl, ancestor_numbering_indexes)
                 if _ilvl == self.numbering_xml_info["ilvl"]:
-                    print(self.numbering_xml_info["type"])
                     numbering_str += NUMBERING_TYPE_INT_TO_STR[self.numbering_xml_info["type"]](
                         self.numbering_index
                     )
@@ -445,9 +622,11 @@ class DirectedElement(BaseElement):
         return self.parent._get_ancestors_numbering_index() + [self.numbering_index]
 
     def _get_numbering_index_in_text(self, numbering_pattern: str) -> int:
-        match = re.match(numbering_pattern, self.text)
+        match = re.match(numbering_pattern, self.render(text_format=TextFormat.PLAIN))
         if match:
-            self.text = re.sub(numbering_pattern, "", self.text)  # Remove the numbering from the text
+            # Remove the numbering from the text of every text format
+            self.numbering_length_in_text = match.end()
+            self.rendered_texts = None
             return NUMBERING_TYPE_STR_TO_INT[self.numbering_xml_info["type"]](match.group(1))
         else:
             raise ValueError("Could not find a match for the regex of correspondent ilvl")  # TODO: Upgrade
@@ -455,16 +634,20 @@ class DirectedElement(BaseElement):
 
 class Heading(DirectedElement):
 
+    __slots__ = ()
+
     def __init__(
             self, content: list[Content], docx_element: DocxElement, style: str, hierarchy_level: int,
             text_format: TextFormat = TextFormat.HTML,
             parent_element: DirectedElement | None = None, children_elements: list[DirectedElement] | None = None,
-            previous_element: DirectedElement | None = None, next_element: DirectedElement | None = None):
+            previous_element: DirectedElement | None = None, next_element: DirectedElement | None = None,
+            numbering_xml_index: NumberingXmlIndex | None = None):
         super().__init__(
             content=content, docx_element=docx_element,
             style=style, hierarchy_level=hierarchy_level, text_format=text_format,
             parent_element=parent_element, children_elements=children_elements,
-            previous_element=previous_element, next_element=next_element
+            previous_element=previous_element, next_element=next_element,
+            numbering_xml_index=numbering_xml_index
         )
 
 
@@ -476,12 +659,14 @@ class Paragraph(DirectedElement):
             self, content: list[Content], docx_element: DocxElement, style: str, hierarchy_level: int,
             text_format: TextFormat = TextFormat.HTML,
             parent_element: DirectedElement | None = None, children_elements: list[DirectedElement] | None = None,
-            previous_element: DirectedElement | None = None, next_element: DirectedElement | None = None):
+            previous_element: DirectedElement | None = None, next_element: DirectedElement | None = None,
+            numbering_xml_index: NumberingXmlIndex | None = None):
         super().__init__(
             content=content, docx_element=docx_element,
             style=style, hierarchy_level=hierarchy_level, text_format=text_format,
             parent_element=parent_element, children_elements=children_elements,
-            previous_element=previous_element, next_element=next_element
+            previous_element=previous_element, next_element=next_element,
+            numbering_xml_index=numbering_xml_index
         )
         self.heading_item = None
 
@@ -494,35 +679,160 @@ class Paragraph(DirectedElement):
         if not isinstance(next_element, Heading):
             next_element.heading_item = self.heading_item
 
+    def copy_processed(self, docx_element: DocxElement, numbering_xml_index: NumberingXmlIndex) -> Paragraph:
+        directed_element = super().copy_processed(docx_element=docx_element, numbering_xml_index=numbering_xml_index)
+        directed_element.heading_item = None
+        return directed_element
+
     def construct_identifier_string(self) -> str:
         return (f"{'.'.join(map(str, [self.heading_item[0]+1] + [x+1 for x in self.heading_item[1:]])) if self.heading_item is not None else 'NONE'}"
                 f".{super().construct_identifier_string()}")
 
 
+class TableCell(BaseElement):
+    """
+    Table grid cell, its content being the cell paragraphs contents separated by line breaks.
+    Merged cells (gridSpan and vMerge) are a single cell spanning several grid rows and columns
+    """
+
+    __slots__ = ("row", "column", "row_span", "column_span")
+
+    def __init__(self, content: list[Content | BaseElement], docx_element: DocxElement, row: int, column: int,
+                 column_span: int = 1, text_format: TextFormat = TextFormat.HTML):
+        super().__init__(content=content, docx_element=docx_element, text_format=text_format)
+        # Grid position of the top left corner of the cell
+        self.row: int = row
+        self.column: int = column
+        self.row_span: int = 1
+        self.column_span: int = column_span
+
+
 class Table(DirectedElement):
 
-    __slots__ = "heading_item"
+    __slots__ = ("heading_item", "grid")
 
-    def __init__(self, content: list[Content], docx_element: DocxElement, style: str, hierarchy_level: int,
+    def __init__(self, content: list[TableCell], docx_element: DocxElement, style: str, hierarchy_level: int,
                  text_format: TextFormat = TextFormat.HTML,
                  parent_element: DirectedElement | None = None, children_elements: list[DirectedElement] | None = None,
-                 previous_element: DirectedElement | None = None, next_element: DirectedElement | None = None):
+                 previous_element: DirectedElement | None = None, next_element: DirectedElement | None = None,
+                 numbering_xml_index: NumberingXmlIndex | None = None,
+                 grid: list[list[TableCell | None]] | None = None):
+        # Table cells grid (rows of columns), merged cells are referenced from every grid position they span
+        # and grid positions without cell (e.g. gridBefore or short rows) are None
+        self.grid: list[list[TableCell | None]] = grid if grid is not None else []
         super().__init__(
             content=content, docx_element=docx_element,
             style=style, hierarchy_level=hierarchy_level, text_format=text_format,
             parent_element=parent_element, children_elements=children_elements,
-            previous_element=previous_element, next_element=next_element
+            previous_element=previous_element, next_element=next_element,
+            numbering_xml_index=numbering_xml_index
         )
         self.heading_item = None
 
-    def _construct_html_text_from_content(self) -> str:
-        return ""
+    def _has_numbering(self):
+        # Numbering of the table cells paragraphs is not the table numbering
+        self.has_numbering = False
 
-    def _construct_md_text_from_content(self) -> str:
-        return ""
+    @staticmethod
+    def _render_cell(cell: TableCell, text_format: TextFormat,
+                     nested_spans: list | None) -> tuple[str, list[tuple[int, int, BaseElement]]]:
+        if nested_spans is None:
+            return cell.render(text_format=text_format), []
+        return cell.render(text_format=text_format), cell.get_nested_spans(text_format=text_format)
+
+    def _construct_html_text_from_content(self, nested_spans: list | None = None) -> str:
+        text_parts = ["<table>"]
+        start = len(text_parts[0])
+        for i, row in enumerate(self.grid):
+            text_parts.append("<tr>")
+            start += len(text_parts[-1])
+            for j, cell in enumerate(row):
+                if cell is None:
+                    text_parts.append("<td></td>")
+                    start += len(text_parts[-1])
+                    continue
+                if cell.row != i or cell.column != j:  # Covered by a merged cell
+                    continue
+
+                span_attributes = ((f' colspan="{cell.column_span}"' if cell.column_span > 1 else "")
+                                   + (f' rowspan="{cell.row_span}"' if cell.row_span > 1 else ""))
+                text_parts.append(f"<td{span_attributes}>")
+                start += len(text_parts[-1])
+                cell_text, cell_nested_spans = self._render_cell(cell=cell, text_format=TextFormat.HTML,
+                                                                 nested_spans=nested_spans)
+                if nested_spans is not None:
+                    nested_spans.extend((start + _start, start + _end, element)
+                                        for _start, _end, element in cell_nested_spans)
+                text_parts.append(cell_text + "</td>")
+                start += len(text_parts[-1])
+            text_parts.append("</tr>")
+            start += len(text_parts[-1])
+        text_parts.append("</table>")
+
+        return "".join(text_parts)
+
+    def _construct_md_text_from_content(self, nested_spans: list | None = None) -> str:
+        # Pipe table with the first row as header, merged cells are rendered at their top left corner only
+        lines = []
+        start = 0
+        for i, row in enumerate(self.grid):
+            line_parts = []
+            for j in range(len(row)):
+                line_parts.append("| ")
+                start += len(line_parts[-1])
+                cell = row[j]
+                if cell is not None and cell.row == i and cell.column == j:
+                    cell_text, cell_nested_spans = self._render_cell(cell=cell, text_format=TextFormat.MD,
+                                                                     nested_spans=nested_spans)
+                    if nested_spans is not None:
+                        nested_spans.extend((start + self._get_md_cell_offset(cell_text=cell_text, offset=_start),
+                                             start + self._get_md_cell_offset(cell_text=cell_text, offset=_end),
+                                             element)
+                                            for _start, _end, element in cell_nested_spans)
+                    # Cells must fit in a single line and pipes would split them
+                    line_parts.append(cell_text.replace("|", "\\|").replace("\n", "<br>"))
+                    start += len(line_parts[-1])
+                line_parts.append(" ")
+                start += 1
+            line_parts.append("|\n")
+            start += 2
+            lines.append("".join(line_parts))
+
+            if i == 0:  # Header delimiter row
+                lines.append("|" + " --- |"*len(row) + "\n")
+                start += len(lines[-1])
+
+        return "".join(lines)[:-1]
 
-    def _construct_plain_text_from_content(self) -> str:
-        return ""
+    @staticmethod
+    def _get_md_cell_offset(cell_text: str, offset: int) -> int:
+        # Offset in the escaped cell text (pipes escaped with a backslash and line breaks replaced by <br>)
+        return offset + cell_text.count("|", 0, offset) + 3*cell_text.count("\n", 0, offset)
+
+    def _construct_plain_text_from_content(self, nested_spans: list | None = None) -> str:
+        # Rows separated by line breaks and cells by tabs (cell line breaks are rendered as spaces)
+        text_parts = []
+        start = 0
+        for i, row in enumerate(self.grid):
+            if i:
+                text_parts.append("\n")
+                start += 1
+            for j, cell in enumerate(row):
+                if j:
+                    text_parts.append("\t")
+                    start += 1
+                if cell is None or cell.row != i or cell.column != j:
+                    continue
+
+                cell_text, cell_nested_spans = self._render_cell(cell=cell, text_format=TextFormat.PLAIN,
+                                                                 nested_spans=nested_spans)
+                if nested_spans is not None:
+                    nested_spans.extend((start + _start, start + _end, element)
+                                        for _start, _end, element in cell_nested_spans)
+                text_parts.append(cell_text.replace("\n", " "))
+                start += len(text_parts[-1])
+
+        return "".join(text_parts)
 
     def add_child(self, child: DirectedElement):
         super().add_child(child=child)
@@ -534,4 +844,5 @@ class Table(DirectedElement):
             next_element.heading_item = self.heading_item
 
     def construct_identifier_string(self) -> str:
-        return f"({'.'.join(map(str, self.heading_item))})\nT_{super().construct_identifier_string()}"
+        return (f"{'.'.join(map(str, [self.heading_item[0]+1] + [x+1 for x in self.heading_item[1:]])) if self.heading_item is not None else 'NONE'}"
+                f".T_{super().construct_identifier_string()}")
@@ -1,42 +1,150 @@
+import asyncio
+import functools
+import gc
+import hashlib
 import logging
+import os
 import re
+import sys
+import threading
+import time
+from contextlib import nullcontext
+from concurrent.futures import Executor, ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Iterable, Iterator
 
 import docx
+from lxml import etree
+from docx.enum.style import WD_STYLE_TYPE
+from docx.opc.coreprops import CoreProperties
+from docx.oxml.ns import qn
+from docx.oxml.text.paragraph import CT_P
+from docx.oxml.text.run import CT_R
+from docx.oxml.text.hyperlink import CT_Hyperlink
 from docx.text.paragraph import Paragraph as DocxParagraph
 from docx.text.run import Run as DocxRun
 from docx.text.hyperlink import Hyperlink as DocxHyperlink
-from docx.table import Table as DocxTable
+from docx.table import Table as DocxTable, _Cell as DocxCell
 
 import enhanced_md.enhanced_elements as ee
-from enhanced_md.exceptions import UndefinedStyleFoundError, EmptyDocxDocument
+from enhanced_md.compiled_styles import CompiledStyles
+from enhanced_md.font_style_index import FontStyleIndex
+from enhanced_md.iterparse_docx import IterparseDocx, read_paragraph_text, read_run_text
+from enhanced_md.detached_elements import DetachedElement, DetachedDocument, construct_repr_string
+from enhanced_md.doc_graph_file import save_detached_document, load_detached_document
+from enhanced_md.doc_diff import ElementDiff, diff_documents
+from enhanced_md.doc_index import DocIndex
+from enhanced_md.chunker import Chunk, iter_chunks
+from enhanced_md.doc_graph import DocGraph
+from enhanced_md.numbering_xml_index import NumberingXmlIndex
+from enhanced_md.parse_cache import ParseCache
+from enhanced_md.stats import EnhancedMDStats, PROCESS_DOCX_DOCUMENT, get_heap_allocated_bytes
+from enhanced_md.exceptions import UndefinedStyleFoundError, EmptyDocxDocument, ParseCancelledError
+
+W_P = qn("w:p")
+W_R = qn("w:r")
+W_HYPERLINK = qn("w:hyperlink")
+W_TR = qn("w:tr")
+W_TC = qn("w:tc")
+W_TR_PR = qn("w:trPr")
+W_TC_PR = qn("w:tcPr")
+W_TBL_PR = qn("w:tblPr")
+W_TBL_STYLE = qn("w:tblStyle")
+W_GRID_BEFORE = qn("w:gridBefore")
+W_GRID_SPAN = qn("w:gridSpan")
+W_V_MERGE = qn("w:vMerge")
+W_VAL = qn("w:val")
+
+# Tables are placed in the doc graph at the top paragraph hierarchy level (under the current heading)
+TABLE_HIERARCHY_LEVEL = 1
 
 
 class EnhancedMD:
 
-	def __init__(self, docx_file_path: str, styles: dict):
+	def __init__(self, docx_file_path: str, styles: dict | CompiledStyles, iterparse: bool = False,
+	             cache: ParseCache | None = None, stats: EnhancedMDStats | None = None,
+	             previous: "EnhancedMD | None" = None, detached: bool = False):
 		"""
 
+		:param docx_file_path:
+		:param styles: Input style dictionary or already compiled styles (to be reused across documents)
+		:param iterparse: Ingest the document pull parsing its body straight from the .docx zip
+		instead of loading it through docx.Document (same output)
+		:param cache: Parse cache the built document is loaded from (without loading the docx document)
+		or stored into once built
+		:param stats: Per document instrumentation (phase timings, counters and profiling), disabled if None
+		:param previous: Previous build of an earlier revision of the document, whose processed headings and
+		paragraphs are reused for the unchanged paragraphs (left unmodified)
+		:param detached: Release the docx document once built (see .release_source())
 		"""
 
+		# Styles data
+		self._check_and_unpack_styles(styles=styles)
+
 		# Docx data
 		self.docx_file_path = docx_file_path
 		logging.info(f"\t[{self.docx_file_path}]")
-		self.docx = docx.Document(docx_file_path)
-		self._get_docx_metadata()
-		self._log_docx_metadata()
+		self.stats = stats
+		with self._phase("docx_load"):
+			self._load_docx_document(iterparse=iterparse, cache=cache)
+			# Processed directed elements of the previous build for each paragraph key
+			self.context_key = None
+			self.previous_elements = self._index_previous_build(previous=previous) if previous is not None else None
 
-		# Styles data
-		self._check_and_unpack_styles(styles=styles)
 		self._log_styles()
 
 		# Doc data
 		self.doc_graph = None
 		self.aux_doc_graph = None
-		self.aux_doc_graph_index = 0
+		self.aux_doc_graph_element = None
 		self.doc_flat = None
+		self.doc_index = None
 
 		self.repr_array = None
 		self.is_built = False
+		self.detached = detached
+		self.is_source_released = False
+
+	def _load_docx_document(self, iterparse: bool, cache: ParseCache | None):
+		"""
+		Loads and indexes the docx document (unless the built document is loaded from the parse cache)
+		:param iterparse: Ingest the document with the pull parsing engine
+		:param cache:
+		"""
+
+		# Built document of a previous run with the same docx file content, styles and library version
+		self.cache = cache
+		self.cache_key = (ParseCache.get_key(docx_file_path=self.docx_file_path, styles=self.styles)
+		                  if cache is not None else None)
+		self.detached_document = self._load_cached_document()
+		if self.detached_document is not None:
+			self.docx = None
+			self.docx_package = None
+			self.docx_styles = None
+			self.docx_metadata = self.detached_document.docx_metadata.copy()
+			self.numbering_xml_index = None
+			logging.info("\t(loaded from parse cache)")
+		elif iterparse:
+			self.docx = None
+			self.docx_package = IterparseDocx(docx_file_path=self.docx_file_path)
+			self.docx_styles = self.docx_package.styles
+			self._get_docx_metadata(core_properties=self.docx_package.core_properties)
+			# Index the document numbering definitions once for all the directed elements
+			self.numbering_xml_index = NumberingXmlIndex(
+				docx_styles=self.docx_styles, numbering_element=self.docx_package.numbering_element, stats=self.stats
+			)
+		else:
+			self.docx = docx.Document(self.docx_file_path)
+			self.docx_package = None
+			self.docx_styles = self.docx.styles
+			self._get_docx_metadata(core_properties=self.docx.core_properties)
+			# Index the document numbering definitions once for all the directed elements
+			self.numbering_xml_index = NumberingXmlIndex.from_part(part=self.docx.part, stats=self.stats)
+		self._log_docx_metadata()
+		# Resolve runs effective font style once per (rStyle, pStyle, direct formatting)
+		self.font_style_index = (FontStyleIndex(styles_element=self.docx_styles._element, stats=self.stats)
+		                         if self.docx_styles is not None else None)
+		# Resolved style name for each paragraph pStyle
+		self.docx_style_names = {}
 
 	def __call__(self, *args, **kwargs):
 		"""
@@ -45,28 +153,274 @@ class EnhancedMD:
 		:param kwargs:
 		"""
 
-		self.build_doc_graph()
+		self._build()
+
+	def _build(self, cancel_event: threading.Event | None = None):
+		"""
+		Builds the doc graph, the flat document and the document representation
+		:param cancel_event: Event stopping the doc graph building once set (raising ParseCancelledError)
+		"""
+
+		if self.detached_document is not None:  # Already built (loaded from the parse cache)
+			self.repr_array = [repr(detached_element) for detached_element in self.detached_document]
+			return
+
+		self.build_doc_graph(cancel_event=cancel_event)
 		self.build_doc_flat()
 		self.build_repr()
 
+		if self.cache is not None:
+			self.detached_document = self.detach()
+			self.cache.store(key=self.cache_key, detached_document=self.detached_document)
+
+		if self.detached:
+			self.release_source()
+
+	def release_source(self) -> int | None:
+		"""
+		Drops every reference to the docx document once built (the python-docx document or the pull parsing package,
+		the docx element of every directed element, hyperlink and table cell, the numbering and font style indexes
+		and the intermediate building state), so that only the built doc graph, flat document and representation
+		are kept alive. The document cannot be built again afterwards
+		:return freed_bytes: Heap bytes freed (None if the C library does not report them)
+		"""
+
+		if self.doc_flat is None and self.detached_document is None:
+			raise RuntimeError("Graph and flat document has not been built, invoke .__call__() first")
+
+		heap_allocated_bytes = get_heap_allocated_bytes()
+
+		n_released = sum(directed_element.release_source() for directed_element in self.doc_flat or ())
+		self.docx = None
+		self.docx_package = None
+		self.docx_styles = None
+		self.numbering_xml_index = None
+		self.font_style_index = None
+		self.docx_style_names = None
+		self.context_key = None
+		self.previous_elements = None
+		self.aux_doc_graph = None
+		self.aux_doc_graph_element = None
+		self.is_source_released = True
+		# The python-docx package and its parts reference each other
+		gc.collect()
+
+		freed_bytes = (heap_allocated_bytes - get_heap_allocated_bytes()
+		               if heap_allocated_bytes is not None else None)
+		logging.info(f"\t[{self.docx_file_path}] released {n_released} docx elements"
+		             + (f" ({freed_bytes} bytes freed)" if freed_bytes is not None else ""))
+		return freed_bytes
+
+	def _get_context_key(self) -> bytes:
+		"""
+		Obtains the digest of the document parts the paragraphs processing depends on (styles and numbering)
+		:return context_key:
+		"""
+
+		if self.context_key is None:
+			context_hash = hashlib.blake2b(etree.tostring(self.numbering_xml_index.docx_styles._element))
+			if self.numbering_xml_index.numbering_element is not None:
+				context_hash.update(etree.tostring(self.numbering_xml_index.numbering_element))
+			self.context_key = context_hash.digest()
+
+		return self.context_key
+
+	def _get_paragraph_key(self, p: CT_P) -> bytes:
+		"""
+		:param p: Paragraph element
+		:return paragraph_key: Digest of the paragraph canonical XML (independent of the enclosing document)
+		and of the addresses its hyperlinks relationships resolve to (which may be retargeted without
+		changing the paragraph XML)
+		"""
+
+		paragraph_hash = hashlib.blake2b(etree.tostring(p, method="c14n", exclusive=True), digest_size=16)
+		for hyperlink in p.iterchildren(W_HYPERLINK):
+			if hyperlink.rId:
+				paragraph_hash.update(b"\0" + self._get_hyperlink_address(r_id=hyperlink.rId).encode())
+
+		return paragraph_hash.digest()
+
+	def _index_previous_build(self, previous: "EnhancedMD") -> dict[bytes, list[ee.DirectedElement]]:
+		"""
+		Indexes the previous build headings and paragraphs by paragraph key, nothing is reused if the previous build
+		has no built flat document or docx document (e.g. loaded from the parse cache or released) or its styles, styles part
+		or numbering part differ from the current ones
+		:param previous:
+		:return previous_elements: Paragraph key -> previous directed elements (in reverse document order)
+		"""
+
+		previous_elements = {}
+		if (
+			previous.doc_flat is None or self.docx_styles is None or previous.docx_styles is None
+			or previous.styles.fingerprint != self.styles.fingerprint
+			or previous._get_context_key() != self._get_context_key()
+		):
+			return previous_elements
+
+		for directed_element in reversed(previous.doc_flat):
+			if isinstance(directed_element, (ee.Heading, ee.Paragraph)):
+				paragraph_key = previous._get_paragraph_key(p=directed_element.docx_element._p)
+				previous_elements.setdefault(paragraph_key, []).append(directed_element)
+
+		return previous_elements
+
+	def _reuse_previous_paragraph(self, docx_paragraph: DocxParagraph) -> ee.Heading | ee.Paragraph | None:
+		"""
+		Reuses the processed directed element of the previous build with the same paragraph key
+		(each previous directed element is reused at most once, in document order)
+		:param docx_paragraph:
+		:return directed_element: Copy of the previous directed element (None if the paragraph is not found)
+		"""
+
+		previous_elements = self.previous_elements.get(self._get_paragraph_key(p=docx_paragraph._p))
+		if not previous_elements:
+			return None
+
+		if self.stats is not None:
+			self.stats.count("paragraphs")
+			self.stats.count("reused_paragraphs")
+		return previous_elements.pop().copy_processed(docx_element=docx_paragraph,
+		                                              numbering_xml_index=self.numbering_xml_index)
+
+	def _load_cached_document(self) -> DetachedDocument | None:
+		"""
+		:return detached_document: Cached built document (None if there is no cache or the document is not cached)
+		"""
+
+		if self.cache is None:
+			return None
+
+		detached_document = self.cache.load(key=self.cache_key)
+		if detached_document is None:
+			return None
+
+		# The same docx file content may have been cached from another file path
+		return DetachedDocument(docx_file_path=self.docx_file_path, docx_metadata=detached_document.docx_metadata,
+		                        elements=detached_document.elements, doc_graph=detached_document.doc_graph)
+
+	@classmethod
+	def process_corpus(cls, docx_file_paths: Iterable[str], styles: dict | CompiledStyles,
+	                   workers: int | None = None, iterparse: bool = False,
+	                   cache: ParseCache | None = None) -> Iterator[tuple[str, DetachedDocument | None, Exception | None]]:
+		"""
+		Builds every docx document of the corpus spreading them across a pool of worker processes,
+		scheduling the largest documents first and yielding the results as soon as they finish.
+		Failures of a single document (e.g. UndefinedStyleFoundError, EmptyDocxDocument) are collected
+		without stopping the rest of the corpus
+		:param docx_file_paths: Docx documents file paths
+		:param styles: Input style dictionary or compiled styles (compiled once and shared by all the documents)
+		:param workers: Number of worker processes (defaults to the number of CPUs, 1 processes the corpus in this process)
+		:param iterparse: Ingest the documents with the pull parsing engine
+		:param cache: Parse cache shared by all the worker processes
+		:return corpus_results: Iterator of (docx_file_path, detached document, error) tuples,
+		where only one of the detached document and the error is None
+		"""
+
+		# Check and compile the styles only once for the whole corpus
+		styles = styles if isinstance(styles, CompiledStyles) else CompiledStyles(styles=styles)
+
+		# Schedule the largest documents first so that they do not delay the end of the corpus processing
+		docx_file_paths = sorted(docx_file_paths, key=_get_docx_file_size, reverse=True)
+
+		workers = workers if workers is not None else os.cpu_count() or 1
+		if workers == 1:
+			for docx_file_path in docx_file_paths:
+				yield _process_corpus_docx_file(docx_file_path=docx_file_path, styles=styles, iterparse=iterparse,
+				                                cache=cache)
+			return
+
+		# Send the compiled styles to each worker process only once
+		with ProcessPoolExecutor(
+				max_workers=workers, initializer=_init_corpus_worker, initargs=(styles,)
+		) as executor:
+			# Keep a bounded amount of submitted documents so that scheduling order is kept and memory is bounded
+			docx_file_paths = iter(docx_file_paths)
+			pending = set()
+			for docx_file_path in docx_file_paths:
+				pending.add(executor.submit(_process_corpus_docx_file, docx_file_path=docx_file_path,
+				                             iterparse=iterparse, cache=cache))
+				if len(pending) == 2*workers:
+					break
+
+			while len(pending):
+				done, pending = wait(pending, return_when=FIRST_COMPLETED)
+				for future in done:
+					yield future.result()
+
+					docx_file_path = next(docx_file_paths, None)
+					if docx_file_path is not None:
+						pending.add(executor.submit(_process_corpus_docx_file, docx_file_path=docx_file_path,
+						                             iterparse=iterparse, cache=cache))
+
+	@classmethod
+	async def aparse(cls, docx_file_path: str, styles: dict | CompiledStyles, iterparse: bool = False,
+	                 cache: ParseCache | None = None, stats: EnhancedMDStats | None = None,
+	                 executor: Executor | None = None, limiter: asyncio.Semaphore | None = None,
+	                 detached: bool = False) -> "EnhancedMD":
+		"""
+		Loads and builds the docx document without blocking the event loop, running the blocking zip/XML I/O
+		and the CPU bound building in an executor. Cancelling the awaiting task stops the building
+		after the directed element being processed (loading cannot be interrupted)
+		:param docx_file_path:
+		:param styles: Input style dictionary or compiled styles (compile them once to share them across documents)
+		:param iterparse: Ingest the document with the pull parsing engine
+		:param cache: Parse cache the document is loaded from or stored into
+		:param stats: Per document instrumentation
+		:param executor: Thread pool executor running the parsing (defaults to the event loop default executor),
+		the built document holds lxml elements so it cannot be returned from worker processes
+		(see process_corpus for detached documents)
+		:param limiter: Semaphore bounding the number of documents parsed concurrently
+		:param detached: Release the docx document once built (see .release_source())
+		:return emd: Built document (as after .__call__())
+		"""
+
+		loop = asyncio.get_running_loop()
+		if limiter is not None:
+			await limiter.acquire()
+
+		cancel_event = threading.Event()
+		future = None
+		try:
+			# Shielded so that cancelling the awaiting task does not detach the future from the executor function
+			future = loop.run_in_executor(executor, functools.partial(
+				cls, docx_file_path=docx_file_path, styles=styles, iterparse=iterparse, cache=cache, stats=stats,
+				detached=detached
+			))
+			emd = await asyncio.shield(future)
+			future = loop.run_in_executor(executor, functools.partial(emd._build, cancel_event=cancel_event))
+			await asyncio.shield(future)
+		except asyncio.CancelledError:
+			# The executor keeps running the submitted function, signal the building to stop
+			cancel_event.set()
+			raise
+		finally:
+			if limiter is not None:
+				if future is not None and not future.done():
+					# Hold the permit until the executor function actually finishes
+					future.add_done_callback(functools.partial(_release_aparse_limiter, limiter=limiter))
+				else:
+					limiter.release()
+
+		return emd
+
 	def __repr__(self):
 		if self.repr_array is None:
 			raise RuntimeError("Graph and flat document has not been built, invoke .__call__() first")
 
 		return f"~{repr(self.docx_metadata['title'])}\n"+"\n".join(map(str, self.repr_array))
 
-	def _get_docx_metadata(self):
+	def _get_docx_metadata(self, core_properties: CoreProperties):
 		"""
 		Obtains .docx document metadata dictionary from python-docx CoreProperties object
-		:return:
+		:param core_properties:
 		"""
 
 		self.docx_metadata = {
-			"title": self.docx.core_properties.title,
-			"created_at": self.docx.core_properties.created,
-			"created_by": self.docx.core_properties.author,
-			"modified_at": self.docx.core_properties.modified,
-			"modified_by": self.docx.core_properties.last_modified_by
+			"title": core_properties.title,
+			"created_at": core_properties.created,
+			"created_by": core_properties.author,
+			"modified_at": core_properties.modified,
+			"modified_by": core_properties.last_modified_by
 		}
 
 	def _log_docx_metadata(self):
@@ -77,62 +431,25 @@ class EnhancedMD:
 			f"\n\t\t- last modified: {self.docx_metadata['modified_at']} ({self.docx_metadata['modified_by']})"
 		)
 
-	def _check_and_unpack_styles(self, styles: dict):
+	def _check_and_unpack_styles(self, styles: dict | CompiledStyles):
 		"""
-		Checks the style dictionary correctness
+		Checks and compiles the style dictionary (unless already compiled)
 		and unpacks into separated style dictionaries for each type of directed element
-		:param styles: Input style dictionary
+		:param styles: Input style dictionary or compiled styles
 		"""
 
-		# Check heading styles
-		try:
-			self.heading_styles = styles["heading"]
-			self._check_style_dict(style_dict=self.heading_styles, element_name="heading")
-		except KeyError:
-			raise KeyError("styles dictionary missing \"heading\"")
-
-		# Check paragraph styles
-		try:
-			self.paragraph_styles = styles["paragraph"]
-			self._check_style_dict(style_dict=self.paragraph_styles, element_name="paragraph")
-		except KeyError:
-			raise KeyError("styles dictionary missing \"paragraph\"")
-		
-		# Check ignore styles
-		try:
-			self.ignore_styles = styles["ignore"]
-		except KeyError:
-			raise KeyError("styles dictionary missing \"ignore\"")
-
-		# TODO: Check that styles for different elements are not the same (except level 0)
+		self.styles = styles if isinstance(styles, CompiledStyles) else CompiledStyles(styles=styles)
+		self.heading_styles = self.styles.heading_styles
+		self.paragraph_styles = self.styles.paragraph_styles
+		self.ignore_styles = self.styles.ignore_styles
 
-	@staticmethod
-	def _check_style_dict(style_dict: dict, element_name: str):
+	def _phase(self, phase: str):
 		"""
-		Checks the correctness of the directed element specific style dictionary:
-		- Integers keys representing the hierarchy level (including 0 which represents undefined)
-		- The hierarchy levels cannot be empty except the undefined one
-		:param style_dict: Directed element specific style dictionary
+		:param phase:
+		:return phase_context: Context manager timing the phase (no-op if the instrumentation is disabled)
 		"""
 
-		hierarchy_levels = style_dict.keys()
-
-		# Check style dictionary hierarchy levels consist only of integers
-		if not all(isinstance(key, int) for key in hierarchy_levels):
-			raise KeyError(f"{element_name} style dictionary hierarchy levels keys must consist only of integers")
-
-		# Check style dictionary hierarchy levels range from 0 to the maximum level without any gaps
-		# and that no hierarchy level is empty except for hierarchy level 0
-		for key in range(max(hierarchy_levels) + 1):
-			try:
-				# Checks first for KeyError and only can raise ValueError for hierarchy levels higher than 0
-				if not style_dict[key] and key:
-					raise ValueError(f"{element_name} style dictionary, {key} hierarchy level cannot be empty")
-				if any([type(style) is not str for style in style_dict[key]]):
-					raise ValueError(f"{element_name} style dictionary, {key} hierarchy level "
-					                 f"must be an array containing strings")
-			except KeyError:
-				raise KeyError(f"{element_name} style dictionary, {key} hierarchy level must be defined")
+		return self.stats.phase(phase) if self.stats is not None else nullcontext()
 
 	def _log_styles(self):
 		logging.info(
@@ -141,69 +458,157 @@ class EnhancedMD:
 			f"\n\t\t- paragraph styles: {self.paragraph_styles}"
 		)
 
-	def build_doc_graph(self):
+	def build_doc_graph(self, cancel_event: threading.Event | None = None):
 		"""
 		Iterates over the docx document processing the contents into the enhanced_elements defined classes,
-		once the whole document has been processed, recursively builds the doc graph structure
+		while iteratively building the doc graph structure from them
+		:param cancel_event: Event stopping the building once set, checked after each directed element
+		(raising ParseCancelledError)
 		"""
 
-		# Process the docx document
-		self.aux_doc_graph = []
-		self._process_docx_document()
+		with self._phase("build_doc_graph"):
+			for _ in self.iter_elements():
+				if cancel_event is not None and cancel_event.is_set():
+					raise ParseCancelledError(f"{self.docx_file_path} parsing has been cancelled")
+
+	def iter_elements(self, release_finished: bool = False) -> Iterator[ee.DirectedElement]:
+		"""
+		Streams the docx document directed elements, processing the contents and building the doc graph
+		incrementally and yielding each directed element as soon as its position in the doc graph
+		(item, parent and numbering) is known
+		:param release_finished: Unlink the finished subtrees from the doc graph (so memory is bounded by the open
+		subtrees and the directed elements kept by the consumer)
+		:return directed_elements: Iterator of the directed elements in document order
+		"""
+
+		if self.is_source_released:
+			raise RuntimeError("Docx document has been released, it cannot be built again")
+		if self.docx_styles is None:
+			raise RuntimeError("Document loaded from the parse cache, use .detach() to access the built document")
+
+		# Process the docx document lazily
+		self.aux_doc_graph = self._process_docx_document()
 
 		# Build the doc graph structure
 		self.doc_graph = []
-		self._build_doc_graph()
+		self.doc_index = None
+		yield from self._build_doc_graph(release_finished=release_finished)
 
-	def _process_docx_document(self):
+	def _process_docx_document(self) -> Iterator[ee.DirectedElement]:
 		"""
 		Iterates over the docx document processing the contents into the enhanced_elements defined classes,
-		storing the processed contents into the auxiliary doc graph structure
+		yielding the processed contents (the auxiliary doc graph structure)
+		:return directed_elements:
 		"""
 
+		if self.docx_package is not None:
+			yield from self._process_iterparse_document()
+			return
+
 		for docx_content in self.docx.iter_inner_content():
 			# Detect whether document content is paragraph or table and process accordingly
 			if isinstance(docx_content, DocxParagraph):
-				# Only process paragraphs which are not empty or only consist of space, tabular or newline characters
-				# As well as only processing paragraphs with no styles to be ignored
-				if (
-					(len(docx_content.text) and not all(c in " \t\n" for c in docx_content.text))
-					and docx_content.style.name not in self.ignore_styles
-				):
-					self._process_docx_paragraph(docx_paragraph=docx_content)
+				# Unchanged paragraphs of the previous build are not processed again
+				directed_element = (self._reuse_previous_paragraph(docx_paragraph=docx_content)
+				                    if self.previous_elements else None)
+				if directed_element is not None:
+					yield directed_element
+				elif self._is_processed_docx_paragraph(text=docx_content.text, p_style_id=docx_content._p.style):
+					yield self._process_docx_paragraph(docx_paragraph=docx_content)
 
 			if isinstance(docx_content, DocxTable):
+				if self.stats is not None:
+					self.stats.count("tables")
 				# Only process tables which are not empty
 				if len(docx_content.rows) and len(docx_content.columns):
-					self._process_docx_table(docx_table=docx_content)
+					table = self._process_docx_table(docx_table=docx_content)
+					if table is not None:
+						yield table
+
+	def _process_iterparse_document(self) -> Iterator[ee.DirectedElement]:
+		"""
+		Iterates over the pull parsed docx document body elements processing the contents into the enhanced_elements
+		defined classes (as _process_docx_document does), yielding the processed contents
+		:return directed_elements:
+		"""
+
+		for element in self.docx_package.iter_body_content():
+			if element.tag == W_P:
+				# Unchanged paragraphs of the previous build are not processed again
+				directed_element = (self._reuse_previous_paragraph(docx_paragraph=DocxParagraph(element, None))
+				                    if self.previous_elements else None)
+				if directed_element is not None:
+					yield directed_element
+				elif self._is_processed_docx_paragraph(text=read_paragraph_text(p=element), p_style_id=element.style):
+					# Only the directed element docx element is wrapped, its content is processed from the elements
+					yield self._process_docx_paragraph(docx_paragraph=DocxParagraph(element, None))
+			else:
+				if self.stats is not None:
+					self.stats.count("tables")
+				# Only process tables which are not empty
+				docx_table = DocxTable(element, None)
+				if len(docx_table.rows) and len(docx_table.columns):
+					table = self._process_docx_table(docx_table=docx_table)
+					if table is not None:
+						yield table
+
+	def _is_processed_docx_paragraph(self, text: str, p_style_id: str | None) -> bool:
+		"""
+		Only process paragraphs which are not empty or only consist of space, tabular or newline characters
+		As well as only processing paragraphs with no styles to be ignored
+		:param text: Docx paragraph text
+		:param p_style_id: Docx paragraph pStyle
+		:return is_processed:
+		"""
 
-	def _process_docx_paragraph(self, docx_paragraph: DocxParagraph):
+		if self.stats is not None:
+			self.stats.count("paragraphs")
+
+		if not len(text) or all(c in " \t\n" for c in text):
+			if self.stats is not None:
+				self.stats.count("empty_paragraphs")
+			return False
+
+		if self.styles.is_ignored(self._get_docx_style_name(p_style_id=p_style_id)):
+			if self.stats is not None:
+				self.stats.count("ignored_paragraphs")
+			return False
+
+		return True
+
+	def _process_docx_paragraph(self, docx_paragraph: DocxParagraph) -> ee.Heading | ee.Paragraph:
 		"""
-		Process a docx paragraph into the enhanced_elements Heading or Paragraph structure,
-		appending them into the auxiliary doc graph structure
+		Process a docx paragraph into the enhanced_elements Heading or Paragraph structure
 		:param docx_paragraph: Docx paragraph class
+		:return directed_element:
 		"""
 
 		# Process paragraph content
 		paragraph_content = self._process_docx_paragraph_content(docx_paragraph=docx_paragraph)
 
 		# Detect whether the docx paragraph is a Heading or Paragraph based on the style name and the hierarchy level
+		style_name = self._get_docx_paragraph_style_name(docx_paragraph=docx_paragraph)
 		directed_element_type, hierarchy_level = self._detect_directed_element_type_and_hierarchy_level(
-			docx_paragraph=docx_paragraph
+			docx_paragraph=docx_paragraph, style_name=style_name
 		)
 
+		if self.stats is not None:
+			self.stats.count("directed_elements")
+
 		# Build into the corresponding directed element structure
 		if directed_element_type == "heading":
-			self.aux_doc_graph.append(ee.Heading(
+			return ee.Heading(
 				content=paragraph_content, docx_element=docx_paragraph,
-				style=docx_paragraph.style.name, hierarchy_level=hierarchy_level
-			))
+				style=style_name, hierarchy_level=hierarchy_level,
+				numbering_xml_index=self.numbering_xml_index
+			)
 		else:
 			# directed_element_type == "paragraph":
-			self.aux_doc_graph.append(ee.Paragraph(
+			return ee.Paragraph(
 				content=paragraph_content, docx_element=docx_paragraph,
-				style=docx_paragraph.style.name, hierarchy_level=hierarchy_level
-			))
+				style=style_name, hierarchy_level=hierarchy_level,
+				numbering_xml_index=self.numbering_xml_index
+			)
 
 	def _process_docx_paragraph_content(self, docx_paragraph: DocxParagraph) -> list[ee.Content | ee.Hyperlink]:
 		"""
@@ -212,13 +617,19 @@ class EnhancedMD:
 		:return paragraph_content:
 		"""
 
+		if self.docx_package is not None:
+			return self._process_iterparse_paragraph_content(p=docx_paragraph._p)
+
+		# Paragraph style the runs inherit their font style from
+		p_style_id = docx_paragraph._p.style
+
 		paragraph_content = []
 		for docx_paragraph_content in docx_paragraph.iter_inner_content():
 			# Only process paragraph contents which are not empty
 			if len(docx_paragraph_content.text):
 				# Detect whether paragraph content is run or hyperlink and process accordingly
 				if isinstance(docx_paragraph_content, DocxRun):
-					run_content = self._process_docx_run(docx_run=docx_paragraph_content)
+					run_content = self._process_docx_run(docx_run=docx_paragraph_content, p_style_id=p_style_id)
 
 					# Apply (if needed) special paragraph_content concat
 					paragraph_content = self._concat_run_content_to_content_list(
@@ -226,51 +637,116 @@ class EnhancedMD:
 					)
 
 				elif isinstance(docx_paragraph_content, DocxHyperlink):
-					paragraph_content.append(self._process_docx_hyperlink(docx_hyperlink=docx_paragraph_content))
+					paragraph_content.append(self._process_docx_hyperlink(
+						docx_hyperlink=docx_paragraph_content, p_style_id=p_style_id
+					))
 
 		return paragraph_content
 
-	@staticmethod
-	def _process_docx_run(docx_run: DocxRun) -> list[ee.Content]:
+	def _process_iterparse_paragraph_content(self, p: CT_P) -> list[ee.Content | ee.Hyperlink]:
+		"""
+		Processes the paragraph content straight from the w:r and w:hyperlink elements
+		(as _process_docx_paragraph_content does through the docx Run and Hyperlink classes),
+		also used for the table cells paragraphs by both ingestion engines
+		:param p: Paragraph element
+		:return paragraph_content:
+		"""
+
+		p_style_id = p.style
+
+		paragraph_content = []
+		for element in p:
+			if element.tag == W_R:
+				# Empty runs produce no content
+				paragraph_content = self._concat_run_content_to_content_list(
+					content_list=paragraph_content, run_content=self._process_docx_run_element(r=element,
+					                                                                           p_style_id=p_style_id)
+				)
+			elif element.tag == W_HYPERLINK:
+				# Only process hyperlinks which are not empty
+				hyperlink = self._process_iterparse_hyperlink(hyperlink=element, p_style_id=p_style_id)
+				if len(hyperlink.content):
+					paragraph_content.append(hyperlink)
+
+		return paragraph_content
+
+	def _process_iterparse_hyperlink(self, hyperlink: CT_Hyperlink, p_style_id: str | None) -> ee.Hyperlink:
+		"""
+
+		:param hyperlink: Hyperlink element
+		:param p_style_id: Hyperlink paragraph pStyle
+		:return hyperlink:
+		"""
+
+		hyperlink_content = []
+		for r in hyperlink.iterchildren(W_R):
+			hyperlink_content = self._concat_run_content_to_content_list(
+				content_list=hyperlink_content,
+				run_content=self._process_docx_run_element(r=r, p_style_id=p_style_id)
+			)
+
+		return ee.Hyperlink(
+			content=hyperlink_content, docx_element=DocxHyperlink(hyperlink, None),
+			address=self._get_hyperlink_address(r_id=hyperlink.rId), fragment=hyperlink.anchor or ""
+		)
+
+	def _get_hyperlink_address(self, r_id: str | None) -> str:
+		"""
+		Resolves the hyperlink relationship into its address (as docx Hyperlink.address does)
+		:param r_id:
+		:return address:
+		"""
+
+		if self.docx_package is not None:
+			return self.docx_package.get_hyperlink_address(r_id=r_id)
+		return self.docx.part.rels[r_id].target_ref if r_id else ""
+
+	def _process_docx_run(self, docx_run: DocxRun, p_style_id: str | None) -> list[ee.Content]:
 		"""
 
 		:param docx_run:
+		:param p_style_id: Run paragraph pStyle
 		:return run_content:
 		"""
 
-		# Split run text by spaces, sequences of word characters ('-' included), and punctuation characters
-		pattern = r"(\s|[\w-]+|\W)"
-		content_split = re.findall(pattern, docx_run.text)
+		return self._process_docx_run_element(r=docx_run._r, p_style_id=p_style_id)
 
-		run_content = []
-		#
-		for content in content_split:
-			run_content.append(
-				ee.Content(
-					string=content,
-					# Font style attributes return either True or None
-					italic=(True if docx_run.font.italic is not None else False),
-					bold=(True if docx_run.font.bold is not None else False),
-					underline=(True if docx_run.font.underline is not None else False),
-					strike=(True if docx_run.font.strike is not None else False),
-					superscript=(True if docx_run.font.superscript is not None else False),
-					subscript=(True if docx_run.font.subscript is not None else False)
-				)
-			)
+	def _process_docx_run_element(self, r: CT_R, p_style_id: str | None) -> list[ee.Content]:
+		"""
 
-		return run_content
+		:param r: Run element
+		:param p_style_id: Run paragraph pStyle
+		:return run_content:
+		"""
+
+		# The whole run text is kept as a single span (token boundaries are computed lazily by Content.tokens)
+		run_text = read_run_text(r=r)
+		if not len(run_text):
+			return []
 
-	def _process_docx_hyperlink(self, docx_hyperlink: DocxHyperlink) -> ee.Hyperlink:
+		if self.stats is not None:
+			self.stats.count("content_spans")
+
+		return [
+			ee.Content(
+				string=run_text,
+				# Effective font style (including the one inherited from the paragraph and character styles)
+				font_flags=self.font_style_index.get_font_flags(r_pr=r.rPr, p_style_id=p_style_id)
+			)
+		]
+
+	def _process_docx_hyperlink(self, docx_hyperlink: DocxHyperlink, p_style_id: str | None) -> ee.Hyperlink:
 		"""
 
 		:param docx_hyperlink:
+		:param p_style_id: Hyperlink paragraph pStyle
 		:return hyperlink:
 		"""
 
 		hyperlink_content = []
 		#
 		for docx_hyperlink_content in docx_hyperlink.runs:
-			run_content = self._process_docx_run(docx_run=docx_hyperlink_content)
+			run_content = self._process_docx_run(docx_run=docx_hyperlink_content, p_style_id=p_style_id)
 
 			# Apply special hyperlink_content concat
 			hyperlink_content = self._concat_run_content_to_content_list(
@@ -294,6 +770,7 @@ class EnhancedMD:
 		"""
 
 		# Only if content_list is not empty and previous content is content class
+		# (contents are run spans, so the special concat joins the last span with the first run span)
 		if len(content_list) and len(run_content) and isinstance(content_list[-1], ee.Content):
 			# Detect whether the special concat is needed
 			is_special_concat = self._detect_special_content_concat(
@@ -323,61 +800,59 @@ class EnhancedMD:
 		"""
 
 		return (
-			# Content A string ends with word character ('-' included)
-			bool(re.search(r"[\w-]$", content_a.string))
+			# Content A string ends with word character ('-' included), only the span last character is checked
+			bool(re.match(r"[\w-]", content_a.string[-1]))
 			# Content B string begins with word character ('-' included)
-			and bool(re.search(r"^[\w-]", content_b.string))
+			and bool(re.match(r"[\w-]", content_b.string))
 			# Last paragraph_content and first run_content have the same font style attributes
-			and content_a.font_style == content_b.font_style
+			and content_a.font_flags == content_b.font_flags
 		)
 
-	def _detect_directed_element_type_and_hierarchy_level(self, docx_paragraph: DocxParagraph) -> tuple[str, int]:
+	def _get_docx_paragraph_style_name(self, docx_paragraph: DocxParagraph) -> str:
 		"""
+		Obtains the docx paragraph style name, resolving each pStyle only once per document
 		:param docx_paragraph:
-		:return directed_element_type, hierarchy_level:
+		:return style_name:
 		"""
 
-		#
-		heading_hl = self._detect_hierarchy_level(docx_paragraph=docx_paragraph, styles_dict=self.heading_styles)
-		if heading_hl is not None and heading_hl:
-			return "heading", heading_hl
+		return self._get_docx_style_name(p_style_id=docx_paragraph._p.style)
 
-		#
-		paragraph_hl = self._detect_hierarchy_level(docx_paragraph=docx_paragraph, styles_dict=self.paragraph_styles)
-		if paragraph_hl is not None and paragraph_hl:
-			return "paragraph", paragraph_hl
+	def _get_docx_style_name(self, p_style_id: str | None) -> str:
+		"""
+		Obtains the paragraph style name of a pStyle value, resolving each pStyle only once per document
+		:param p_style_id:
+		:return style_name:
+		"""
 
-		#
-		if heading_hl is None:
-			if paragraph_hl is None:
-				# If both heading hierarchy level are None raise correspondent error
-				raise UndefinedStyleFoundError(f"Undefined style found: {docx_paragraph.style.name}"
-				                               f"\n(text)\n\t{repr(docx_paragraph.text)}")
-			else:
-				return "paragraph", 1
-		else:
-			if paragraph_hl is None:
-				return "heading", 1
-			else:
-				# If both heading hierarchy level are 0 display correspondent warning and solve conflict
-				logging.info(f"\tUndefined directed element type conflict for: {docx_paragraph.style.name}"
-				             f"\n\t(text):\n\t\t{repr(docx_paragraph.text)}")
-				return self._conflict_undefined_directed_element_type()
+		try:
+			return self.docx_style_names[p_style_id]
+		except KeyError:
+			# Same resolution as docx_paragraph.style (the default paragraph style if not found)
+			self.docx_style_names[p_style_id] = self.docx_styles.get_by_id(p_style_id, WD_STYLE_TYPE.PARAGRAPH).name
+			return self.docx_style_names[p_style_id]
 
-	@staticmethod
-	def _detect_hierarchy_level(docx_paragraph: DocxParagraph, styles_dict: dict) -> int | None:
+	def _detect_directed_element_type_and_hierarchy_level(self, docx_paragraph: DocxParagraph,
+	                                                      style_name: str) -> tuple[str, int]:
 		"""
-
 		:param docx_paragraph:
-		:param styles_dict
-		:return hierarchy_level:
+		:param style_name:
+		:return directed_element_type, hierarchy_level:
 		"""
 
-		for hierarchy_level in styles_dict:
-			if docx_paragraph.style.name in styles_dict[hierarchy_level]:
-				return hierarchy_level
+		compiled_style = self.styles.get(style_name)
+		if compiled_style is None or (compiled_style[0] is None and compiled_style[1] is None):
+			# If both heading hierarchy level are None raise correspondent error
+			raise UndefinedStyleFoundError(f"Undefined style found: {style_name}"
+			                               f"\n(text)\n\t{repr(docx_paragraph.text)}")
 
-		return None
+		directed_element_type, hierarchy_level, _ = compiled_style
+		if directed_element_type is None:
+			# If both heading hierarchy level are 0 display correspondent warning and solve conflict
+			logging.info(f"\tUndefined directed element type conflict for: {style_name}"
+			             f"\n\t(text):\n\t\t{repr(docx_paragraph.text)}")
+			return self._conflict_undefined_directed_element_type()
+
+		return directed_element_type, hierarchy_level
 
 	@staticmethod
 	def _conflict_undefined_directed_element_type():
@@ -390,65 +865,217 @@ class EnhancedMD:
 		# Right now it will always assume that:
 		return "paragraph", 1
 
-	def _process_docx_table(self, docx_table: docx.table):
-		pass
+	def _process_docx_table(self, docx_table: DocxTable) -> ee.Table | None:
+		"""
+		Process a docx table into the enhanced_elements Table structure, building the cells grid in a single pass
+		over the w:tr and w:tc elements (instead of the docx table cell accessors, quadratic on large tables)
+		:param docx_table: Docx table class
+		:return table: (None if the table style is ignored)
+		"""
+
+		tbl = docx_table._tbl
+		style_name = self._get_docx_table_style_name(tbl=tbl)
+		if self.styles.is_ignored(style_name):
+			return None
 
-	def _build_doc_graph(self):
+		cells = []
+		grid = []
+		for i, tr in enumerate(tbl.iterchildren(W_TR)):
+			row = [None]*self._get_int_property(parent=tr.find(W_TR_PR), tag=W_GRID_BEFORE, default=0)
+			for tc in tr.iterchildren(W_TC):
+				tc_pr = tc.find(W_TC_PR)
+				column_span = max(self._get_int_property(parent=tc_pr, tag=W_GRID_SPAN, default=1), 1)
+				v_merge = tc_pr.find(W_V_MERGE) if tc_pr is not None else None
+				j = len(row)
+
+				# Vertically merged cell continuing the cell above (restart or unset value starts a new one)
+				above_cell = grid[i - 1][j] if i and j < len(grid[i - 1]) else None
+				if (
+					v_merge is not None and v_merge.get(W_VAL, "continue") == "continue"
+					and above_cell is not None and above_cell.column == j and above_cell.column_span == column_span
+					and above_cell.row + above_cell.row_span == i
+				):
+					above_cell.row_span += 1
+					row.extend([above_cell]*column_span)
+					continue
+
+				cell = ee.TableCell(
+					content=self._process_docx_cell_content(tc=tc), docx_element=DocxCell(tc, docx_table),
+					row=i, column=j, column_span=column_span
+				)
+				cells.append(cell)
+				row.extend([cell]*column_span)
+			grid.append(row)
+
+		# Pad the rows into a rectangular grid
+		n_columns = max(map(len, grid), default=0)
+		for row in grid:
+			row.extend([None]*(n_columns - len(row)))
+
+		return ee.Table(
+			content=cells, docx_element=docx_table, style=style_name, hierarchy_level=TABLE_HIERARCHY_LEVEL,
+			numbering_xml_index=self.numbering_xml_index, grid=grid
+		)
+
+	def _process_docx_cell_content(self, tc) -> list[ee.Content | ee.Hyperlink]:
+		"""
+		Processes the cell paragraphs (nested tables paragraphs included) contents separated by line breaks
+		:param tc: Cell element
+		:return cell_content:
 		"""
-		Recursively build the doc graph structure by iterating over the processed docx document contents,
+
+		cell_content = []
+		for p in tc.iter(W_P):
+			paragraph_content = self._process_iterparse_paragraph_content(p=p)
+			if not len(paragraph_content):
+				continue
+
+			if len(cell_content):
+				cell_content.append(ee.Content(string="\n"))
+			cell_content += paragraph_content
+
+		return cell_content
+
+	def _get_docx_table_style_name(self, tbl) -> str:
+		"""
+		:param tbl: Table element
+		:return style_name: Table style name (the default table style if not found)
+		"""
+
+		tbl_pr = tbl.find(W_TBL_PR)
+		tbl_style = tbl_pr.find(W_TBL_STYLE) if tbl_pr is not None else None
+		style_id = tbl_style.get(W_VAL) if tbl_style is not None else None
+		style = self.docx_styles.get_by_id(style_id, WD_STYLE_TYPE.TABLE)
+		return style.name if style is not None else ""
+
+	@staticmethod
+	def _get_int_property(parent, tag: str, default: int) -> int:
+		"""
+		:param parent: Properties element (or None)
+		:param tag: Property element tag
+		:param default: Value if the property is not defined
+		:return value: Property w:val integer value
+		"""
+
+		element = parent.find(tag) if parent is not None else None
+		try:
+			return int(element.get(W_VAL))
+		except (AttributeError, TypeError, ValueError):
+			return default
+
+	def _build_doc_graph(self, release_finished: bool = False) -> Iterator[ee.DirectedElement]:
+		"""
+		Iteratively build the doc graph structure by iterating over the processed docx document contents,
 		storing the subtrees into the doc graph structure
+		:param release_finished: Unlink the finished subtrees from the doc graph
+		:return directed_elements: Iterator of the directed elements as soon as they are placed in the doc graph
 		"""
 
-		if len(self.aux_doc_graph) > 0:  # Check the document is not empty
-			first_directed_element = self._get_aux_doc_graph_element_and_increment()
+		first_directed_element = self._get_next_aux_doc_graph_element()
+		if first_directed_element is not None:  # Check the document is not empty
 			first_directed_element.item = [0]
 			self._reset_numbering(directed_element=first_directed_element)
+			yield first_directed_element
 
-			self._build_doc_subgraph(curr_directed_element=first_directed_element)
+			yield from self._build_doc_subgraph(curr_directed_element=first_directed_element,
+			                                    release_finished=release_finished)
 		else:
 			raise EmptyDocxDocument(f"{self.docx_file_path} is an empty document")
 
-	def _build_doc_subgraph(self, curr_directed_element: ee.DirectedElement) -> bool:
+	def _build_doc_subgraph(self, curr_directed_element: ee.DirectedElement,
+	                        release_finished: bool = False) -> Iterator[ee.DirectedElement]:
 		"""
-
+		Explores the auxiliary doc graph starting from the current directed element using an explicit stack
+		of the directed elements pending of backtracking (instead of recursion), so the call depth is constant
+		and each directed element is pushed and popped at most once
 		:param curr_directed_element:
-		:return need_backtrack:
+		:param release_finished: Unlink the finished subtrees from the doc graph
+		:return directed_elements: Iterator of the directed elements as soon as they are placed in the doc graph
 		"""
-		# print(curr_directed_element.text, curr_directed_element.style)
 
-		# If no parent has been assigned to the current directed element, means that it is child of doc graph root
-		if curr_directed_element.parent is None:
-			self.doc_graph.append(curr_directed_element)
+		last_directed_element = curr_directed_element  # Last directed element placed in the doc graph
+		backtrack_stack = []
+		while True:
+			# If no parent has been assigned to the current directed element, means that it is child of doc graph root
+			if curr_directed_element.parent is None:
+				self.doc_graph.append(curr_directed_element)
 
-		# End of graph condition
-		if self.aux_doc_graph_index == len(self.aux_doc_graph):
-			return False
+			# End of graph condition
+			next_directed_element = self._get_next_aux_doc_graph_element()
+			if next_directed_element is None:
+				return
 
-		next_directed_element = self._get_aux_doc_graph_element_and_increment()
+			# Forward graph exploration
+			forward_directed_element = self._build_doc_subgraph_forward(
+				curr_directed_element=curr_directed_element, next_directed_element=next_directed_element
+			)
+			if forward_directed_element is not None:
+				# Current directed element will backtrack if any of the following directed elements needs to
+				backtrack_stack.append(curr_directed_element)
+				curr_directed_element = forward_directed_element
+			else:
+				# Backtracking (until a directed element is found where the exploration can continue from)
+				back_directed_element = self._build_doc_sub_graph_backtrack(curr_directed_element=curr_directed_element)
+				while back_directed_element is None:
+					if not len(backtrack_stack):
+						return
+					back_directed_element = self._build_doc_sub_graph_backtrack(
+						curr_directed_element=backtrack_stack.pop()
+					)
 
-		# Forward recursive graph exploration
-		need_backtrack = self._build_doc_subgraph_forward(
-			curr_directed_element=curr_directed_element, next_directed_element=next_directed_element
-		)
+				# Continue graph exploration
+				curr_directed_element = back_directed_element
 
-		# Backtracking
-		if need_backtrack:
-			return self._build_doc_sub_graph_backtrack(curr_directed_element=curr_directed_element)
-		else:
-			return False
+			# Directed elements with undefined hierarchy level are skipped (not placed in the doc graph)
+			if curr_directed_element is next_directed_element:
+				if release_finished:
+					self._release_finished_subtree(last_directed_element=last_directed_element,
+					                               directed_element=next_directed_element)
+				last_directed_element = next_directed_element
+				yield next_directed_element
+
+	def _release_finished_subtree(self, last_directed_element: ee.DirectedElement,
+	                              directed_element: ee.DirectedElement):
+		"""
+		Unlinks from the doc graph the subtree the last placed directed element belongs to once the newly placed
+		directed element is not part of it (parent children or doc graph root and previous/next links),
+		so the finished subtree is only kept alive by the consumer references (and the backtracking stack)
+		:param last_directed_element: Last directed element placed before the newly placed one
+		:param directed_element: Newly placed directed element
+		"""
+
+		if directed_element.parent is last_directed_element:
+			return
+
+		# Topmost finished directed element (sibling of the newly placed directed element)
+		finished_directed_element = last_directed_element
+		while finished_directed_element.parent is not directed_element.parent:
+			finished_directed_element = finished_directed_element.parent
+			if finished_directed_element is None:
+				return
+
+		siblings = (finished_directed_element.parent.children if finished_directed_element.parent is not None
+		            else self.doc_graph)
+		siblings[:] = [sibling for sibling in siblings if sibling is not finished_directed_element]
+
+		if finished_directed_element.previous is not None:
+			finished_directed_element.previous.next = None
+			finished_directed_element.previous = None
+		last_directed_element.next = None
+		directed_element.previous = None
 
 	def _build_doc_subgraph_forward(self, curr_directed_element: ee.DirectedElement,
-	                                next_directed_element: ee.DirectedElement) -> bool:
+	                                next_directed_element: ee.DirectedElement) -> ee.DirectedElement | None:
 		"""
 
 		:param curr_directed_element:
 		:param next_directed_element:
-		:return need_backtrack:
+		:return continue_directed_element: Directed element to continue the exploration from (None if backtrack needed)
 		"""
 
 		# Skip directed elements with undefined hierarchy level (at least for now)
 		if next_directed_element.hierarchy_level == 0:
-			return self._build_doc_subgraph(curr_directed_element=curr_directed_element)
+			return curr_directed_element
 		else:
 			curr_directed_element.add_next(next_directed_element)
 
@@ -466,12 +1093,13 @@ class EnhancedMD:
 				)
 
 	def _build_doc_subgraph_forward_heading_and_non_heading_type(self, curr_directed_element: ee.Heading,
-	                                                             next_directed_element: ee.DirectedElement) -> bool:
+	                                                             next_directed_element: ee.DirectedElement
+	                                                             ) -> ee.DirectedElement:
 		"""
 
 		:param curr_directed_element:
 		:param next_directed_element:
-		:return need_backtrack:
+		:return continue_directed_element:
 		"""
 
 		# Set non heading directed element heading item
@@ -483,20 +1111,22 @@ class EnhancedMD:
 		next_directed_element.item = [0]
 		self._reset_numbering(directed_element=next_directed_element)
 
-		# Continue recursive doc graph exploration
-		return self._build_doc_subgraph(curr_directed_element=next_directed_element)
+		# Continue doc graph exploration
+		return next_directed_element
 
 	def _build_doc_subgraph_forward_same_directed_element_type(self, curr_directed_element: ee.DirectedElement,
-	                                                   next_directed_element: ee.DirectedElement) -> bool:
+	                                                           next_directed_element: ee.DirectedElement
+	                                                           ) -> ee.DirectedElement | None:
 		"""
 
 		:param curr_directed_element:
-		:return need_backtrack:
+		:param next_directed_element:
+		:return continue_directed_element:
 		"""
 
 		# If next directed element has higher hierarchy level, backtrack
 		if curr_directed_element.hierarchy_level > next_directed_element.hierarchy_level:
-			return True
+			return None
 		else:
 			# Depending on difference of hierarchy levels add as child or next
 			if curr_directed_element.hierarchy_level < next_directed_element.hierarchy_level:
@@ -513,17 +1143,17 @@ class EnhancedMD:
 					directed_element=next_directed_element, other_directed_element=curr_directed_element
 				)
 
-			# Continue recursive graph exploration
-			return self._build_doc_subgraph(curr_directed_element=next_directed_element)
+			# Continue graph exploration
+			return next_directed_element
 
-	def _build_doc_sub_graph_backtrack(self, curr_directed_element: ee.DirectedElement) -> bool:
+	def _build_doc_sub_graph_backtrack(self, curr_directed_element: ee.DirectedElement) -> ee.DirectedElement | None:
 		"""
 
 		:param curr_directed_element:
-		:return need_backtrack:
+		:return continue_directed_element: Directed element to continue the exploration from (None if backtrack needed)
 		"""
 
-		back_directed_element = self.aux_doc_graph[self.aux_doc_graph_index - 1]
+		back_directed_element = self.aux_doc_graph_element
 
 		if isinstance(curr_directed_element, ee.Heading) and (not isinstance(back_directed_element, ee.Heading)):
 			return self._build_doc_subgraph_backtrack_heading_and_non_heading_type(
@@ -539,12 +1169,13 @@ class EnhancedMD:
 			)
 
 	def _build_doc_subgraph_backtrack_heading_and_non_heading_type(self, curr_directed_element: ee.Heading,
-	                                                               back_directed_element: ee.DirectedElement) -> bool:
+	                                                               back_directed_element: ee.DirectedElement
+	                                                               ) -> ee.DirectedElement:
 		"""
 
 		:param curr_directed_element:
 		:param back_directed_element:
-		:return:
+		:return continue_directed_element:
 		"""
 
 		if curr_directed_element.parent is not None:
@@ -553,16 +1184,17 @@ class EnhancedMD:
 		back_directed_element.item = self._get_item_same_hierarchy_level(prev_item=curr_directed_element.item)
 		self._set_numbering(directed_element=back_directed_element, other_directed_element=curr_directed_element)
 
-		# Continue recursive doc graph exploration
-		return self._build_doc_subgraph(curr_directed_element=back_directed_element)
+		# Continue doc graph exploration
+		return back_directed_element
 
 	def _build_doc_subgraph_backtrack_same_directed_element_type(self, curr_directed_element: ee.DirectedElement,
-	                                                             back_directed_element: ee.DirectedElement) -> bool:
+	                                                             back_directed_element: ee.DirectedElement
+	                                                             ) -> ee.DirectedElement | None:
 		"""
 
 		:param curr_directed_element:
 		:param back_directed_element:
-		:return:
+		:return continue_directed_element:
 		"""
 
 		# If next directed element has higher hierarchy level, continue backtracking
@@ -577,41 +1209,47 @@ class EnhancedMD:
 			back_directed_element.item = self._get_item_same_hierarchy_level(prev_item=curr_directed_element.item)
 			self._set_numbering(directed_element=back_directed_element, other_directed_element=curr_directed_element)
 
-			# Continue recursive doc graph exploration
-			return self._build_doc_subgraph(curr_directed_element=back_directed_element)
+			# Continue doc graph exploration
+			return back_directed_element
 
 	def _build_doc_subgraph_backtrack_and_root_edge_case(self, curr_directed_element: ee.DirectedElement,
-	                                                     other_directed_element: ee.DirectedElement) -> bool:
+	                                                     other_directed_element: ee.DirectedElement
+	                                                     ) -> ee.DirectedElement | None:
 		"""
 
 		:param curr_directed_element:
 		:param other_directed_element:
-		:return need_backtrack:
+		:return continue_directed_element:
 		"""
 
 		if curr_directed_element.parent is not None:  # Continue backtracking
-			return True
+			return None
 		else:
 			last_root_directed_element = self.doc_graph[-1]  # Previous directed element from the doc graph root
 
 			# Append other directed element to doc graph root
-			# (will actually be appended in next _build_doc_subgraph call)
+			# (will actually be appended when the exploration continues from it)
 			other_directed_element.item = self._get_item_same_hierarchy_level(prev_item=last_root_directed_element.item)
 			self._set_numbering(directed_element=other_directed_element, other_directed_element=last_root_directed_element)
 
-			# Continue recursive doc graph exploration from the root
-			return self._build_doc_subgraph(curr_directed_element=other_directed_element)
+			# Continue doc graph exploration from the root
+			return other_directed_element
 
-	def _get_aux_doc_graph_element_and_increment(self) -> ee.DirectedElement:
+	def _get_next_aux_doc_graph_element(self) -> ee.DirectedElement | None:
 		"""
 
-		:return aux_doc_graph_element:
+		:return aux_doc_graph_element: Next processed directed element (None once the document has been processed)
 		"""
 
-		aux_doc_graph_element = self.aux_doc_graph[self.aux_doc_graph_index]
-		self.aux_doc_graph_index += 1
+		if self.stats is None:
+			self.aux_doc_graph_element = next(self.aux_doc_graph, None)
+		else:
+			# The docx document is processed lazily, so its processing time is accumulated element by element
+			start = time.perf_counter()
+			self.aux_doc_graph_element = next(self.aux_doc_graph, None)
+			self.stats.add_seconds(phase=PROCESS_DOCX_DOCUMENT, seconds=time.perf_counter() - start)
 
-		return aux_doc_graph_element
+		return self.aux_doc_graph_element
 
 	@staticmethod
 	def _get_item_same_hierarchy_level(prev_item: list[int]) -> list[int]:
@@ -654,7 +1292,6 @@ class EnhancedMD:
 			directed_element.numbering_index = (self._get_start_numbering(directed_element=directed_element)
 			                                    if not other_directed_element.has_numbering
 			                                    else other_directed_element.numbering_index + 1)
-			print(directed_element.text, directed_element.style, directed_element.parent)
 			directed_element.construct_formatted_numbering()
 
 	@staticmethod
@@ -669,38 +1306,245 @@ class EnhancedMD:
 
 		"""
 
-		self.doc_flat = []
-		self._build_doc_flat(curr_directed_element=self.doc_graph[0])
+		with self._phase("build_doc_flat"):
+			self.doc_flat = []
+			self._build_doc_flat(curr_directed_element=self.doc_graph[0])
 
 	def _build_doc_flat(self, curr_directed_element: ee.DirectedElement):
 		"""
-
+		Iteratively follows the next directed elements chain storing them into the flat document
 		:param curr_directed_element:
 		"""
 
-		self.doc_flat.append(curr_directed_element)
-		if curr_directed_element.next is not None:
-			self._build_doc_flat(curr_directed_element=curr_directed_element.next)
+		while curr_directed_element is not None:
+			self.doc_flat.append(curr_directed_element)
+			curr_directed_element = curr_directed_element.next
 
 	def build_repr(self):
 		"""
 
 		"""
 
-		directed_element_types_dict = {
-			"Heading": "H",
-			"Paragraph": "P"
-		}
+		with self._phase("build_repr"):
+			self.repr_array = []
+			for directed_element in self.doc_flat:
+				self.repr_array.append(construct_repr_string(
+					element_type=type(directed_element).__name__,
+					identifier=directed_element.construct_identifier_string(),
+					item=directed_element.item,
+					heading_item=getattr(directed_element, "heading_item", None),
+					style=directed_element.style,
+					numbering=directed_element.numbering if directed_element.has_numbering else None,
+					text=directed_element.text
+				))
+
+	def get_doc_index(self) -> DocIndex:
+		"""
+		Obtains the identifier, style, element type and subtree index of the built doc graph (built on first access),
+		or of the detached elements of a document loaded from the parse cache
+		:return doc_index:
+		"""
 
-		self.repr_array = []
+		if self.doc_index is None:
+			if self.doc_graph is not None:
+				self.doc_index = DocIndex(doc_graph=self.doc_graph)
+			elif self.detached_document is not None:
+				self.doc_index = DocIndex.from_detached_document(detached_document=self.detached_document)
+			else:
+				raise RuntimeError("Graph has not been built, invoke .__call__() first")
+
+		return self.doc_index
+
+	def detach(self) -> DetachedDocument:
+		"""
+		Exports the built doc graph into plain detached elements without any docx reference,
+		which can be pickled (e.g. returned from worker processes) or cached cheaply
+		:return detached_document:
+		"""
+
+		if self.detached_document is not None:
+			return self.detached_document
+
+		if self.doc_flat is None:
+			raise RuntimeError("Graph and flat document has not been built, invoke .__call__() first")
+
+		directed_element_indexes = {id(directed_element): i for i, directed_element in enumerate(self.doc_flat)}
+
+		elements = []
 		for directed_element in self.doc_flat:
+			heading_item = getattr(directed_element, "heading_item", None)
+			text = directed_element.text
+			plain_text = directed_element.render(text_format=ee.TextFormat.PLAIN)
+			elements.append(DetachedElement(
+				element_type=type(directed_element).__name__,
+				identifier=directed_element.construct_identifier_string(),
+				text=text,
+				# Share repeated style strings so they are pickled only once
+				style=sys.intern(directed_element.style),
+				hierarchy_level=directed_element.hierarchy_level,
+				item=tuple(directed_element.item),
+				heading_item=tuple(heading_item) if heading_item is not None else None,
+				numbering=directed_element.numbering if directed_element.has_numbering else None,
+				parent=(directed_element_indexes[id(directed_element.parent)]
+				        if directed_element.parent is not None else None),
+				children=tuple(directed_element_indexes[id(child)] for child in directed_element.children),
+				hyperlinks=self._get_detached_hyperlinks(directed_element=directed_element),
+				plain_text=plain_text if plain_text != text else None
+			))
+
+		return DetachedDocument(
+			docx_file_path=self.docx_file_path, docx_metadata=self.docx_metadata.copy(), elements=elements,
+			doc_graph=tuple(directed_element_indexes[id(directed_element)] for directed_element in self.doc_graph)
+		)
+
+	@staticmethod
+	def _get_detached_hyperlinks(directed_element: ee.DirectedElement) -> tuple[tuple[int, int, str, str], ...]:
+		"""
+		:param directed_element:
+		:return hyperlinks: (start, end, link, link type name) of each hyperlink in the directed element text
+		"""
+
+		if all(isinstance(content, ee.Content) for content in directed_element.content):
+			return ()
+
+		return tuple(
+			(start, end, hyperlink.link, hyperlink.type.name)
+			for start, end, hyperlink in directed_element.get_nested_spans(text_format=directed_element.text_format)
+			if isinstance(hyperlink, ee.Hyperlink)
+		)
+
+	def save(self, file_path: str):
+		"""
+		Saves the built doc graph into a compact doc graph file (see enhanced_md.doc_graph_file)
+		:param file_path:
+		"""
+
+		save_detached_document(detached_document=self.detach(), file_path=file_path)
+
+	def diff(self, other: "EnhancedMD | DetachedDocument") -> list[ElementDiff]:
+		"""
+		Structural diff from this built document to another built (or detached) document
+		(see enhanced_md.doc_diff)
+		:param other: Built document of the new revision
+		:return element_diffs: Inserted, deleted, moved and modified elements
+		"""
+
+		return diff_documents(old_document=self.detach(),
+		                      new_document=other.detach() if isinstance(other, EnhancedMD) else other)
+
+	@staticmethod
+	def load(file_path: str) -> DetachedDocument:
+		"""
+		Loads a doc graph file saved by .save()
+		:param file_path:
+		:return detached_document:
+		"""
+
+		return load_detached_document(file_path=file_path)
+
+	def to_doc_graph(self) -> DocGraph:
+		"""
+		Exports the built doc graph into array backed storage (see enhanced_md.doc_graph)
+		:return doc_graph:
+		"""
+
+		return DocGraph.from_detached_document(detached_document=self.detach())
+
+	def iter_chunks(self, max_size: int, size_function: Callable[[str], int] = len,
+	                separator: str = "\n") -> Iterator[Chunk]:
+		"""
+		Chunks the document plain texts following the doc graph hierarchy, without splitting any directed element
+		and preferring heading subtree boundaries (see enhanced_md.chunker). The built flat document is chunked as is,
+		otherwise the document is built while it is chunked, releasing the finished subtrees
+		:param max_size: Chunk size budget (characters by default)
+		:param size_function: Text size (e.g. enhanced_md.chunker.count_tokens or an embedding tokenizer token count)
+		:param separator: Separator between the texts of the chunk directed elements
+		:return chunks: Iterator of the chunks in document order, each one with its heading path and identifiers
+		"""
+
+		return iter_chunks(elements=self._iter_chunk_elements(), docx_file_path=self.docx_file_path,
+		                   max_size=max_size, size_function=size_function, separator=separator)
+
+	def _iter_chunk_elements(self) -> Iterator[tuple[int, str, str, bool]]:
+		"""
+		:return elements: (depth, identifier, plain text, is heading) of each element in flat document order
+		"""
+
+		if self.doc_flat is None and self.detached_document is not None:
+			# Document loaded from the parse cache (parents precede their children in the flat document)
+			depths = []
+			for element in self.detached_document.elements:
+				depths.append(depths[element.parent] + 1 if element.parent is not None else 0)
+				yield depths[-1], element.identifier, element.plain_text, element.element_type == "Heading"
+			return
+
+		ancestors = []  # Open subtrees directed elements
+		for directed_element in (self.doc_flat if self.doc_flat is not None
+		                         else self.iter_elements(release_finished=True)):
+			while ancestors and ancestors[-1] is not directed_element.parent:
+				ancestors.pop()
+			yield (len(ancestors), directed_element.construct_identifier_string(),
+			       directed_element.render(text_format=ee.TextFormat.PLAIN), isinstance(directed_element, ee.Heading))
+			ancestors.append(directed_element)
+
+
+def _get_docx_file_size(docx_file_path: str) -> int:
+	"""
+	Obtains the docx file size used to schedule the corpus processing (missing files are scheduled last)
+	:param docx_file_path:
+	:return docx_file_size:
+	"""
+
+	try:
+		return os.path.getsize(docx_file_path)
+	except OSError:
+		return -1
+
+
+def _release_aparse_limiter(future: asyncio.Future, limiter: asyncio.Semaphore):
+	"""
+	Releases the aparse limiter permit once the executor function of a cancelled aparse finishes
+	:param future: Executor function future (its result is discarded)
+	:param limiter:
+	"""
+
+	if not future.cancelled():
+		future.exception()  # Retrieved so that the discarded ParseCancelledError is not reported
+	limiter.release()
+
+
+# Compiled styles of the corpus being processed by the worker process
+_corpus_worker_styles: CompiledStyles | None = None
+
+
+def _init_corpus_worker(styles: CompiledStyles):
+	"""
+	Stores the corpus compiled styles in the worker process
+	:param styles:
+	"""
+
+	global _corpus_worker_styles
+	_corpus_worker_styles = styles
+
+
+def _process_corpus_docx_file(docx_file_path: str, styles: CompiledStyles | None = None, iterparse: bool = False,
+                              cache: ParseCache | None = None) -> tuple[str, DetachedDocument | None, Exception | None]:
+	"""
+	Builds a single docx document of the corpus (defined at module level so it can be sent to worker processes)
+	:param docx_file_path:
+	:param styles: Compiled styles (defaults to the ones the worker process was initialized with)
+	:param iterparse: Ingest the document with the pull parsing engine
+	:param cache: Parse cache the document is loaded from or stored into
+	:return corpus_result: (docx_file_path, detached document, error) tuple
+	"""
+
+	try:
+		emd = EnhancedMD(docx_file_path=docx_file_path,
+		                 styles=styles if styles is not None else _corpus_worker_styles, iterparse=iterparse,
+		                 cache=cache)
+		emd()
+		return docx_file_path, emd.detach(), None
+	except Exception as e:
+		logging.info(f"\t[{docx_file_path}] failed: {type(e).__name__}: {e}")
+		return docx_file_path, None, e
 
-			directed_element_type = directed_element_types_dict[type(directed_element).__name__]
-			heading_item_len = (0 if isinstance(directed_element, ee.Heading) or directed_element.heading_item is None
-			                    else len(directed_element.heading_item))
-			space = "·"*5*(len(directed_element.item) + heading_item_len - 1)
-			marker = "" if heading_item_len == 0 and len(directed_element.item) == 1 else "+----"
-			numbering = "" if not directed_element.has_numbering else f"${directed_element.numbering}$ "
-			self.repr_array.append(f"@@@{directed_element.construct_identifier_string()}@@@{directed_element_type}|{space}{marker}"
-			                       f"{directed_element.item}({directed_element.style}) {numbering}"
-			                       f"->{repr(directed_element.text)}")
\ No newline at end of file
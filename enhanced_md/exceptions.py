@@ -8,3 +8,11 @@ class UndefinedTextFormatError(Exception):
 
 class EmptyDocxDocument(Exception):
 	pass
+
+
+class DocGraphFileError(Exception):
+	pass
+
+
+class ParseCancelledError(Exception):
+	pass
@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+from docx.oxml.ns import qn
+
+from enhanced_md.enhanced_elements import FontStyle
+from enhanced_md.numbering_xml_index import xpath
+from enhanced_md.stats import EnhancedMDStats
+
+W_VAL = qn("w:val")
+W_STYLE = qn("w:style")
+W_STYLE_ID = qn("w:styleId")
+W_TYPE = qn("w:type")
+W_DEFAULT = qn("w:default")
+W_BASED_ON = qn("w:basedOn")
+W_RPR = qn("w:rPr")
+W_RSTYLE = qn("w:rStyle")
+
+# Run properties resolved into font style flags (in run properties tuple order)
+RUN_PROPERTIES = (qn("w:i"), qn("w:b"), qn("w:u"), qn("w:strike"), qn("w:vertAlign"))
+RUN_PROPERTIES_INDEX = {tag: i for i, tag in enumerate(RUN_PROPERTIES)}
+UNDEFINED_RUN_PROPERTIES = (None,) * len(RUN_PROPERTIES)
+
+# ST_OnOff values turning off a toggle property
+OFF_VALUES = {"0", "false", "off"}
+
+
+def read_run_properties(r_pr) -> tuple[str | None, tuple[bool | str | None, ...]]:
+    """
+    Reads the font style run properties defined in a w:rPr element in a single pass over its children
+    :param r_pr: w:rPr element (or None)
+    :return r_style_id, run_properties: Character style id and (italic, bold, underline, strike, vertAlign),
+    None meaning the property is not defined
+    """
+
+    if r_pr is None:
+        return None, UNDEFINED_RUN_PROPERTIES
+
+    r_style_id = None
+    run_properties = list(UNDEFINED_RUN_PROPERTIES)
+    for child in r_pr:
+        tag = child.tag
+        if tag == W_RSTYLE:
+            r_style_id = child.get(W_VAL)
+            continue
+
+        i = RUN_PROPERTIES_INDEX.get(tag)
+        if i is None:
+            continue
+
+        val = child.get(W_VAL)
+        if tag == RUN_PROPERTIES[2]:  # Underline is a type, "none" removes it
+            run_properties[i] = val != "none"
+        elif tag == RUN_PROPERTIES[4]:  # Vertical alignment (superscript, subscript or baseline)
+            run_properties[i] = val
+        else:  # Toggle properties
+            run_properties[i] = val is None or val.lower() not in OFF_VALUES
+
+    return r_style_id, tuple(run_properties)
+
+
+def merge_run_properties(run_properties: tuple, overriding_run_properties: tuple) -> tuple:
+    return tuple(run_property if overriding_run_property is None else overriding_run_property
+                 for run_property, overriding_run_property in zip(run_properties, overriding_run_properties))
+
+
+def run_properties_to_font_flags(run_properties: tuple) -> int:
+    italic, bold, underline, strike, vert_align = run_properties
+    return int(
+        (FontStyle.ITALIC if italic else 0) | (FontStyle.BOLD if bold else 0)
+        | (FontStyle.UNDERLINE if underline else 0) | (FontStyle.STRIKE if strike else 0)
+        | (FontStyle.SUPERSCRIPT if vert_align == "superscript" else 0)
+        | (FontStyle.SUBSCRIPT if vert_align == "subscript" else 0)
+    )
+
+
+class FontStyleIndex:
+    """
+    Per document index resolving the effective font style of docx runs, combining (from lowest to highest priority)
+    the document defaults, the paragraph style and character style inheritance chains and the direct formatting.
+    Resolved font style flags are cached by (rStyle, pStyle, direct run properties)
+    """
+
+    __slots__ = ("default_run_properties", "styles", "default_paragraph_style_id", "style_run_properties",
+                 "font_flags")
+
+    def __init__(self, styles_element, stats: EnhancedMDStats | None = None):
+        """
+        :param styles_element: styles.xml root element
+        :param stats: Document instrumentation counting the XPath queries (None if disabled)
+        """
+
+        # Document default run properties
+        r_pr_default = xpath(styles_element, "./w:docDefaults/w:rPrDefault/w:rPr", stats=stats)
+        self.default_run_properties: tuple = read_run_properties(
+            r_pr_default[0] if len(r_pr_default) != 0 else None
+        )[1]
+
+        # styleId -> (type, basedOn, run properties), first style in document order for each styleId
+        self.styles: dict[str, tuple[str | None, str | None, tuple]] = {}
+        self.default_paragraph_style_id: str | None = None
+        for style in styles_element.iterchildren(W_STYLE):
+            style_id = style.get(W_STYLE_ID)
+            style_type = style.get(W_TYPE)
+            if style_type == "paragraph" and style.get(W_DEFAULT) in ("1", "true", "on"):
+                self.default_paragraph_style_id = style_id  # Last default in document order
+            if style_id is None or style_id in self.styles:
+                continue
+
+            based_on = style.find(W_BASED_ON)
+            self.styles[style_id] = (
+                style_type,
+                based_on.get(W_VAL) if based_on is not None else None,
+                read_run_properties(style.find(W_RPR))[1]
+            )
+
+        # Lazily filled caches
+        self.style_run_properties: dict[tuple[str | None, str], tuple] = {}
+        self.font_flags: dict[tuple[str | None, str | None, tuple], int] = {}
+
+    def get_font_flags(self, r_pr, p_style_id: str | None) -> int:
+        """
+        Obtains the effective font style flags of a run
+        :param r_pr: Run w:rPr element (or None)
+        :param p_style_id: Run paragraph pStyle value
+        :return font_flags:
+        """
+
+        r_style_id, direct_run_properties = read_run_properties(r_pr)
+        key = (r_style_id, p_style_id, direct_run_properties)
+        try:
+            return self.font_flags[key]
+        except KeyError:
+            pass
+
+        run_properties = merge_run_properties(
+            self.default_run_properties,
+            self._get_style_run_properties(style_id=self._get_paragraph_style_id(p_style_id), style_type="paragraph")
+        )
+        if r_style_id is not None:
+            run_properties = merge_run_properties(
+                run_properties, self._get_style_run_properties(style_id=r_style_id, style_type="character")
+            )
+        run_properties = merge_run_properties(run_properties, direct_run_properties)
+
+        self.font_flags[key] = run_properties_to_font_flags(run_properties)
+        return self.font_flags[key]
+
+    def _get_paragraph_style_id(self, p_style_id: str | None) -> str | None:
+        # Paragraphs without style or with an undefined one have the default paragraph style
+        style = self.styles.get(p_style_id) if p_style_id is not None else None
+        if style is None or style[0] != "paragraph":
+            return self.default_paragraph_style_id
+        return p_style_id
+
+    def _get_style_run_properties(self, style_id: str | None, style_type: str) -> tuple:
+        """
+        Obtains the run properties defined by the style and the styles it is based on (recursively)
+        :param style_id:
+        :param style_type:
+        :return run_properties:
+        """
+
+        key = (style_id, style_type)
+        try:
+            return self.style_run_properties[key]
+        except KeyError:
+            pass
+
+        # Collect the inheritance chain from the style to its base style
+        chain = []
+        visited_style_ids = set()
+        while style_id is not None and style_id in self.styles and style_id not in visited_style_ids:
+            visited_style_ids.add(style_id)
+            _style_type, based_on, run_properties = self.styles[style_id]
+            if _style_type != style_type:
+                break
+            chain.append(run_properties)
+            style_id = based_on
+
+        # Apply from the base style to the style itself
+        run_properties = UNDEFINED_RUN_PROPERTIES
+        for style_run_properties in reversed(chain):
+            run_properties = merge_run_properties(run_properties, style_run_properties)
+
+        self.style_run_properties[key] = run_properties
+        return run_properties
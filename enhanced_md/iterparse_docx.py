@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import zipfile
+from typing import Iterator
+
+from lxml import etree
+from docx.opc.constants import RELATIONSHIP_TARGET_MODE as RTM, RELATIONSHIP_TYPE as RT
+from docx.opc.coreprops import CoreProperties
+from docx.opc.oxml import parse_xml as parse_rels_xml
+from docx.opc.packuri import PackURI, PACKAGE_URI
+from docx.opc.parts.coreprops import CorePropertiesPart
+from docx.oxml.ns import qn
+from docx.oxml.parser import element_class_lookup, parse_xml
+from docx.parts.styles import StylesPart
+from docx.styles.styles import Styles
+
+W_BODY = qn("w:body")
+W_R = qn("w:r")
+W_HYPERLINK = qn("w:hyperlink")
+BODY_CONTENT_TAGS = (qn("w:p"), qn("w:tbl"))
+PARAGRAPH_CONTENT_TAGS = frozenset((W_R, W_HYPERLINK))
+# Run inner content translated into text (every element class str() gives its text equivalent)
+RUN_TEXT_TAGS = frozenset(qn(tag) for tag in ("w:br", "w:cr", "w:noBreakHyphen", "w:ptab", "w:t", "w:tab"))
+
+# Size of the chunks of document.xml fed to the pull parser
+CHUNK_SIZE = 1 << 16
+
+
+def read_run_text(r) -> str:
+    """
+    Reads the run text in a single pass over its children (same text as CT_R.text without evaluating XPath)
+    :param r: w:r element
+    :return text:
+    """
+
+    return "".join([str(child) for child in r if child.tag in RUN_TEXT_TAGS])
+
+
+def read_paragraph_text(p) -> str:
+    """
+    Reads the paragraph text from its runs and hyperlinks runs (same text as CT_P.text without evaluating XPath)
+    :param p: w:p element
+    :return text:
+    """
+
+    return "".join([
+        read_run_text(child) if child.tag == W_R
+        else "".join([read_run_text(r) for r in child if r.tag == W_R])
+        for child in p if child.tag in PARAGRAPH_CONTENT_TAGS
+    ])
+
+
+def detach_element(parent, element):
+    """
+    Removes the element from its parent keeping its subtree, in linear time (lxml reconciles the namespaces of the
+    whole removed subtree at once in quadratic time, so the children are moved out and back one by one)
+    :param parent:
+    :param element:
+    """
+
+    children = list(element)
+    for child in children:
+        element.remove(child)
+    parent.remove(element)
+    element.extend(children)
+
+
+class IterparseDocx:
+    """
+    Lightweight reader of a .docx zip package which, instead of loading and proxying the whole document as
+    docx.Document does, only parses the parts needed by EnhancedMD (core properties, styles and numbering)
+    and pull parses word/document.xml emitting the body paragraphs and tables as they are closed.
+    Elements are python-docx oxml classes (CT_P, CT_R, CT_Hyperlink, CT_Tbl) so their text and properties
+    are read exactly as python-docx does
+    """
+
+    __slots__ = ("docx_file_path", "document_partname", "document_rels", "core_properties", "styles",
+                 "numbering_element")
+
+    def __init__(self, docx_file_path: str):
+        """
+        :param docx_file_path:
+        """
+
+        self.docx_file_path: str = docx_file_path
+
+        with zipfile.ZipFile(docx_file_path) as docx_zip:
+            package_rels = self._read_rels(docx_zip=docx_zip, partname=PACKAGE_URI)
+
+            # Main document part and its relationships
+            self.document_partname: PackURI = self._get_related_partname(rels=package_rels,
+                                                                         reltype=RT.OFFICE_DOCUMENT)
+            if self.document_partname is None:
+                raise ValueError(f"{docx_file_path} has no main document part")
+            self.document_rels: dict[str, tuple[str, str, bool]] = self._read_rels(
+                docx_zip=docx_zip, partname=self.document_partname
+            )
+
+            # Core properties (default ones if the package has none, as python-docx does)
+            core_properties_element = self._read_related_part(docx_zip=docx_zip, rels=package_rels,
+                                                              reltype=RT.CORE_PROPERTIES,
+                                                              base_uri=PACKAGE_URI.baseURI)
+            self.core_properties: CoreProperties = (
+                CoreProperties(core_properties_element) if core_properties_element is not None
+                else CorePropertiesPart.default(None).core_properties
+            )
+
+            # Styles (default ones if the document has none, as python-docx does) and numbering definitions
+            styles_element = self._read_related_part(docx_zip=docx_zip, rels=self.document_rels, reltype=RT.STYLES,
+                                                     base_uri=self.document_partname.baseURI)
+            self.styles: Styles = (Styles(styles_element) if styles_element is not None
+                                   else StylesPart.default(None).styles)
+            self.numbering_element = self._read_related_part(docx_zip=docx_zip, rels=self.document_rels,
+                                                             reltype=RT.NUMBERING,
+                                                             base_uri=self.document_partname.baseURI)
+
+    @staticmethod
+    def _read_rels(docx_zip: zipfile.ZipFile, partname: PackURI) -> dict[str, tuple[str, str, bool]]:
+        """
+        :param docx_zip:
+        :param partname: Part name (or package pseudo part name) the relationships belong to
+        :return rels: rId -> (reltype, target reference, is external)
+        """
+
+        try:
+            rels_xml = docx_zip.read(partname.rels_uri.membername)
+        except KeyError:  # Part without relationships
+            return {}
+
+        return {
+            rel.rId: (rel.reltype, rel.target_ref, rel.target_mode == RTM.EXTERNAL)
+            for rel in parse_rels_xml(rels_xml).Relationship_lst
+        }
+
+    @staticmethod
+    def _get_related_partname(rels: dict[str, tuple[str, str, bool]], reltype: str,
+                              base_uri: str = PACKAGE_URI.baseURI) -> PackURI | None:
+        for _reltype, target_ref, is_external in rels.values():
+            if _reltype == reltype and not is_external:
+                return PackURI.from_rel_ref(base_uri, target_ref)
+        return None
+
+    def _read_related_part(self, docx_zip: zipfile.ZipFile, rels: dict[str, tuple[str, str, bool]], reltype: str,
+                           base_uri: str):
+        """
+        Parses the first part related by the relationship type (None if the part does not exist)
+        :param docx_zip:
+        :param rels:
+        :param reltype:
+        :param base_uri: Base URI of the part the relationships belong to
+        :return element:
+        """
+
+        partname = self._get_related_partname(rels=rels, reltype=reltype, base_uri=base_uri)
+        if partname is None:
+            return None
+
+        try:
+            return parse_xml(docx_zip.read(partname.membername))
+        except KeyError:  # Dangling relationship
+            return None
+
+    def get_hyperlink_address(self, r_id: str | None) -> str:
+        """
+        Resolves the hyperlink relationship into its address (as docx Hyperlink.address does)
+        :param r_id:
+        :return address:
+        """
+
+        if not r_id:
+            return ""
+
+        _, target_ref, is_external = self.document_rels[r_id]
+        if is_external:
+            return target_ref
+        return PackURI.from_rel_ref(self.document_partname.baseURI, target_ref).relative_ref(
+            self.document_partname.baseURI
+        )
+
+    def iter_body_content(self) -> Iterator:
+        """
+        Pull parses the document part yielding the body paragraphs and tables (w:p and w:tbl direct children
+        of w:body, as docx Document.iter_inner_content does) as soon as they are closed, detaching them from the
+        body once processed
+        :return body_content: Iterator of CT_P and CT_Tbl elements
+        """
+
+        parser = etree.XMLPullParser(events=("end",), tag=BODY_CONTENT_TAGS,
+                                     remove_blank_text=True, resolve_entities=False)
+        parser.set_element_class_lookup(element_class_lookup)
+
+        with zipfile.ZipFile(self.docx_file_path) as docx_zip:
+            with docx_zip.open(self.document_partname.membername) as document_xml:
+                while True:
+                    chunk = document_xml.read(CHUNK_SIZE)
+                    if chunk:
+                        parser.feed(chunk)
+                    else:
+                        parser.close()
+
+                    for _, element in parser.read_events():
+                        parent = element.getparent()
+                        if parent is not None and parent.tag == W_BODY:
+                            yield element
+                            # Detach the processed element so the parsed body does not grow with the document
+                            detach_element(parent=parent, element=element)
+
+                    if not chunk:
+                        break
@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+
+from lxml import etree
+from docx.enum.style import WD_STYLE_TYPE
+from docx.oxml.ns import nsmap, qn
+from docx.parts.document import DocumentPart
+from docx.styles.styles import Styles
+
+from enhanced_md.stats import EnhancedMDStats
+
+# XPath number() compatible literal, numeric attributes (numId, abstractNumId, ilvl) are compared as numbers
+XPATH_NUMBER_REGEX = re.compile(r"^\s*-?(\d+(\.\d*)?|\.\d+)\s*$")
+
+
+@lru_cache(maxsize=None)
+def compile_xpath(query: str) -> etree.XPath:
+    return etree.XPath(query, namespaces=nsmap)
+
+
+def xpath(element, query: str, stats: EnhancedMDStats | None = None) -> list:
+    """
+    Evaluates the XPath query over any numbering or styles element
+    (not every element is a python-docx oxml class providing the namespaces mapping)
+    :param element:
+    :param query:
+    :param stats: Document instrumentation counting the query (None if disabled)
+    :return results:
+    """
+
+    if stats is not None:
+        stats.count("xpath_queries")
+    return compile_xpath(query)(element)
+
+
+def xpath_number(value: str | None) -> float | None:
+    """
+    Converts an attribute value into the number XPath would compare it as (None if it is not a number)
+    :param value:
+    :return number:
+    """
+
+    if value is None or not XPATH_NUMBER_REGEX.match(value):
+        return None
+    return float(value)
+
+
+class NumberingXmlIndex:
+    """
+    Per document index of numbering.xml and styles.xml numbering definitions, built once so that
+    every directed element numbering lookup is a dictionary hit instead of XPath queries over the whole parts:
+    - numId -> abstractNumId
+    - abstractNumId -> ilvl -> lvl (numFmt, lvlText, start) and abstractNumId -> numStyleLink
+    - styleId -> (numPr, numId, ilvl, basedOn)
+    """
+
+    __slots__ = ("docx_styles", "numbering_element", "num_ids", "abstract_num_ids", "lvls", "num_style_links",
+                 "styles", "paragraph_style_ids", "numbering_xml_infos", "stats")
+
+    def __init__(self, docx_styles: Styles, numbering_element=None, stats: EnhancedMDStats | None = None):
+        """
+        :param docx_styles: Document styles
+        :param numbering_element: numbering.xml root element (None if the document has no numbering part)
+        :param stats: Document instrumentation counting the numbering lookups and XPath queries (None if disabled)
+        """
+
+        self.docx_styles: Styles = docx_styles
+        self.numbering_element = numbering_element
+        self.stats: EnhancedMDStats | None = stats
+
+        self.num_ids: set[float] = set()
+        self.abstract_num_ids: dict[float, str] = {}
+        self.lvls: dict[tuple[float, float], dict[str, str]] = {}
+        self.num_style_links: dict[float, str] = {}
+        self._index_numbering()
+
+        self.styles: dict[str, dict[str, bool | str | None]] = {}
+        self._index_styles()
+
+        # Lazily filled caches
+        self.paragraph_style_ids: dict[str | None, str] = {}
+        self.numbering_xml_infos: dict[tuple[str, str], dict] = {}
+
+    @classmethod
+    def from_part(cls, part: DocumentPart, stats: EnhancedMDStats | None = None) -> NumberingXmlIndex:
+        try:
+            numbering_element = part.numbering_part._element
+        except NotImplementedError:  # python-docx cannot create the numbering part if the document has none
+            numbering_element = None
+
+        return cls(docx_styles=part.styles, numbering_element=numbering_element, stats=stats)
+
+    def _index_numbering(self):
+        numbering_element = self.numbering_element
+        if numbering_element is None:
+            return
+
+        # First w:num (having w:abstractNumId) in document order for each numId
+        for num in xpath(numbering_element, ".//w:num", stats=self.stats):
+            num_id = xpath_number(num.get(qn("w:numId")))
+            if num_id is None:
+                continue
+            self.num_ids.add(num_id)
+            abstract_num_id = xpath(num, "./w:abstractNumId/@w:val", stats=self.stats)
+            if len(abstract_num_id) != 0:
+                self.abstract_num_ids.setdefault(num_id, abstract_num_id[0])
+
+        # First w:lvl attributes in document order for each abstractNumId and ilvl
+        for abstract_num in xpath(numbering_element, ".//w:abstractNum", stats=self.stats):
+            abstract_num_id = xpath_number(abstract_num.get(qn("w:abstractNumId")))
+            if abstract_num_id is None:
+                continue
+
+            num_style_link = xpath(abstract_num, "./w:numStyleLink/@w:val", stats=self.stats)
+            if len(num_style_link) != 0:
+                self.num_style_links.setdefault(abstract_num_id, num_style_link[0])
+
+            for lvl in xpath(abstract_num, "./w:lvl", stats=self.stats):
+                ilvl = xpath_number(lvl.get(qn("w:ilvl")))
+                if ilvl is None:
+                    continue
+                lvl_info = self.lvls.setdefault((abstract_num_id, ilvl), {})
+                for key, query in (("numFmt", "./w:numFmt/@w:val"), ("lvlText", "./w:lvlText/@w:val"),
+                                   ("start", "./w:start/@w:val")):
+                    value = xpath(lvl, query, stats=self.stats)
+                    if len(value) != 0:
+                        lvl_info.setdefault(key, value[0])
+
+    def _index_styles(self):
+        # First w:style in document order for each styleId
+        for style in xpath(self.docx_styles._element, ".//w:style", stats=self.stats):
+            style_id = style.get(qn("w:styleId"))
+            if style_id is None or style_id in self.styles:
+                continue
+
+            num_id = xpath(style, ".//w:numPr/w:numId/@w:val", stats=self.stats)
+            ilvl = xpath(style, ".//w:numPr/w:ilvl/@w:val", stats=self.stats)
+            based_on = xpath(style, ".//w:basedOn/@w:val", stats=self.stats)
+            self.styles[style_id] = {
+                "num_pr": len(xpath(style, ".//w:numPr", stats=self.stats)) != 0,
+                "num_id": num_id[0] if len(num_id) != 0 else None,
+                "ilvl": ilvl[0] if len(ilvl) != 0 else None,
+                "based_on": based_on[0] if len(based_on) != 0 else None
+            }
+
+    def get_paragraph_style_id(self, p_style_id: str | None) -> str:
+        """
+        Resolves the paragraph pStyle value into the applied styleId (the default paragraph style if not found)
+        :param p_style_id:
+        :return style_id:
+        """
+
+        try:
+            return self.paragraph_style_ids[p_style_id]
+        except KeyError:
+            style_id = self.docx_styles.get_by_id(p_style_id, WD_STYLE_TYPE.PARAGRAPH).style_id
+            self.paragraph_style_ids[p_style_id] = style_id
+            return style_id
+
+    def has_num(self, num_id: str) -> bool:
+        return xpath_number(num_id) in self.num_ids
+
+    def get_style(self, style_id: str) -> dict[str, bool | str | None]:
+        return self.styles[style_id]
+
+    def get_based_on_style_num_id(self, style_id: str) -> str | None:
+        """
+        Obtains the numId of the style, or of the first style it is based on (recursively),
+        referencing an existing num
+        :param style_id:
+        :return num_id:
+        """
+
+        visited_style_ids = set()
+        while style_id not in visited_style_ids:
+            visited_style_ids.add(style_id)
+            style = self.styles[style_id]
+            if style["num_id"] is not None and self.has_num(style["num_id"]):
+                return style["num_id"]
+            if style["based_on"] is None:
+                return None
+            style_id = style["based_on"]
+
+        return None
+
+    def get_numbering_xml_info(self, num_id: str, ilvl: str) -> dict:
+        """
+        Obtains the numbering definition of the given numId and ilvl
+        (following the abstractNum numStyleLink if the level is not defined)
+        :param num_id:
+        :param ilvl:
+        :return numbering_xml_info:
+        """
+
+        if self.stats is not None:
+            self.stats.count("numbering_lookups")
+        try:
+            return self.numbering_xml_infos[(num_id, ilvl)]
+        except KeyError:
+            pass
+
+        abstract_num_id = xpath_number(self.abstract_num_ids[xpath_number(num_id)])
+        lvl = self.lvls.get((abstract_num_id, xpath_number(ilvl)))
+
+        if lvl is None:
+            style_link = self.styles[self.num_style_links[abstract_num_id]]
+            _num_id = style_link["num_id"]
+            _ilvl = style_link["ilvl"] if style_link["ilvl"] is not None else ilvl
+            numbering_xml_info = self.get_numbering_xml_info(num_id=_num_id, ilvl=_ilvl)
+        else:
+            numbering_xml_info = {
+                "num_id": num_id,
+                "ilvl": ilvl,
+                "type": lvl["numFmt"],
+                "format": lvl["lvlText"],
+                "start": int(lvl["start"]) if "start" in lvl else 1
+            }
+
+        self.numbering_xml_infos[(num_id, ilvl)] = numbering_xml_info
+        return numbering_xml_info
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+import tempfile
+
+from enhanced_md.compiled_styles import CompiledStyles
+from enhanced_md.config import ENHANCED_MD_VERSION
+from enhanced_md.detached_elements import DetachedDocument, DETACHED_FORMAT_VERSION
+
+CACHE_ENTRY_SUFFIX = ".pickle"
+# Size of the chunks of the docx file fed to the content hash
+HASH_CHUNK_SIZE = 1 << 20
+
+
+class ParseCache:
+	"""
+	On-disk cache of built documents (stored detached, without any docx reference) keyed by the docx file content hash,
+	the compiled styles, the library version and the detached format version, bounded in size by evicting the least recently used entries.
+	Entries are written atomically (temporary file replaced into place) and missing or unreadable entries are treated
+	as cache misses, so the same cache directory can be shared by several worker processes
+	"""
+
+	__slots__ = ("cache_dir", "max_size")
+
+	def __init__(self, cache_dir: str, max_size: int = 1 << 30):
+		"""
+		:param cache_dir: Cache directory (created if it does not exist)
+		:param max_size: Maximum size in bytes of the cache entries
+		"""
+
+		self.cache_dir: str = cache_dir
+		self.max_size: int = max_size
+
+		os.makedirs(cache_dir, exist_ok=True)
+
+	def __reduce__(self):
+		return ParseCache, (self.cache_dir, self.max_size)
+
+	@staticmethod
+	def get_key(docx_file_path: str, styles: CompiledStyles) -> str:
+		"""
+		:param docx_file_path:
+		:param styles: Compiled styles the document is built with
+		:return key: Cache key of the document
+		"""
+
+		key_hash = hashlib.sha256(f"{ENHANCED_MD_VERSION}\n{DETACHED_FORMAT_VERSION}\n{styles.fingerprint}\n".encode())
+		with open(docx_file_path, "rb") as docx_file:
+			for chunk in iter(lambda: docx_file.read(HASH_CHUNK_SIZE), b""):
+				key_hash.update(chunk)
+
+		return key_hash.hexdigest()
+
+	def _get_entry_path(self, key: str) -> str:
+		return os.path.join(self.cache_dir, key + CACHE_ENTRY_SUFFIX)
+
+	def load(self, key: str) -> DetachedDocument | None:
+		"""
+		Loads a cached document marking it as the most recently used
+		:param key:
+		:return detached_document: Cached document (None if not cached)
+		"""
+
+		entry_path = self._get_entry_path(key=key)
+		try:
+			with open(entry_path, "rb") as entry_file:
+				detached_document = pickle.load(entry_file)
+			os.utime(entry_path)
+		except FileNotFoundError:  # Not cached (or evicted by another process)
+			return None
+		except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError, TypeError):
+			# Unreadable entry, built again and replaced
+			return None
+
+		return detached_document if isinstance(detached_document, DetachedDocument) else None
+
+	def store(self, key: str, detached_document: DetachedDocument):
+		"""
+		Stores a built document, evicting the least recently used documents if the cache exceeds its maximum size
+		:param key:
+		:param detached_document:
+		"""
+
+		file_descriptor, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=f".{key}.", suffix=".tmp")
+		try:
+			with os.fdopen(file_descriptor, "wb") as tmp_file:
+				pickle.dump(detached_document, tmp_file, protocol=pickle.HIGHEST_PROTOCOL)
+			os.replace(tmp_path, self._get_entry_path(key=key))
+		except BaseException:
+			try:
+				os.remove(tmp_path)
+			except OSError:
+				pass
+			raise
+
+		self._evict()
+
+	def _evict(self):
+		"""
+		Removes the least recently used entries until the cache fits its maximum size
+		"""
+
+		entries = []
+		cache_size = 0
+		with os.scandir(self.cache_dir) as dir_entries:
+			for dir_entry in dir_entries:
+				if not dir_entry.name.endswith(CACHE_ENTRY_SUFFIX):
+					continue
+				try:
+					entry_stat = dir_entry.stat()
+				except FileNotFoundError:  # Evicted by another process
+					continue
+				entries.append((entry_stat.st_mtime_ns, entry_stat.st_size, dir_entry.path))
+				cache_size += entry_stat.st_size
+
+		if cache_size <= self.max_size:
+			return
+
+		entries.sort()
+		for _, entry_size, entry_path in entries:
+			try:
+				os.remove(entry_path)
+			except FileNotFoundError:  # Evicted by another process
+				pass
+			cache_size -= entry_size
+			if cache_size <= self.max_size:
+				return
+
+	def clear(self):
+		"""
+		Removes every cached document
+		"""
+
+		with os.scandir(self.cache_dir) as dir_entries:
+			for dir_entry in dir_entries:
+				if dir_entry.name.endswith(CACHE_ENTRY_SUFFIX):
+					try:
+						os.remove(dir_entry.path)
+					except FileNotFoundError:
+						pass
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import cProfile
+import ctypes
+import pstats
+import sys
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+# Instrumented phases, called back on start and stop:
+# - docx_load: docx document loading and indexing (EnhancedMD construction)
+# - build_doc_graph: docx document processing and doc graph building
+# - build_doc_flat, build_repr
+PHASES = ("docx_load", "build_doc_graph", "build_doc_flat", "build_repr")
+# Time accumulated inside build_doc_graph processing the docx document contents (not called back)
+PROCESS_DOCX_DOCUMENT = "process_docx_document"
+
+COUNTERS = (
+	"paragraphs",  # Docx paragraphs seen
+	"empty_paragraphs",  # Docx paragraphs skipped as empty
+	"ignored_paragraphs",  # Docx paragraphs skipped by an ignore style
+	"reused_paragraphs",  # Docx paragraphs reused from the previous build (not processed again)
+	"tables",  # Docx tables seen
+	"directed_elements",  # Directed elements created
+	"content_spans",  # Content spans created (one per docx run with text)
+	"numbering_lookups",  # Numbering definitions looked up in the numbering index
+	"xpath_queries"  # XPath queries evaluated over the docx parts
+)
+
+
+class _MallInfo2(ctypes.Structure):
+	_fields_ = [(field, ctypes.c_size_t) for field in ("arena", "ordblks", "smblks", "hblks", "hblkhd", "usmblks",
+	                                                    "fsmblks", "uordblks", "fordblks", "keepcost")]
+
+
+def _load_mallinfo2() -> Callable[[], _MallInfo2] | None:
+	if not sys.platform.startswith("linux"):
+		return None
+	try:
+		mallinfo2 = ctypes.CDLL(None).mallinfo2
+	except (OSError, AttributeError):  # Not glibc (or glibc older than 2.33)
+		return None
+	mallinfo2.restype = _MallInfo2
+	mallinfo2.argtypes = []
+	return mallinfo2
+
+
+_mallinfo2 = _load_mallinfo2()
+
+
+def get_heap_allocated_bytes() -> int | None:
+	"""
+	Obtains the bytes currently allocated from the C heap, which (unlike tracemalloc) includes the lxml trees
+	and the Python object arenas
+	:return heap_allocated_bytes: Allocated bytes (None if the C library does not report them)
+	"""
+
+	if _mallinfo2 is None:
+		return None
+
+	mallinfo = _mallinfo2()
+	return mallinfo.uordblks + mallinfo.hblkhd
+
+
+class EnhancedMDStats:
+	"""
+	Per document instrumentation of an EnhancedMD instance: phase timings (with optional start and stop callbacks),
+	counters and an optional cProfile capture of the instrumented phases.
+	Instrumentation is only performed when an EnhancedMDStats is given to EnhancedMD
+	"""
+
+	__slots__ = ("on_phase_start", "on_phase_stop", "profiler", "phase_seconds", "counters", "phase_starts")
+
+	def __init__(self, on_phase_start: Callable[[str], None] | None = None,
+	             on_phase_stop: Callable[[str, float], None] | None = None, profile: bool = False):
+		"""
+		:param on_phase_start: Called with the phase name when a phase starts
+		:param on_phase_stop: Called with the phase name and its duration in seconds when a phase stops
+		:param profile: Capture a cProfile profile of the instrumented phases
+		"""
+
+		self.on_phase_start: Callable[[str], None] | None = on_phase_start
+		self.on_phase_stop: Callable[[str, float], None] | None = on_phase_stop
+		self.profiler: cProfile.Profile | None = cProfile.Profile() if profile else None
+
+		self.phase_seconds: dict[str, float] = {phase: 0. for phase in (*PHASES, PROCESS_DOCX_DOCUMENT)}
+		self.counters: dict[str, int] = {counter: 0 for counter in COUNTERS}
+		self.phase_starts: dict[str, float] = {}
+
+	def start_phase(self, phase: str):
+		"""
+		:param phase:
+		"""
+
+		if self.on_phase_start is not None:
+			self.on_phase_start(phase)
+		if self.profiler is not None:
+			self.profiler.enable()
+		self.phase_starts[phase] = time.perf_counter()
+
+	def stop_phase(self, phase: str):
+		"""
+		:param phase:
+		"""
+
+		seconds = time.perf_counter() - self.phase_starts.pop(phase)
+		if self.profiler is not None:
+			self.profiler.disable()
+		self.phase_seconds[phase] += seconds
+		if self.on_phase_stop is not None:
+			self.on_phase_stop(phase, seconds)
+
+	@contextmanager
+	def phase(self, phase: str) -> Iterator[None]:
+		"""
+		:param phase:
+		:return phase_context: Context manager running the phase
+		"""
+
+		self.start_phase(phase)
+		try:
+			yield
+		finally:
+			self.stop_phase(phase)
+
+	def add_seconds(self, phase: str, seconds: float):
+		self.phase_seconds[phase] += seconds
+
+	def count(self, counter: str, n: int = 1):
+		self.counters[counter] += n
+
+	def get_profile_stats(self) -> pstats.Stats | None:
+		"""
+		:return profile_stats: Captured profile statistics (None if profiling is disabled)
+		"""
+
+		return pstats.Stats(self.profiler) if self.profiler is not None else None
+
+	def to_dict(self) -> dict:
+		"""
+		:return stats: Phase timings and counters (JSON serializable)
+		"""
+
+		return {"phase_seconds": self.phase_seconds.copy(), "counters": self.counters.copy()}
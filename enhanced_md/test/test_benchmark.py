@@ -0,0 +1,49 @@
+import json
+
+import enhanced_md.enhanced_elements as ee
+from enhanced_md import EnhancedMD
+from enhanced_md.benchmark import SyntheticDocxConfig, generate_synthetic_docx, get_synthetic_styles, benchmark_docx
+from enhanced_md.benchmark.run_benchmark import BENCHMARK_PHASES
+
+# ----- UNIT TESTS -----
+
+# # ----- synthetic docx -----
+
+def test_generate_synthetic_docx(tmp_path):
+	#
+	docx_file_path = str(tmp_path / "synthetic.docx")
+	config = SyntheticDocxConfig(n_paragraphs=60, depth=3, numbering_density=0.5, hyperlink_density=0.5,
+	                             runs_per_paragraph=4)
+
+	#
+	generate_synthetic_docx(docx_file_path=docx_file_path, config=config)
+	test_emd = EnhancedMD(docx_file_path=docx_file_path, styles=get_synthetic_styles(depth=config.depth))
+	test_emd()
+
+	# Ensure every synthetic paragraph is built with the configured nesting, numbering, hyperlinks and runs
+	assert len(test_emd.doc_flat) == 60
+	assert max(len(directed_element.item) for directed_element in test_emd.doc_flat) == 3
+	assert any(directed_element.has_numbering for directed_element in test_emd.doc_flat)
+	assert any(isinstance(content, ee.Hyperlink)
+	           for directed_element in test_emd.doc_flat for content in directed_element.content)
+	assert max(len(directed_element.content) for directed_element in test_emd.doc_flat) >= 4
+
+
+# # ----- benchmark -----
+
+def test_benchmark_docx(tmp_path):
+	#
+	docx_file_path = str(tmp_path / "synthetic.docx")
+	config = SyntheticDocxConfig(n_paragraphs=30)
+	generate_synthetic_docx(docx_file_path=docx_file_path, config=config)
+
+	#
+	benchmark_result = benchmark_docx(docx_file_path=docx_file_path, styles=get_synthetic_styles(depth=config.depth),
+	                                  repeat=1)
+
+	# Ensure every phase is timed and measured into a machine readable result
+	assert benchmark_result["n_elements"] == 30
+	assert list(benchmark_result["phase_seconds"]) == list(BENCHMARK_PHASES)
+	assert list(benchmark_result["phase_peak_memory_bytes"]) == list(BENCHMARK_PHASES)
+	assert benchmark_result["elements_per_second"] > 0
+	assert json.loads(json.dumps(benchmark_result)) == benchmark_result
@@ -0,0 +1,124 @@
+import pytest
+
+import enhanced_md.enhanced_elements as ee
+
+# ----- UNIT TESTS -----
+
+# # ----- Content -----
+
+def test_content_font_flags():
+	#
+	content = ee.Content(string="text", italic=True, bold=True)
+
+	# Ensure font style attributes are packed into the bitmask and exposed through the dictionary view
+	assert content.font_flags == ee.FontStyle.ITALIC | ee.FontStyle.BOLD
+	assert type(content.font_flags) is int
+	assert content.font_style == {
+		"italic": True, "bold": True, "underline": False, "strike": False, "superscript": False, "subscript": False
+	}
+	assert ee.Content(string="text", font_flags=content.font_flags).font_style == content.font_style
+	assert ee.Content(string="text").font_flags == 0
+
+
+@pytest.mark.parametrize("font_style, html_string, md_string", [
+	({}, "a<br>b", "a\nb"),
+	({"italic": True}, "<i>a<br>b</i>", "*a\nb*"),
+	({"italic": True, "bold": True}, "<b><i>a<br>b</i></b>", "***a\nb***"),
+	({"underline": True, "strike": True}, "<strike><u>a<br>b</u></strike>", "<u>~~a\nb~~</u>"),
+	({"superscript": True}, "<sup>a<br>b</sup>", "<sup>a\nb</sup>"),
+	({"subscript": True}, "<sub>a<br>b</sub>", "<sub>a\nb</sub>"),
+])
+def test_content_string_to_html_and_md(font_style, html_string, md_string):
+	#
+	content = ee.Content(string="a\nb", **font_style)
+
+	# Ensure tags are applied from the bitmask in the same order as the font style attributes
+	assert content.string_to_html() == html_string
+	assert content.string_to_md() == md_string
+
+
+def test_content_tokens():
+	#
+	content = ee.Content(string="Article 6.4, well-known\tmechanism")
+
+	# Ensure token boundaries are computed from the span string
+	assert content.tokens == ["Article", " ", "6", ".", "4", ",", " ", "well-known", "\t", "mechanism"]
+	assert "".join(content.tokens) == content.string
+
+
+# # ----- BaseElement -----
+
+def test_hyperlink_render_text_formats():
+	#
+	hyperlink = ee.Hyperlink(
+		content=[ee.Content(string="see "), ee.Content(string="here", bold=True)], docx_element=None,
+		fragment="target"
+	)
+
+	# Ensure every text format is rendered from the same content and memoized
+	assert hyperlink.rendered_texts is None
+	assert hyperlink.render(ee.TextFormat.HTML) == '<a href="#target">see <b>here</b></a>'
+	assert hyperlink.render(ee.TextFormat.MD) == "[see **here**](#target)"
+	assert hyperlink.render(ee.TextFormat.PLAIN) == "see here"
+	assert hyperlink.text == hyperlink.render(ee.TextFormat.HTML)
+	assert set(hyperlink.rendered_texts) == set(ee.TextFormat)
+
+
+@pytest.mark.parametrize("content, html_text, md_text", [
+	([("a", {"bold": True}), (" ", {}), ("b", {"bold": True})], "<b>a b</b>", "**a b**"),
+	([("a", {"bold": True}), ("b", {"bold": True, "italic": True}), ("c", {"bold": True})],
+	 "<b>a<i>b</i>c</b>", "**a*b*c**"),
+	([("a", {"italic": True, "bold": True}), ("b", {"bold": True})], "<b><i>a</i>b</b>", "***a*b**"),
+	([("a", {"bold": True}), (" ", {}), ("b", {"italic": True})], "<b>a</b> <i>b</i>", "**a** *b*"),
+	([("a\n", {"underline": True}), ("", {"bold": True}), ("b", {"underline": True})], "<u>a<br>b</u>", "<u>a\nb</u>"),
+])
+def test_render_merged_markup(content, html_text, md_text):
+	#
+	hyperlink = ee.Hyperlink(
+		content=[ee.Content(string=string, **font_style) for string, font_style in content], docx_element=None
+	)
+
+	# Ensure the markup of adjacent spans sharing font style is merged instead of being closed and reopened
+	assert hyperlink.render(ee.TextFormat.HTML) == html_text
+	assert hyperlink.render(ee.TextFormat.MD) == md_text
+
+
+@pytest.mark.parametrize("text_format", list(ee.TextFormat))
+def test_get_nested_spans(text_format):
+	#
+	hyperlinks = [ee.Hyperlink(content=[ee.Content(string=f"link {i}")], docx_element=None, fragment=f"t{i}")
+	              for i in range(3)]
+	table_cell = ee.TableCell(
+		content=[ee.Content(string="a", bold=True), hyperlinks[0], ee.Content(string=" b "), hyperlinks[1],
+		         hyperlinks[2], ee.Content(string="c", italic=True)],
+		docx_element=None, row=0, column=0
+	)
+
+	# Ensure each nested element is located in the rendered text
+	text = table_cell.render(text_format=text_format)
+	nested_spans = table_cell.get_nested_spans(text_format=text_format)
+	assert [nested_element for _, _, nested_element in nested_spans] == hyperlinks
+	for (start, end, nested_element) in nested_spans:
+		assert text[start:end] == nested_element.render(text_format=text_format)
+
+
+def test_render_undefined_text_format():
+	#
+	hyperlink = ee.Hyperlink(content=[ee.Content(string="text")], docx_element=None)
+
+	# Ensure only TextFormat members can be rendered
+	with pytest.raises(ee.UndefinedTextFormatError):
+		hyperlink.render("html")
+
+
+def test_skip_content_chars():
+	#
+	hyperlink = ee.Hyperlink(content=[ee.Content(string="2. link")], docx_element=None, fragment="target")
+	content = [ee.Content(string="1.", bold=True), ee.Content(string="1 "), hyperlink]
+
+	# Ensure characters are removed across spans and nested elements without modifying the original content
+	assert [c.string for c in ee.BaseElement.skip_content_chars(content=content, n_chars=1)[:2]] == [".", "1 "]
+	skipped_content = ee.BaseElement.skip_content_chars(content=content, n_chars=7)
+	assert len(skipped_content) == 1
+	assert skipped_content[0].render(ee.TextFormat.MD) == "[link](#target)"
+	assert hyperlink.render(ee.TextFormat.MD) == "[2. link](#target)"
@@ -1,9 +1,25 @@
+import asyncio
+import inspect
 import os
+import pickle
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy
 import pytest
 import docx
 from docx.document import Document as DocxDocument
+from docx.opc.constants import RELATIONSHIP_TYPE as RT
+from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
 
-from enhanced_md import EnhancedMD
+import enhanced_md.enhanced_elements as ee
+import enhanced_md.parse_cache as parse_cache
+from enhanced_md import EnhancedMD, CompiledStyles, ParseCache, EnhancedMDStats, TextIndex
+from enhanced_md.enhanced_elements import TextFormat
+from enhanced_md.detached_elements import DetachedElement
+from enhanced_md.doc_diff import DiffType
+from enhanced_md.chunker import count_tokens
+from enhanced_md.exceptions import EmptyDocxDocument, UndefinedStyleFoundError, DocGraphFileError, ParseCancelledError
 
 # ----- PYTEST FIXTURES -----
 
@@ -55,7 +71,8 @@ def create_test_styles_dict():
 			1: ["test_p1"],
 			2: ["test_p2"],
 			3: ["test_p3"]
-		}
+		},
+		"ignore": []
 	}
 
 	yield styles
@@ -105,6 +122,166 @@ def fill_test_docx_document_with_starting_undefined(create_empty_test_docx_docum
 	docx_doc = docx.Document()
 	docx_doc.save(docx_file_path)
 
+
+@pytest.fixture
+def fill_test_docx_document_with_long_document(create_empty_test_docx_document):
+	# Set up: Long enough document for a recursive doc graph build to exceed the default recursion limit
+	docx_doc, docx_file_path = create_empty_test_docx_document
+	for i in range(500):
+		docx_doc.add_paragraph(text=f"H {i}", style="test_h1")
+		docx_doc.add_paragraph(text=f"P {i}", style="test_p1")
+		docx_doc.add_paragraph(text=f"SubP {i}", style="test_p2")
+	docx_doc.save(docx_file_path)
+
+	yield docx_file_path
+
+	# Tear down:
+	docx_doc = docx.Document()
+	docx_doc.save(docx_file_path)
+
+
+# # ----- process_corpus fixtures -----
+
+@pytest.fixture
+def create_test_docx_corpus(tmp_path):
+	# Set up: Create a corpus with a correct, an empty and an undefined style docx document
+	docx_file_paths = {}
+	for name, paragraphs in [
+		("correct", [("H", "test_h1"), ("P", "test_p1")] * 10),
+		("empty", []),
+		("undefined", [("H", "test_h1"), ("N", "Normal")])
+	]:
+		docx_doc = docx.Document()
+		set_test_docx_styles(docx_doc=docx_doc)
+		for text, style in paragraphs:
+			docx_doc.add_paragraph(text=text, style=style)
+		docx_file_paths[name] = str(tmp_path / f"{name}.docx")
+		docx_doc.save(docx_file_paths[name])
+
+	yield docx_file_paths
+
+
+# # ----- numbering fixtures -----
+
+@pytest.fixture
+def fill_test_docx_document_with_numbering(create_empty_test_docx_document):
+	# Set up: Heading followed by "List Number" style numbered paragraphs
+	docx_doc, docx_file_path = create_empty_test_docx_document
+	docx_doc.add_paragraph(text="H", style="test_h1")
+	for i in range(3):
+		docx_doc.add_paragraph(text=f"N {i}", style="List Number")
+	docx_doc.save(docx_file_path)
+
+	yield docx_file_path
+
+	# Tear down:
+	docx_doc = docx.Document()
+	docx_doc.save(docx_file_path)
+
+
+# # ----- run content fixtures -----
+
+@pytest.fixture
+def fill_test_docx_document_with_runs(create_empty_test_docx_document):
+	# Set up: Paragraph with a word split across runs and a differently styled run
+	docx_doc, docx_file_path = create_empty_test_docx_document
+	docx_paragraph = docx_doc.add_paragraph(style="test_p1")
+	docx_paragraph.add_run("First sent")
+	docx_paragraph.add_run("ence, and ")
+	docx_paragraph.add_run("bold").bold = True
+	docx_paragraph.add_run(" text")
+	docx_doc.save(docx_file_path)
+
+	yield docx_file_path
+
+	# Tear down:
+	docx_doc = docx.Document()
+	docx_doc.save(docx_file_path)
+
+
+@pytest.fixture
+def fill_test_docx_document_with_inherited_font_style(create_empty_test_docx_document):
+	# Set up: Italic paragraph style with runs inheriting it, a bold character style and direct formatting overrides
+	docx_doc, docx_file_path = create_empty_test_docx_document
+	docx_doc.styles["test_p1"].font.italic = True
+	docx_doc.styles.add_style(name="test_bold", style_type=docx.enum.style.WD_STYLE_TYPE.CHARACTER).font.bold = True
+
+	docx_paragraph = docx_doc.add_paragraph(style="test_p1")
+	docx_paragraph.add_run("inherited ")
+	docx_paragraph.add_run("character ", style="test_bold")
+	docx_paragraph.add_run("direct ").italic = False
+	docx_paragraph.add_run("super").font.superscript = True
+	docx_doc.save(docx_file_path)
+
+	yield docx_file_path
+
+	# Tear down:
+	docx_doc = docx.Document()
+	docx_doc.save(docx_file_path)
+
+
+# # ----- ingestion engine fixtures -----
+
+@pytest.fixture
+def fill_test_docx_document_with_mixed_content(create_empty_test_docx_document):
+	# Set up: Headings, paragraphs, numbering, hyperlinks, breaks, tables and empty paragraphs
+	docx_doc, docx_file_path = create_empty_test_docx_document
+	docx_doc.add_paragraph(text="H", style="test_h1")
+	docx_paragraph = docx_doc.add_paragraph(text="Line\tone", style="test_p1")
+	docx_paragraph.add_run().add_break()
+	docx_paragraph.add_run("line two")
+	for address, fragment in (("https://example.com", None), (None, "anchor")):
+		docx_hyperlink = OxmlElement("w:hyperlink")
+		if address is not None:
+			docx_hyperlink.set(qn("r:id"), docx_paragraph.part.relate_to(address, RT.HYPERLINK, is_external=True))
+		else:
+			docx_hyperlink.set(qn("w:anchor"), fragment)
+		docx_hyperlink.append(docx_paragraph.add_run(" link")._r)
+		docx_paragraph._p.append(docx_hyperlink)
+	docx_doc.add_paragraph(text=" \t", style="test_p1")
+	docx_doc.add_table(rows=2, cols=2)
+	docx_doc.add_paragraph(text="H", style="test_h2")
+	for i in range(3):
+		docx_doc.add_paragraph(text=f"N {i}", style="List Number")
+	docx_doc.save(docx_file_path)
+
+	yield docx_file_path
+
+	# Tear down:
+	docx_doc = docx.Document()
+	docx_doc.save(docx_file_path)
+
+
+# # ----- table fixtures -----
+
+@pytest.fixture
+def fill_test_docx_document_with_tables(create_empty_test_docx_document):
+	# Set up: Table with merged cells, multi paragraph cells and a hyperlink between a heading and its paragraphs
+	docx_doc, docx_file_path = create_empty_test_docx_document
+	docx_doc.add_paragraph(text="H", style="test_h1")
+	docx_doc.add_paragraph(text="P", style="test_p1")
+	docx_doc.add_paragraph(text="SubP", style="test_p2")
+	docx_table = docx_doc.add_table(rows=3, cols=3)
+	for i, docx_row in enumerate(docx_table.rows):
+		for j, docx_cell in enumerate(docx_row.cells):
+			docx_cell.text = f"c{i}{j}"
+	docx_table.cell(0, 0).merge(docx_table.cell(0, 1))
+	docx_table.cell(1, 2).merge(docx_table.cell(2, 2))
+	docx_paragraph = docx_table.cell(2, 0).add_paragraph("a | b")
+	docx_hyperlink = OxmlElement("w:hyperlink")
+	docx_hyperlink.set(qn("r:id"), docx_paragraph.part.relate_to("https://example.com", RT.HYPERLINK,
+	                                                             is_external=True))
+	docx_hyperlink.append(docx_paragraph.add_run(" link")._r)
+	docx_paragraph._p.append(docx_hyperlink)
+	docx_doc.add_paragraph(text="P after", style="test_p1")
+	docx_doc.save(docx_file_path)
+
+	yield docx_file_path
+
+	# Tear down:
+	docx_doc = docx.Document()
+	docx_doc.save(docx_file_path)
+
 # ----- UNIT TESTS -----
 
 # # ----- build_doc_graph -----
@@ -184,3 +361,1023 @@ def test_build_doc_graph_with_starting_undefined(fill_test_docx_document_with_st
 
 	# Ensure correct item same hierarchy level assignment
 	assert test_emd.doc_graph[0].item == test_emd.doc_graph[1].item[:-1] + [test_emd.doc_graph[1].item[-1] - 1]
+
+
+def test_build_doc_graph_with_long_document(fill_test_docx_document_with_long_document, create_test_styles_dict):
+	#
+	docx_file_path = fill_test_docx_document_with_long_document
+	styles = create_test_styles_dict
+
+	#
+	test_emd = EnhancedMD(docx_file_path=docx_file_path, styles=styles)
+	test_emd()
+
+	# Ensure every heading is a doc graph root with its paragraph and sub paragraph below
+	assert len(test_emd.doc_graph) == 500
+	assert len(test_emd.doc_flat) == 1500
+	assert test_emd.doc_graph[-1].item == [499]
+	assert test_emd.doc_graph[-1].children[0].children[0].item == [0, 0]
+	assert test_emd.doc_graph[-1].children[0].children[0].construct_identifier_string() == "500.1.1"
+
+# # ----- iter_elements -----
+
+@pytest.mark.parametrize("release_finished", [False, True])
+def test_iter_elements(fill_test_docx_document_with_long_document, create_test_styles_dict, release_finished):
+	#
+	docx_file_path = fill_test_docx_document_with_long_document
+	styles = create_test_styles_dict
+
+	#
+	test_emd = EnhancedMD(docx_file_path=docx_file_path, styles=styles)
+	test_emd()
+	test_streaming_emd = EnhancedMD(docx_file_path=docx_file_path, styles=styles)
+	directed_elements = test_streaming_emd.iter_elements(release_finished=release_finished)
+
+	# Ensure each directed element is yielded in document order once its position is known
+	first_directed_element = next(directed_elements)
+	assert first_directed_element.item == [0]
+	assert [first_directed_element.construct_identifier_string()] + [
+		directed_element.construct_identifier_string() for directed_element in directed_elements
+	] == [directed_element.construct_identifier_string() for directed_element in test_emd.doc_flat]
+
+	# Ensure finished subtrees are only unlinked from the doc graph when requested
+	if release_finished:
+		assert len(test_streaming_emd.doc_graph) == 1
+		assert first_directed_element.children[0].children[0].next is None
+	else:
+		assert len(test_streaming_emd.doc_graph) == 500
+		assert first_directed_element.children[0].children[0].next is test_streaming_emd.doc_graph[1]
+
+# # ----- incremental re-parse -----
+
+@pytest.mark.parametrize("iterparse", [False, True])
+def test_incremental_reparse(fill_test_docx_document_with_long_document, create_test_styles_dict, tmp_path, iterparse):
+	#
+	docx_file_path = fill_test_docx_document_with_long_document
+	styles = create_test_styles_dict
+	# Revision editing, inserting and removing a paragraph
+	docx_doc = docx.Document(docx_file_path)
+	docx_doc.paragraphs[10].runs[0].text = "Edited"
+	docx_doc.paragraphs[20].insert_paragraph_before(text="Inserted", style="test_p2")
+	docx_doc.paragraphs[31]._p.getparent().remove(docx_doc.paragraphs[31]._p)
+	revised_docx_file_path = str(tmp_path / "revised.docx")
+	docx_doc.save(revised_docx_file_path)
+
+	#
+	test_previous_emd = EnhancedMD(docx_file_path=docx_file_path, styles=styles, iterparse=iterparse)
+	test_previous_emd()
+	previous_repr = repr(test_previous_emd)
+	test_stats = EnhancedMDStats()
+	test_emd = EnhancedMD(docx_file_path=revised_docx_file_path, styles=styles, iterparse=iterparse,
+	                      previous=test_previous_emd, stats=test_stats)
+	test_emd()
+	test_full_emd = EnhancedMD(docx_file_path=revised_docx_file_path, styles=styles, iterparse=iterparse)
+	test_full_emd()
+
+	# Ensure only the changed paragraphs are processed again and the document is built as fully re-parsed
+	assert test_stats.counters["paragraphs"] == 1500
+	assert test_stats.counters["reused_paragraphs"] == 1498
+	assert repr(test_emd) == repr(test_full_emd)
+	assert test_emd.doc_flat[20].docx_element._p is not test_previous_emd.doc_flat[20].docx_element._p
+
+	# Ensure the previous build is left unmodified
+	assert repr(test_previous_emd) == previous_repr
+	assert not set(map(id, test_emd.doc_flat)) & set(map(id, test_previous_emd.doc_flat))
+
+	# Ensure nothing is reused with different styles
+	test_styles = CompiledStyles(styles={**styles, "ignore": ["test_undefined"]})
+	test_stats = EnhancedMDStats()
+	EnhancedMD(docx_file_path=revised_docx_file_path, styles=test_styles, previous=test_previous_emd,
+	           stats=test_stats)()
+	assert test_stats.counters["reused_paragraphs"] == 0
+
+
+@pytest.mark.parametrize("iterparse", [False, True])
+def test_incremental_reparse_hyperlinks(fill_test_docx_document_with_mixed_content, create_test_styles_dict,
+                                        iterparse):
+	#
+	docx_file_path = fill_test_docx_document_with_mixed_content
+	styles = create_test_styles_dict
+	styles["paragraph"][1].append("List Number")
+
+	#
+	test_previous_emd = EnhancedMD(docx_file_path=docx_file_path, styles=styles, iterparse=iterparse)
+	test_previous_emd()
+	previous_hyperlinks = [content for content in test_previous_emd.doc_flat[1].content
+	                       if isinstance(content, ee.Hyperlink)]
+	previous_hyperlink_elements = [hyperlink.docx_element._element for hyperlink in previous_hyperlinks]
+	test_emd = EnhancedMD(docx_file_path=docx_file_path, styles=styles, iterparse=iterparse,
+	                      previous=test_previous_emd, detached=True)
+	test_emd()
+	hyperlinks = [content for content in test_emd.doc_flat[1].content if isinstance(content, ee.Hyperlink)]
+
+	# Ensure the reused hyperlinks are copies and the previous build ones are left unmodified
+	assert len(hyperlinks) == len(previous_hyperlinks) == 2
+	assert not set(map(id, hyperlinks)) & set(map(id, previous_hyperlinks))
+	assert test_emd.doc_flat[1].content is not test_previous_emd.doc_flat[1].content
+	assert [hyperlink.docx_element._element for hyperlink in previous_hyperlinks] == previous_hyperlink_elements
+	assert [hyperlink.render(TextFormat.MD) for hyperlink in hyperlinks] == [
+		hyperlink.render(TextFormat.MD) for hyperlink in previous_hyperlinks
+	]
+
+	# Ensure the reused hyperlinks are bound to the new build paragraph
+	test_emd = EnhancedMD(docx_file_path=docx_file_path, styles=styles, iterparse=iterparse,
+	                      previous=test_previous_emd)
+	test_emd()
+	for content in test_emd.doc_flat[1].content:
+		if isinstance(content, ee.Hyperlink):
+			assert content.docx_element._element.getparent() is test_emd.doc_flat[1].docx_element._p
+
+
+@pytest.mark.parametrize("iterparse", [False, True])
+def test_incremental_reparse_retargeted_hyperlink(fill_test_docx_document_with_mixed_content, create_test_styles_dict,
+                                                  tmp_path, iterparse):
+	#
+	docx_file_path = fill_test_docx_document_with_mixed_content
+	styles = create_test_styles_dict
+	styles["paragraph"][1].append("List Number")
+	# Revision retargeting the hyperlink relationship (the paragraph XML is unchanged)
+	docx_doc = docx.Document(docx_file_path)
+	for rel in docx_doc.part.rels.values():
+		if rel.reltype == RT.HYPERLINK:
+			rel._target = "https://example.org/retargeted"
+	revised_docx_file_path = str(tmp_path / "revised.docx")
+	docx_doc.save(revised_docx_file_path)
+
+	#
+	test_previous_emd = EnhancedMD(docx_file_path=docx_file_path, styles=styles, iterparse=iterparse)
+	test_previous_emd()
+	test_stats = EnhancedMDStats()
+	test_emd = EnhancedMD(docx_file_path=revised_docx_file_path, styles=styles, iterparse=iterparse,
+	                      previous=test_previous_emd, stats=test_stats)
+	test_emd()
+	test_full_emd = EnhancedMD(docx_file_path=revised_docx_file_path, styles=styles, iterparse=iterparse)
+	test_full_emd()
+
+	# Ensure the paragraph with the retargeted hyperlink is processed again
+	assert repr(test_emd) == repr(test_full_emd)
+	assert test_stats.counters["reused_paragraphs"] == (
+		test_stats.counters["paragraphs"] - test_stats.counters["empty_paragraphs"] - 1
+	)
+
+
+# # ----- diff -----
+
+def test_diff(fill_test_docx_document_with_long_document, create_test_styles_dict, tmp_path):
+	#
+	docx_file_path = fill_test_docx_document_with_long_document
+	styles = create_test_styles_dict
+	# Revision inserting, moving, modifying and deleting paragraphs
+	docx_doc = docx.Document(docx_file_path)
+	docx_paragraphs = docx_doc.paragraphs
+	docx_paragraphs[10].insert_paragraph_before(text="Inserted", style="test_p2")
+	docx_paragraphs[300]._p.addnext(docx_paragraphs[101]._p)
+	docx_paragraphs[600].runs[0].text = "Modified"
+	docx_paragraphs[900]._p.getparent().remove(docx_paragraphs[900]._p)
+	revised_docx_file_path = str(tmp_path / "revised.docx")
+	docx_doc.save(revised_docx_file_path)
+
+	#
+	test_emd = EnhancedMD(docx_file_path=docx_file_path, styles=styles)
+	test_emd()
+	test_revised_emd = EnhancedMD(docx_file_path=revised_docx_file_path, styles=styles)
+	test_revised_emd()
+	element_diffs = test_emd.diff(test_revised_emd)
+
+	# Ensure every change is reported once (renumbered elements are not modified)
+	assert [(element_diff.diff_type, element_diff.old_index, element_diff.new_index)
+	        for element_diff in element_diffs] == [
+		(DiffType.INSERTED, None, 10), (DiffType.MOVED, 101, 301), (DiffType.MODIFIED, 600, 601),
+		(DiffType.DELETED, 900, None)
+	]
+	inserted, moved, modified, deleted = element_diffs
+	assert inserted.new_identifier == test_revised_emd.doc_flat[10].construct_identifier_string()
+	assert (moved.old_identifier, moved.new_identifier) == (
+		test_emd.doc_flat[101].construct_identifier_string(), test_revised_emd.doc_flat[301].construct_identifier_string()
+	)
+	assert moved.old_text == moved.new_text == "SubP 33"
+	assert (modified.old_text, modified.new_text) == ("H 200", "Modified")
+	assert deleted.old_identifier == test_emd.doc_flat[900].construct_identifier_string()
+
+	# Ensure the diff of the same document and of the detached documents
+	assert test_emd.diff(test_emd) == []
+	assert [repr(element_diff) for element_diff in test_emd.diff(test_revised_emd.detach())] == list(
+		map(repr, element_diffs)
+	)
+
+
+def test_diff_heading_path(create_empty_test_docx_document, create_test_styles_dict, tmp_path):
+	#
+	docx_doc, docx_file_path = create_empty_test_docx_document
+	styles = create_test_styles_dict
+	for heading in ("A", "B"):
+		docx_doc.add_paragraph(text=heading, style="test_h1")
+		docx_doc.add_paragraph(text="Same", style="test_p1")
+	docx_doc.save(docx_file_path)
+	# Revision removing the first paragraph (same text as the second one)
+	docx_doc.paragraphs[1]._p.getparent().remove(docx_doc.paragraphs[1]._p)
+	revised_docx_file_path = str(tmp_path / "revised.docx")
+	docx_doc.save(revised_docx_file_path)
+
+	#
+	test_emd = EnhancedMD(docx_file_path=docx_file_path, styles=styles)
+	test_emd()
+	test_revised_emd = EnhancedMD(docx_file_path=revised_docx_file_path, styles=styles)
+	test_revised_emd()
+
+	# Ensure the paragraph under the same heading is matched instead of the first one with the same text
+	assert [(element_diff.diff_type, element_diff.old_identifier)
+	        for element_diff in test_emd.diff(test_revised_emd)] == [(DiffType.DELETED, "1.1")]
+
+# # ----- release source -----
+
+@pytest.mark.parametrize("iterparse", [False, True])
+def test_release_source(fill_test_docx_document_with_mixed_content, create_test_styles_dict, iterparse):
+	#
+	docx_file_path = fill_test_docx_document_with_mixed_content
+	styles = create_test_styles_dict
+	styles["paragraph"][1].append("List Number")
+
+	#
+	test_emd = EnhancedMD(docx_file_path=docx_file_path, styles=styles, iterparse=iterparse)
+	test_emd()
+	expected_repr = repr(test_emd)
+	expected_texts = [directed_element.render(text_format=TextFormat.MD) for directed_element in test_emd.doc_flat]
+	freed_bytes = test_emd.release_source()
+	test_detached_emd = EnhancedMD(docx_file_path=docx_file_path, styles=styles, iterparse=iterparse, detached=True)
+	test_detached_emd()
+
+	# Ensure no docx reference is kept and the built document is unchanged
+	assert freed_bytes is None or freed_bytes > 0
+	for emd in (test_emd, test_detached_emd):
+		assert emd.is_source_released
+		assert emd.docx is None and emd.docx_package is None and emd.numbering_xml_index is None
+		for directed_element in emd.doc_flat:
+			assert directed_element.docx_element is None and directed_element.numbering_xml_index is None
+			assert all(content.docx_element is None for content in directed_element.content
+			           if isinstance(content, ee.BaseElement))
+		assert repr(emd) == expected_repr
+		assert [directed_element.render(text_format=TextFormat.MD) for directed_element in emd.doc_flat] == (
+			expected_texts
+		)
+		assert list(map(repr, emd.detach())) == emd.repr_array
+		with pytest.raises(RuntimeError):
+			emd.build_doc_graph()
+
+	# Ensure a released build is not reused
+	test_revised_emd = EnhancedMD(docx_file_path=docx_file_path, styles=styles, previous=test_emd)
+	test_revised_emd()
+	assert repr(test_revised_emd) == expected_repr
+	assert not test_revised_emd.previous_elements
+
+# # ----- doc index -----
+
+def test_doc_index(fill_test_docx_document_with_long_document, create_test_styles_dict):
+	#
+	docx_file_path = fill_test_docx_document_with_long_document
+	styles = create_test_styles_dict
+
+	#
+	test_emd = EnhancedMD(docx_file_path=docx_file_path, styles=styles)
+	with pytest.raises(RuntimeError):
+		test_emd.get_doc_index()
+	test_emd()
+	doc_index = test_emd.get_doc_index()
+
+	# Ensure the index is built once in document order
+	assert test_emd.get_doc_index() is doc_index
+	assert doc_index.elements == test_emd.doc_flat
+	assert [doc_index.get_identifier(directed_element) for directed_element in test_emd.doc_flat] == [
+		directed_element.construct_identifier_string() for directed_element in test_emd.doc_flat
+	]
+
+	# Ensure the lookups by identifier, style and element type
+	heading = test_emd.doc_flat[3]
+	assert doc_index.get_by_identifier("2") == [heading]
+	assert doc_index.get_by_identifier("2.1.1") == [test_emd.doc_flat[5]]
+	assert doc_index.get_by_identifier("0") == []
+	assert doc_index.get_by_style("test_p2") == test_emd.doc_flat[2::3]
+	assert doc_index.get_by_type(ee.Heading) == doc_index.get_by_type("Heading") == test_emd.doc_flat[::3]
+	assert doc_index.get_by_type(ee.Table) == []
+
+	# Ensure the subtree range queries
+	assert doc_index.get_subtree(heading) == test_emd.doc_flat[3:6]
+	assert doc_index.get_subtree(heading, include_root=False) == test_emd.doc_flat[4:6]
+	assert doc_index.get_subtree_range(test_emd.doc_flat[4]) == (4, 6)
+	assert doc_index.is_descendant(test_emd.doc_flat[5], ancestor=heading)
+	assert not doc_index.is_descendant(test_emd.doc_flat[6], ancestor=heading)
+	assert not doc_index.is_descendant(heading, ancestor=heading)
+
+
+def test_doc_index_from_parse_cache(fill_test_docx_document_with_long_document, create_test_styles_dict, tmp_path):
+	#
+	docx_file_path = fill_test_docx_document_with_long_document
+	styles = create_test_styles_dict
+	cache = ParseCache(cache_dir=str(tmp_path / "cache"))
+
+	#
+	test_emd = EnhancedMD(docx_file_path=docx_file_path, styles=styles, cache=cache)
+	test_emd()
+	test_cached_emd = EnhancedMD(docx_file_path=docx_file_path, styles=styles, cache=cache)
+	test_cached_emd()
+	doc_index = test_emd.get_doc_index()
+	cached_doc_index = test_cached_emd.get_doc_index()
+
+	# Ensure the index of a document loaded from the parse cache holds its detached elements
+	assert test_cached_emd.doc_graph is None
+	assert test_cached_emd.get_doc_index() is cached_doc_index
+	assert cached_doc_index.elements == test_cached_emd.detach().elements
+	assert cached_doc_index.identifiers == doc_index.identifiers
+	assert cached_doc_index.subtree_ends == doc_index.subtree_ends
+
+	# Ensure the lookups give back the detached elements at the same positions
+	detached_elements = test_cached_emd.detach().elements
+	heading = detached_elements[3]
+	assert cached_doc_index.get_by_identifier("2") == [heading]
+	assert cached_doc_index.get_by_style("test_p2") == detached_elements[2::3]
+	assert cached_doc_index.get_by_type(ee.Heading) == detached_elements[::3]
+	assert cached_doc_index.get_subtree(heading) == detached_elements[3:6]
+	assert cached_doc_index.is_descendant(detached_elements[5], ancestor=heading)
+	assert not cached_doc_index.is_descendant(detached_elements[6], ancestor=heading)
+
+# # ----- array backed doc graph -----
+
+def test_doc_graph(fill_test_docx_document_with_long_document, fill_test_docx_document_with_tables,
+                   create_test_styles_dict):
+	#
+	styles = create_test_styles_dict
+
+	for docx_file_path in (fill_test_docx_document_with_long_document, fill_test_docx_document_with_tables):
+		test_emd = EnhancedMD(docx_file_path=docx_file_path, styles=styles)
+		test_emd()
+		doc_graph = test_emd.to_doc_graph()
+		positions = {id(directed_element): i for i, directed_element in enumerate(test_emd.doc_flat)}
+
+		def get_position(directed_element):
+			return positions[id(directed_element)] if directed_element is not None else None
+
+		# Ensure the views give back the linked doc graph
+		assert len(doc_graph) == len(test_emd.doc_flat)
+		assert repr(doc_graph) == repr(test_emd)
+		assert doc_graph.get_roots() == [get_position(directed_element) for directed_element in test_emd.doc_graph]
+		for directed_element, element in zip(test_emd.doc_flat, doc_graph):
+			assert element.element_type == type(directed_element).__name__
+			assert element.construct_identifier_string() == directed_element.construct_identifier_string()
+			assert (element.text, element.style, element.hierarchy_level) == (
+				directed_element.text, directed_element.style, directed_element.hierarchy_level
+			)
+			assert element.item == directed_element.item
+			assert element.heading_item == getattr(directed_element, "heading_item", None)
+			for field in ("parent", "previous", "next"):
+				view = getattr(element, field)
+				assert (view.position if view is not None else None) == get_position(getattr(directed_element, field))
+			assert [child.position for child in element.children] == list(map(get_position, directed_element.children))
+
+	# Ensure the array queries
+	test_emd = EnhancedMD(docx_file_path=fill_test_docx_document_with_long_document, styles=styles)
+	test_emd()
+	doc_graph = test_emd.to_doc_graph()
+	assert doc_graph.find(element_type="Heading") == [
+		i for i, directed_element in enumerate(test_emd.doc_flat) if isinstance(directed_element, ee.Heading)
+	]
+	assert doc_graph.find(style="test_p2", within=3) == [5]
+	assert doc_graph.find(element_type="Paragraph", depth=1, within=3) == [4]
+	assert doc_graph.find(style="undefined") == []
+	assert doc_graph.find(hierarchy_level=test_emd.doc_flat[4].hierarchy_level, depth=1) == [
+		i for i, element in enumerate(doc_graph)
+		if element.hierarchy_level == test_emd.doc_flat[4].hierarchy_level and element.depth == 1
+	]
+	depths = [doc_graph[i].depth for i in range(len(doc_graph))]
+	assert doc_graph.get_depth_histogram() == [depths.count(depth) for depth in range(max(depths) + 1)]
+	assert isinstance(doc_graph.depths, numpy.ndarray) and doc_graph.depths.dtype == numpy.int16
+	assert doc_graph.get_roots() == [i for i, depth in enumerate(depths) if depth == 0]
+	assert depths[:6] == [0, 1, 2, 0, 1, 2]
+	assert doc_graph[-1] == doc_graph[len(doc_graph) - 1]
+	assert doc_graph.nbytes < sum(len(directed_element.text) for directed_element in test_emd.doc_flat) + 64*len(doc_graph)
+
+# # ----- chunker -----
+
+@pytest.mark.parametrize("max_size", [1, 30, 100])
+def test_iter_chunks(fill_test_docx_document_with_long_document, create_test_styles_dict, max_size):
+	#
+	docx_file_path = fill_test_docx_document_with_long_document
+	styles = create_test_styles_dict
+
+	#
+	test_emd = EnhancedMD(docx_file_path=docx_file_path, styles=styles)
+	test_emd()
+	chunks = test_emd.iter_chunks(max_size=max_size)
+	assert inspect.isgenerator(chunks)
+	chunks = list(chunks)
+
+	# Ensure the chunks cover the whole flat document in order without splitting any directed element
+	assert [i for chunk in chunks for i in range(chunk.start, chunk.end)] == list(range(len(test_emd.doc_flat)))
+	for chunk in chunks:
+		directed_elements = test_emd.doc_flat[chunk.start:chunk.end]
+		assert chunk.text == "\n".join(directed_element.render(text_format=ee.TextFormat.PLAIN)
+		                                for directed_element in directed_elements)
+		assert chunk.size == len(chunk.text)
+		assert chunk.size <= max_size or len(chunk) == 1
+		assert chunk.identifiers == tuple(directed_element.construct_identifier_string()
+		                                  for directed_element in directed_elements)
+		heading = directed_elements[0].parent
+		while heading is not None and not isinstance(heading, ee.Heading):
+			heading = heading.parent
+		assert chunk.heading_path == ((heading.render(text_format=ee.TextFormat.PLAIN),) if heading is not None else ())
+
+	# Ensure heading subtrees fitting the budget are kept whole and start a chunk
+	if max_size == 30:
+		assert all(isinstance(test_emd.doc_flat[chunk.start], ee.Heading) for chunk in chunks[1:])
+	if max_size == 1:
+		assert len(chunks) == len(test_emd.doc_flat)
+
+	# Ensure the token budget
+	for chunk in test_emd.iter_chunks(max_size=max_size, size_function=count_tokens, separator=" "):
+		assert chunk.size == count_tokens(chunk.text) and (chunk.size <= max_size or len(chunk) == 1)
+
+
+def test_iter_chunks_streaming(fill_test_docx_document_with_long_document, create_test_styles_dict, tmp_path):
+	#
+	docx_file_path = fill_test_docx_document_with_long_document
+	styles = create_test_styles_dict
+	cache = ParseCache(cache_dir=str(tmp_path / "cache"))
+
+	#
+	test_emd = EnhancedMD(docx_file_path=docx_file_path, styles=styles, cache=cache)
+	test_emd()
+	chunks = list(map(repr, test_emd.iter_chunks(max_size=30)))
+
+	# Ensure a document not built yet is chunked while it is built, sizing only the elements of the first chunk and
+	# the lookahead of the next subtree before yielding it
+	sized_texts = []
+
+	def size_function(text):
+		sized_texts.append(text)
+		return len(text)
+
+	streaming_emd = EnhancedMD(docx_file_path=docx_file_path, styles=styles)
+	streaming_chunks = streaming_emd.iter_chunks(max_size=30, size_function=size_function)
+	first_chunk = next(streaming_chunks)
+	assert len(sized_texts) - 1 <= len(first_chunk) + 30
+	assert len(sized_texts) - 1 < len(test_emd.doc_flat)
+	assert [repr(first_chunk), *map(repr, streaming_chunks)] == chunks
+
+	# Ensure a document loaded from the parse cache is chunked from its detached elements
+	cached_emd = EnhancedMD(docx_file_path=docx_file_path, styles=styles, cache=cache)
+	cached_emd()
+	assert cached_emd.doc_flat is None
+	assert list(map(repr, cached_emd.iter_chunks(max_size=30))) == chunks
+
+
+def test_iter_chunks_plain_text(create_empty_test_docx_document, create_test_styles_dict):
+	#
+	docx_doc, docx_file_path = create_empty_test_docx_document
+	styles = create_test_styles_dict
+	docx_doc.add_paragraph(text="Scope", style="test_h1")
+	paragraph = docx_doc.add_paragraph(text="As laid down in Article ", style="test_p1")
+	paragraph.add_run(text="6.4").bold = True
+	docx_doc.save(docx_file_path)
+
+	#
+	test_emd = EnhancedMD(docx_file_path=docx_file_path, styles=styles)
+	test_emd()
+
+	# Ensure the chunks hold (and are sized on) the plain texts, not the markup
+	chunk, = test_emd.iter_chunks(max_size=100)
+	assert "<b>" in test_emd.doc_flat[1].text
+	assert chunk.text == "Scope\nAs laid down in Article 6.4"
+	assert chunk.size == len(chunk.text)
+
+# # ----- text index -----
+
+def test_text_index(create_empty_test_docx_document, create_test_docx_corpus, create_test_styles_dict, tmp_path):
+	#
+	docx_doc, docx_file_path = create_empty_test_docx_document
+	styles = create_test_styles_dict
+	docx_doc.add_paragraph(text="Scope", style="test_h1")
+	docx_doc.add_paragraph(text="Exceptions", style="test_h2")
+	docx_doc.add_paragraph(text="As laid down in ARTICLE 6.4, and in Article 6.45.", style="test_p1")
+	docx_doc.add_paragraph(text="Article 6, 4 does not apply.", style="test_p1")
+	docx_doc.save(docx_file_path)
+
+	#
+	test_emd = EnhancedMD(docx_file_path=docx_file_path, styles=styles)
+	test_emd()
+	text_index = TextIndex(documents=[test_emd.detach()])
+	correct_emd = EnhancedMD(docx_file_path=create_test_docx_corpus["correct"], styles=styles)
+	correct_emd()
+	assert text_index.add_document(correct_emd.detach()) == 1
+	assert len(text_index) == 2
+
+	# Ensure the phrase queries (normalised and matching the punctuation)
+	hits = text_index.search("article 6.4")
+	assert [(hit.docx_file_path, hit.identifier, hit.heading_path, hit.offset) for hit in hits] == [
+		(docx_file_path, test_emd.doc_flat[2].construct_identifier_string(), ("Scope", "Exceptions"), 16)
+	]
+
+	# Ensure the prefix queries
+	assert [hit.offset for hit in text_index.search("Article 6.4", prefix=True)] == [16, 36]
+	assert text_index.get_prefix_terms("EXC") == ["exceptions"]
+	assert text_index.search("Article 6 4") == []
+	assert text_index.search(" ") == []
+
+	# Ensure the queries across the corpus
+	assert [(hit.docx_file_path, hit.element_index) for hit in text_index.search("p")] == [
+		(create_test_docx_corpus["correct"], i) for i in range(1, 20, 2)
+	]
+
+	# Ensure the persisted index
+	text_index_file_path = str(tmp_path / "text_index.pickle")
+	text_index.save(text_index_file_path)
+	loaded_text_index = TextIndex.load(text_index_file_path)
+	assert list(map(repr, loaded_text_index.search("Article 6", prefix=True))) == list(
+		map(repr, text_index.search("Article 6", prefix=True))
+	)
+
+
+def test_text_index_formatted_runs(create_empty_test_docx_document, create_test_styles_dict, tmp_path):
+	#
+	docx_doc, docx_file_path = create_empty_test_docx_document
+	styles = create_test_styles_dict
+	heading = docx_doc.add_paragraph(text="Scope of ", style="test_h1")
+	heading.add_run(text="Article 6").italic = True
+	paragraph = docx_doc.add_paragraph(text="As laid down in Article ", style="test_p1")
+	paragraph.add_run(text="6.4").bold = True
+	paragraph.add_run(text=", and in Article 6.45.")
+	docx_doc.save(docx_file_path)
+
+	#
+	test_emd = EnhancedMD(docx_file_path=docx_file_path, styles=styles)
+	test_emd()
+	detached_document = test_emd.detach()
+	text_index = TextIndex(documents=[detached_document])
+
+	# Ensure the phrases spanning formatted runs are found in the plain text, and the markup is not indexed
+	assert "<b>6.4</b>" in detached_document.elements[1].text
+	hits = text_index.search("Article 6.4")
+	assert [(hit.identifier, hit.heading_path, hit.offset) for hit in hits] == [
+		(detached_document.elements[1].identifier, ("Scope of Article 6",), 16)
+	]
+	assert detached_document.elements[1].plain_text[16:27] == "Article 6.4"
+	assert text_index.search("b") == text_index.search("i") == []
+
+	# Ensure the plain texts are kept by the doc graph file
+	doc_graph_file_path = str(tmp_path / "test.emdg")
+	test_emd.save(doc_graph_file_path)
+	loaded_document = EnhancedMD.load(doc_graph_file_path)
+	assert [element.plain_text for element in loaded_document.elements] == [
+		element.plain_text for element in detached_document.elements
+	]
+
+# # ----- aparse -----
+
+def test_aparse(create_test_docx_corpus, fill_test_docx_document_with_long_document, create_test_styles_dict):
+	#
+	docx_file_paths = [create_test_docx_corpus["correct"], fill_test_docx_document_with_long_document]*3
+	styles = CompiledStyles(styles=create_test_styles_dict)
+
+	async def parse_concurrently():
+		ticks = 0
+
+		async def tick():
+			nonlocal ticks
+			while True:
+				ticks += 1
+				await asyncio.sleep(0)
+
+		ticker = asyncio.create_task(tick())
+		limiter = asyncio.Semaphore(2)
+		emds = await asyncio.gather(*[EnhancedMD.aparse(docx_file_path=docx_file_path, styles=styles, limiter=limiter)
+		                              for docx_file_path in docx_file_paths])
+		ticker.cancel()
+		return emds, ticks
+
+	#
+	test_emds, ticks = asyncio.run(parse_concurrently())
+
+	# Ensure the documents are built as synchronously without blocking the event loop
+	for docx_file_path, test_emd in zip(docx_file_paths, test_emds):
+		test_sync_emd = EnhancedMD(docx_file_path=docx_file_path, styles=styles)
+		test_sync_emd()
+		assert repr(test_emd) == repr(test_sync_emd)
+	assert ticks > len(docx_file_paths)
+
+
+def test_aparse_cancellation(fill_test_docx_document_with_long_document, create_test_styles_dict):
+	#
+	docx_file_path = fill_test_docx_document_with_long_document
+	styles = create_test_styles_dict
+
+	async def parse_and_cancel():
+		task = asyncio.create_task(EnhancedMD.aparse(docx_file_path=docx_file_path, styles=styles))
+		await asyncio.sleep(0)
+		task.cancel()
+		await task
+
+	# Ensure the awaiting task is cancelled
+	with pytest.raises(asyncio.CancelledError):
+		asyncio.run(parse_and_cancel())
+
+	# Ensure the building stops once cancelled
+	test_emd = EnhancedMD(docx_file_path=docx_file_path, styles=styles)
+	cancel_event = threading.Event()
+	cancel_event.set()
+	with pytest.raises(ParseCancelledError):
+		test_emd._build(cancel_event=cancel_event)
+	assert test_emd.repr_array is None
+
+
+def test_aparse_cancellation_limiter(fill_test_docx_document_with_long_document, create_test_styles_dict):
+	#
+	docx_file_path = fill_test_docx_document_with_long_document
+	styles = create_test_styles_dict
+
+	async def parse_and_cancel():
+		limiter = asyncio.Semaphore(1)
+		gate = threading.Event()
+		with ThreadPoolExecutor(max_workers=1) as executor:
+			# Keep the executor busy so that the document loading is still pending once cancelled
+			executor.submit(gate.wait)
+			task = asyncio.create_task(EnhancedMD.aparse(docx_file_path=docx_file_path, styles=styles,
+			                                             executor=executor, limiter=limiter))
+			for _ in range(10):
+				await asyncio.sleep(0)
+			task.cancel()
+			with pytest.raises(asyncio.CancelledError):
+				await task
+
+			# Ensure the permit is held until the executor finishes the document loading
+			is_locked_after_cancel = limiter.locked()
+			gate.set()
+			await asyncio.wait_for(limiter.acquire(), timeout=30)
+			limiter.release()
+		return is_locked_after_cancel
+
+	#
+	assert asyncio.run(parse_and_cancel())
+
+
+# # ----- process_corpus -----
+
+@pytest.mark.parametrize("workers, iterparse", [(1, False), (2, False), (2, True)])
+def test_process_corpus(create_test_docx_corpus, create_test_styles_dict, workers, iterparse):
+	#
+	docx_file_paths = create_test_docx_corpus
+	styles = create_test_styles_dict
+
+	#
+	corpus_results = list(EnhancedMD.process_corpus(docx_file_paths.values(), styles=styles, workers=workers,
+	                                                iterparse=iterparse))
+
+	# Ensure every document has a result and failing documents do not stop the corpus processing
+	assert len(corpus_results) == 3
+	corpus_results = {docx_file_path: (result, error) for docx_file_path, result, error in corpus_results}
+
+	result, error = corpus_results[docx_file_paths["correct"]]
+	assert error is None
+	test_emd = EnhancedMD(docx_file_path=docx_file_paths["correct"], styles=styles)
+	test_emd()
+	assert repr(result) == repr(test_emd)
+
+	result, error = corpus_results[docx_file_paths["empty"]]
+	assert result is None and isinstance(error, EmptyDocxDocument)
+
+	result, error = corpus_results[docx_file_paths["undefined"]]
+	assert result is None and isinstance(error, UndefinedStyleFoundError)
+
+# # ----- detach -----
+
+def test_detach(create_test_docx_corpus, create_test_styles_dict):
+	#
+	docx_file_path = create_test_docx_corpus["correct"]
+	styles = create_test_styles_dict
+
+	#
+	test_emd = EnhancedMD(docx_file_path=docx_file_path, styles=styles)
+	test_emd()
+	detached_document = pickle.loads(pickle.dumps(test_emd.detach()))
+
+	# Ensure the detached document keeps the built representation and graph structure
+	assert repr(detached_document) == repr(test_emd)
+	assert len(detached_document) == len(test_emd.doc_flat)
+	assert [detached_document.elements[i].identifier for i in detached_document.doc_graph] == \
+	       [directed_element.construct_identifier_string() for directed_element in test_emd.doc_graph]
+
+	detached_heading = detached_document.elements[detached_document.doc_graph[0]]
+	assert detached_heading.parent is None
+	assert [child.text for child in detached_document.get_children(detached_heading)] == ["P"]
+	assert detached_document.get_parent(detached_document.get_children(detached_heading)[0]) is detached_heading
+
+# # ----- save / load -----
+
+def test_save_and_load(fill_test_docx_document_with_mixed_content, create_test_styles_dict, tmp_path):
+	#
+	docx_file_path = fill_test_docx_document_with_mixed_content
+	styles = create_test_styles_dict
+	styles["paragraph"][1].append("List Number")
+	doc_graph_file_path = str(tmp_path / "test.emdg")
+
+	#
+	test_emd = EnhancedMD(docx_file_path=docx_file_path, styles=styles)
+	test_emd()
+	test_emd.save(doc_graph_file_path)
+	detached_document = test_emd.detach()
+	loaded_document = EnhancedMD.load(doc_graph_file_path)
+
+	# Ensure the whole detached document is loaded back
+	assert repr(loaded_document) == repr(test_emd)
+	assert loaded_document.docx_metadata == test_emd.docx_metadata
+	assert loaded_document.doc_graph == detached_document.doc_graph
+	for slot in DetachedElement.__slots__:
+		assert [getattr(element, slot) for element in loaded_document] == \
+		       [getattr(element, slot) for element in detached_document]
+
+	# Ensure the hyperlink spans locate the hyperlinks rendering in the text
+	element = loaded_document.elements[1]
+	hyperlinks = [content for content in test_emd.doc_flat[1].content if isinstance(content, ee.Hyperlink)]
+	assert [(element.text[start:end], link, link_type) for start, end, link, link_type in element.hyperlinks] == [
+		(hyperlink.render(TextFormat.HTML), hyperlink.link, hyperlink.type.name) for hyperlink in hyperlinks
+	]
+	assert [link_type for _, _, _, link_type in element.hyperlinks] == ["URL", "JUMP"]
+
+	# Ensure files which are not doc graph files are rejected
+	with pytest.raises(DocGraphFileError):
+		EnhancedMD.load(docx_file_path)
+
+# # ----- parse cache -----
+
+def test_parse_cache(create_test_docx_corpus, create_test_styles_dict, tmp_path, monkeypatch):
+	#
+	docx_file_path = create_test_docx_corpus["correct"]
+	styles = create_test_styles_dict
+	cache = ParseCache(cache_dir=str(tmp_path / "cache"))
+
+	#
+	test_emd = EnhancedMD(docx_file_path=docx_file_path, styles=styles, cache=cache)
+	test_emd()
+	test_cached_emd = EnhancedMD(docx_file_path=docx_file_path, styles=styles, cache=cache)
+	test_cached_emd()
+
+	# Ensure the second construction is loaded from the cache without loading the docx document
+	assert test_emd.docx is not None and test_cached_emd.docx is None
+	assert repr(test_cached_emd) == repr(test_emd)
+	assert repr(test_cached_emd.detach()) == repr(test_emd.detach())
+	assert test_cached_emd.docx_metadata == test_emd.docx_metadata
+
+	# Ensure the cache key depends on the detached format version
+	key = ParseCache.get_key(docx_file_path=docx_file_path, styles=CompiledStyles(styles))
+	monkeypatch.setattr(parse_cache, "DETACHED_FORMAT_VERSION", parse_cache.DETACHED_FORMAT_VERSION + 1)
+	assert ParseCache.get_key(docx_file_path=docx_file_path, styles=CompiledStyles(styles)) != key
+	monkeypatch.undo()
+
+	# Ensure the cache key depends on the compiled styles
+	styles["paragraph"][2].append("Normal")
+	assert cache.load(key=ParseCache.get_key(docx_file_path=docx_file_path, styles=CompiledStyles(styles))) is None
+
+
+def test_parse_cache_with_process_corpus(create_test_docx_corpus, create_test_styles_dict, tmp_path):
+	#
+	docx_file_paths = create_test_docx_corpus
+	styles = CompiledStyles(create_test_styles_dict)
+	cache = ParseCache(cache_dir=str(tmp_path / "cache"))
+
+	#
+	corpus_results = {docx_file_path: result for docx_file_path, result, _ in
+	                  EnhancedMD.process_corpus(docx_file_paths.values(), styles=styles, workers=2, cache=cache)}
+
+	# Ensure the worker processes store the built documents (and only them) into the shared cache
+	key = ParseCache.get_key(docx_file_path=docx_file_paths["correct"], styles=styles)
+	detached_document = cache.load(key=key)
+	assert repr(detached_document) == repr(corpus_results[docx_file_paths["correct"]])
+	assert os.listdir(cache.cache_dir) == [f"{key}.pickle"]
+
+	# Ensure the least recently used documents are evicted once the cache exceeds its maximum size
+	cache.max_size = 2*os.path.getsize(os.path.join(cache.cache_dir, f"{key}.pickle"))
+	cache.store(key="older", detached_document=detached_document)
+	os.utime(os.path.join(cache.cache_dir, "older.pickle"), (0, 0))
+	cache.store(key="newer", detached_document=detached_document)
+	assert cache.load(key="older") is None
+	assert cache.load(key=key) is not None and cache.load(key="newer") is not None
+
+# # ----- numbering -----
+
+def test_numbering(fill_test_docx_document_with_numbering, create_test_styles_dict):
+	#
+	docx_file_path = fill_test_docx_document_with_numbering
+	styles = create_test_styles_dict
+	styles["paragraph"][1].append("List Number")
+
+	#
+	test_emd = EnhancedMD(docx_file_path=docx_file_path, styles=styles)
+	test_emd()
+
+	# Ensure the numbering definitions are resolved from the document numbering index
+	numbered_paragraphs = test_emd.doc_graph[0].children
+	assert [paragraph.has_numbering for paragraph in numbered_paragraphs] == [True, True, True]
+	assert [paragraph.numbering for paragraph in numbered_paragraphs] == ["1.", "2.", "3."]
+	assert all(paragraph.numbering_xml_index is test_emd.numbering_xml_index for paragraph in numbered_paragraphs)
+
+# # ----- compiled styles -----
+
+def test_compiled_styles(create_test_docx_corpus, create_test_styles_dict):
+	#
+	styles = create_test_styles_dict
+	styles["paragraph"][0].append("test_h0")  # Conflicting undefined hierarchy level for both directed elements
+	styles["ignore"].append("Normal")
+
+	#
+	compiled_styles = CompiledStyles(styles=styles)
+
+	# Ensure every style name is resolved into its directed element type, hierarchy level and ignore flag
+	assert compiled_styles.get("test_h2") == ("heading", 2, False)
+	assert compiled_styles.get("test_p3") == ("paragraph", 3, False)
+	assert compiled_styles.get("test_p0") == ("paragraph", 1, False)
+	assert compiled_styles.get("test_h0") == (None, 0, False)
+	assert compiled_styles.get("Normal") == (None, None, True)
+	assert compiled_styles.get("test_missing") is None
+	assert compiled_styles.is_ignored("Normal") and not compiled_styles.is_ignored("test_h1")
+
+	# Ensure the same compiled styles can be reused across documents with the same result as the style dictionary
+	for docx_file_path in (create_test_docx_corpus["correct"], create_test_docx_corpus["undefined"]):
+		test_emd = EnhancedMD(docx_file_path=docx_file_path, styles=compiled_styles)
+		test_emd()
+		assert test_emd.styles is compiled_styles
+
+		expected_emd = EnhancedMD(docx_file_path=docx_file_path, styles=styles)
+		expected_emd()
+		assert repr(test_emd) == repr(expected_emd)
+
+
+def test_compiled_styles_missing_ignore(create_test_styles_dict):
+	#
+	styles = create_test_styles_dict
+	del styles["ignore"]
+
+	# Ensure the style dictionary is still checked when compiled
+	with pytest.raises(KeyError, match="ignore"):
+		CompiledStyles(styles=styles)
+
+# # ----- run content -----
+
+def test_run_content_spans(fill_test_docx_document_with_runs, create_test_styles_dict):
+	#
+	docx_file_path = fill_test_docx_document_with_runs
+	styles = create_test_styles_dict
+
+	#
+	test_emd = EnhancedMD(docx_file_path=docx_file_path, styles=styles)
+	test_emd()
+
+	# Ensure each run is a single span and runs split mid-word with the same font style are joined
+	content = test_emd.doc_graph[0].content
+	assert [span.string for span in content] == ["First sentence, and ", "bold", " text"]
+	assert [span.font_style["bold"] for span in content] == [False, True, False]
+	assert content[0].tokens == ["First", " ", "sentence", ",", " ", "and", " "]
+	assert test_emd.doc_graph[0].render(TextFormat.PLAIN) == "First sentence, and bold text"
+
+
+def test_run_content_inherited_font_style(fill_test_docx_document_with_inherited_font_style,
+                                          create_test_styles_dict):
+	#
+	docx_file_path = fill_test_docx_document_with_inherited_font_style
+	styles = create_test_styles_dict
+
+	#
+	test_emd = EnhancedMD(docx_file_path=docx_file_path, styles=styles)
+	test_emd()
+
+	# Ensure runs font style combines paragraph style, character style and direct formatting
+	content = test_emd.doc_graph[0].content
+	assert [span.string for span in content] == ["inherited ", "character ", "direct ", "super"]
+	assert [(span.font_style["italic"], span.font_style["bold"]) for span in content] == [
+		(True, False), (True, True), (False, False), (True, False)
+	]
+	assert [span.font_style["superscript"] for span in content] == [False, False, False, True]
+
+
+# # ----- ingestion engines -----
+
+def test_iterparse_ingestion(fill_test_docx_document_with_mixed_content, create_test_styles_dict):
+	#
+	docx_file_path = fill_test_docx_document_with_mixed_content
+	styles = create_test_styles_dict
+	styles["paragraph"][1].append("List Number")
+
+	#
+	test_emd = EnhancedMD(docx_file_path=docx_file_path, styles=styles)
+	test_emd()
+	test_iterparse_emd = EnhancedMD(docx_file_path=docx_file_path, styles=styles, iterparse=True)
+	test_iterparse_emd()
+
+	# Ensure the pull parsed document is built exactly as the docx.Document loaded one
+	assert test_iterparse_emd.docx is None
+	assert repr(test_iterparse_emd) == repr(test_emd)
+	assert test_iterparse_emd.docx_metadata == test_emd.docx_metadata
+	assert ([element.render(TextFormat.PLAIN) for element in test_iterparse_emd.doc_flat]
+	        == [element.render(TextFormat.PLAIN) for element in test_emd.doc_flat])
+	assert [element.numbering for element in test_iterparse_emd.doc_flat] == [None, None, None, None, "1.", "2.", "3."]
+	hyperlinks = [content for content in test_iterparse_emd.doc_flat[1].content if not isinstance(content, ee.Content)]
+	assert [(hyperlink.link, hyperlink.type) for hyperlink in hyperlinks] == [
+		(content.link, content.type) for content in test_emd.doc_flat[1].content if not isinstance(content, ee.Content)
+	]
+	assert [hyperlink.link for hyperlink in hyperlinks][1] == "#anchor"
+
+
+
+# # ----- instrumentation -----
+
+@pytest.mark.parametrize("iterparse", [False, True])
+def test_stats(fill_test_docx_document_with_numbering, create_test_styles_dict, iterparse):
+	#
+	docx_file_path = fill_test_docx_document_with_numbering
+	styles = create_test_styles_dict
+	styles["paragraph"][1].append("List Number")
+
+	#
+	phase_calls = []
+	test_stats = EnhancedMDStats(on_phase_start=lambda phase: phase_calls.append(("start", phase)),
+	                             on_phase_stop=lambda phase, seconds: phase_calls.append(("stop", phase)),
+	                             profile=True)
+	test_emd = EnhancedMD(docx_file_path=docx_file_path, styles=styles, iterparse=iterparse, stats=test_stats)
+	test_emd()
+	test_uninstrumented_emd = EnhancedMD(docx_file_path=docx_file_path, styles=styles, iterparse=iterparse)
+	test_uninstrumented_emd()
+
+	# Ensure instrumentation does not change the built document
+	assert repr(test_emd) == repr(test_uninstrumented_emd)
+	assert test_uninstrumented_emd.stats is None
+
+	# Ensure every phase is called back and timed
+	assert phase_calls == [(event, phase) for phase in ("docx_load", "build_doc_graph", "build_doc_flat", "build_repr")
+	                       for event in ("start", "stop")]
+	assert all(seconds > 0 for seconds in test_stats.phase_seconds.values())
+	assert test_stats.phase_seconds["process_docx_document"] < test_stats.phase_seconds["build_doc_graph"]
+
+	# Ensure the counters
+	counters = test_stats.counters
+	assert counters["paragraphs"] == 4
+	assert counters["empty_paragraphs"] == counters["ignored_paragraphs"] == counters["tables"] == 0
+	assert counters["directed_elements"] == counters["content_spans"] == 4
+	assert counters["numbering_lookups"] > 0
+	assert counters["xpath_queries"] > 0
+	assert test_stats.to_dict()["counters"] == counters
+
+	# Ensure the profile is captured
+	assert len(test_stats.get_profile_stats().stats)
+	assert EnhancedMDStats().get_profile_stats() is None
+
+
+# # ----- tables -----
+
+@pytest.mark.parametrize("iterparse", [False, True])
+def test_tables(fill_test_docx_document_with_tables, create_test_styles_dict, iterparse):
+	#
+	docx_file_path = fill_test_docx_document_with_tables
+	styles = create_test_styles_dict
+
+	#
+	test_emd = EnhancedMD(docx_file_path=docx_file_path, styles=styles, iterparse=iterparse)
+	test_emd()
+
+	# Ensure the table is placed under the current heading (at the top paragraph hierarchy level)
+	heading, paragraph, sub_paragraph, table, paragraph_after = test_emd.doc_flat
+	assert isinstance(table, ee.Table)
+	assert table.parent is heading
+	assert [child for child in heading.children] == [paragraph, table, paragraph_after]
+	assert table.item == [1] and table.heading_item == [0]
+	assert table.construct_identifier_string() == "1.T_2"
+	assert not table.has_numbering
+
+	# Ensure the grid accounts for the horizontally (gridSpan) and vertically (vMerge) merged cells
+	hyperlink = table.grid[2][0].content[-1]
+	assert isinstance(hyperlink, ee.Hyperlink)
+	assert [[cell.render(TextFormat.PLAIN) for cell in row] for row in table.grid] == [
+		["c00\nc01", "c00\nc01", "c02"],
+		["c10", "c11", "c12\nc22"],
+		[f"c20\na | b{hyperlink.render(TextFormat.PLAIN)}", "c21", "c12\nc22"]
+	]
+	assert (table.grid[0][0].column_span, table.grid[1][2].row_span) == (2, 2)
+	assert len(table.content) == 7
+
+	# Ensure the table rendering in every text format
+	assert table.render(TextFormat.HTML) == (
+		'<table><tr><td colspan="2">c00<br>c01</td><td>c02</td></tr>'
+		'<tr><td>c10</td><td>c11</td><td rowspan="2">c12<br>c22</td></tr>'
+		f'<tr><td>c20<br>a | b{hyperlink.render(TextFormat.HTML)}</td><td>c21</td></tr></table>'
+	)
+	assert table.render(TextFormat.MD) == (
+		"| c00<br>c01 |  | c02 |\n"
+		"| --- | --- | --- |\n"
+		"| c10 | c11 | c12<br>c22 |\n"
+		f"| c20<br>a \\| b{hyperlink.render(TextFormat.MD)} | c21 |  |"
+	)
+	assert table.render(TextFormat.PLAIN) == (
+		f"c00 c01\t\tc02\nc10\tc11\tc12 c22\nc20 a | b{hyperlink.render(TextFormat.PLAIN)}\tc21\t"
+	)
+
+	# Ensure the cells hyperlinks are located in the table text
+	for text_format in TextFormat:
+		[(start, end, nested_element)] = table.get_nested_spans(text_format=text_format)
+		assert nested_element is hyperlink
+		assert table.render(text_format)[start:end] == hyperlink.render(text_format)
+	assert test_emd.detach().elements[3].element_type == "Table"
@@ -0,0 +1,228 @@
+"""
+In-memory inverted full-text index over the elements of one or more detached documents (e.g. a corpus built by
+EnhancedMD.process_corpus), answering term, phrase and prefix queries with the element identifier and heading path:
+
+- Element plain texts (without the font style and hyperlink markup, so a phrase spanning differently formatted runs
+  is found and tags are not indexed) are split with the same token regex as the content spans (TOKEN_REGEX),
+  whitespace tokens are left out and the rest (words and punctuation, so that "6.4" does not match "6, 4") are
+  normalised (NFKC and case folded)
+- Postings of each term are stored in a flat int32 array of POSTING_FIELDS ints per posting: document, element
+  (index in the flat document), token position (in the element) and character offset (in the element plain text),
+  in the order they were indexed
+- Phrase queries intersect the postings of the following terms by position, prefix queries bisect the sorted terms
+  (sorted once after the index changes)
+
+The content tokens are computed lazily and not kept by the parse, so indexing a document adds one tokenisation pass
+(TOKEN_REGEX over the plain text) per element on top of the parse
+The index is pickled as its plain state, so it can be persisted with .save() and .load()
+"""
+
+from __future__ import annotations
+
+import pickle
+import unicodedata
+from array import array
+from bisect import bisect_left
+
+from enhanced_md.detached_elements import DetachedDocument
+from enhanced_md.enhanced_elements import TOKEN_REGEX
+
+POSTING_FIELDS = 4
+
+
+def normalize_term(token: str) -> str:
+    return unicodedata.normalize("NFKC", token).casefold()
+
+
+def iter_terms(text: str):
+    """
+    :param text:
+    :return terms: Iterator of (normalised term, character offset) of each non whitespace token of the text
+    """
+
+    for match in TOKEN_REGEX.finditer(text):
+        token = match.group()
+        if not token.isspace():
+            yield normalize_term(token=token), match.start()
+
+
+class TextIndexHit:
+    """
+    Query match inside a single element
+    """
+
+    __slots__ = ("docx_file_path", "element_index", "identifier", "heading_path", "offset")
+
+    def __init__(self, docx_file_path: str, element_index: int, identifier: str, heading_path: tuple[str, ...],
+                 offset: int):
+        self.docx_file_path: str = docx_file_path
+        # Index in the flat detached document
+        self.element_index: int = element_index
+        self.identifier: str = identifier
+        # Texts of the heading ancestors, from the root
+        self.heading_path: tuple[str, ...] = heading_path
+        # Character offset of the match in the element plain text
+        self.offset: int = offset
+
+    def __repr__(self) -> str:
+        return f"{self.docx_file_path}@@@{self.identifier}@@@{self.offset} {list(self.heading_path)}"
+
+
+class TextIndex:
+    """
+    Inverted index from normalised terms to (document, element, token position, character offset) postings
+    """
+
+    __slots__ = ("docx_file_paths", "identifiers", "heading_paths", "postings", "sorted_terms")
+
+    def __init__(self, documents: list[DetachedDocument] | None = None):
+        """
+        :param documents: Detached documents indexed initially
+        """
+
+        self.docx_file_paths: list[str] = []
+        # Identifier and heading path of each element of each document
+        self.identifiers: list[list[str]] = []
+        self.heading_paths: list[list[tuple[str, ...]]] = []
+        self.postings: dict[str, array] = {}
+        self.sorted_terms: list[str] | None = None  # Built on the first prefix query
+
+        for document in documents or ():
+            self.add_document(document=document)
+
+    def __reduce__(self):
+        return _load_text_index, (self.docx_file_paths, self.identifiers, self.heading_paths, self.postings)
+
+    def __len__(self) -> int:
+        return len(self.docx_file_paths)
+
+    def add_document(self, document: DetachedDocument) -> int:
+        """
+        Indexes every element plain text of the document
+        :param document:
+        :return document_index:
+        """
+
+        document_index = len(self.docx_file_paths)
+        identifiers = []
+        heading_paths = []
+        postings = self.postings
+        for element_index, element in enumerate(document.elements):
+            identifiers.append(element.identifier)
+            # Parents precede their children in the flat document, children share their parent heading path tuple
+            if element.parent is None:
+                heading_paths.append(())
+            elif document.elements[element.parent].element_type == "Heading":
+                heading_paths.append((*heading_paths[element.parent], document.elements[element.parent].plain_text))
+            else:
+                heading_paths.append(heading_paths[element.parent])
+
+            for position, (term, offset) in enumerate(iter_terms(text=element.plain_text)):
+                term_postings = postings.get(term)
+                if term_postings is None:
+                    term_postings = postings[term] = array("i")
+                term_postings.extend((document_index, element_index, position, offset))
+
+        self.docx_file_paths.append(document.docx_file_path)
+        self.identifiers.append(identifiers)
+        self.heading_paths.append(heading_paths)
+        self.sorted_terms = None
+
+        return document_index
+
+    def get_prefix_terms(self, prefix: str) -> list[str]:
+        """
+        :param prefix:
+        :return terms: Indexed terms starting with the normalised prefix (sorted)
+        """
+
+        if self.sorted_terms is None:
+            self.sorted_terms = sorted(self.postings)
+
+        prefix = normalize_term(token=prefix)
+        terms = []
+        for i in range(bisect_left(self.sorted_terms, prefix), len(self.sorted_terms)):
+            if not self.sorted_terms[i].startswith(prefix):
+                break
+            terms.append(self.sorted_terms[i])
+
+        return terms
+
+    def _get_positions(self, terms: list[str]) -> dict[tuple[int, int, int], int]:
+        """
+        :param terms: Alternative terms of a single query token
+        :return positions: (document, element, token position) -> character offset of the postings of the terms
+        """
+
+        positions = {}
+        for term in terms:
+            term_postings = self.postings.get(term, ())
+            for i in range(0, len(term_postings), POSTING_FIELDS):
+                positions[term_postings[i], term_postings[i + 1], term_postings[i + 2]] = term_postings[i + 3]
+
+        return positions
+
+    def search(self, query: str, prefix: bool = False) -> list[TextIndexHit]:
+        """
+        Finds the phrase of the query (split and normalised as the indexed texts) in the indexed elements
+        :param query: Term or phrase (e.g. "Article 6.4")
+        :param prefix: Match the last query term as a prefix (e.g. "Article 6.4" also matches "Article 6.45")
+        :return hits: Query matches in indexing order (documents, then elements, then positions)
+        """
+
+        query_terms = [term for term, _ in iter_terms(text=query)]
+        if not query_terms:
+            return []
+
+        term_positions = [
+            self._get_positions(terms=self.get_prefix_terms(prefix=term) if prefix and i == len(query_terms) - 1
+                                else [term])
+            for i, term in enumerate(query_terms)
+        ]
+        # Positions are sorted back into indexing order (prefix terms postings are merged)
+        hits = []
+        for (document_index, element_index, position), offset in sorted(term_positions[0].items()):
+            if all((document_index, element_index, position + i) in positions
+                   for i, positions in enumerate(term_positions[1:], start=1)):
+                hits.append(TextIndexHit(
+                    docx_file_path=self.docx_file_paths[document_index], element_index=element_index,
+                    identifier=self.identifiers[document_index][element_index],
+                    heading_path=self.heading_paths[document_index][element_index], offset=offset
+                ))
+
+        return hits
+
+    def save(self, file_path: str):
+        """
+        :param file_path:
+        """
+
+        with open(file_path, "wb") as index_file:
+            pickle.dump(self, index_file, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def load(file_path: str) -> TextIndex:
+        """
+        Loads a text index saved by .save()
+        :param file_path:
+        :return text_index:
+        """
+
+        with open(file_path, "rb") as index_file:
+            text_index = pickle.load(index_file)
+
+        if not isinstance(text_index, TextIndex):
+            raise TypeError(f"{file_path} is not a text index file")
+
+        return text_index
+
+
+def _load_text_index(docx_file_paths: list[str], identifiers: list[list[str]],
+                     heading_paths: list[list[tuple[str, ...]]], postings: dict[str, array]) -> TextIndex:
+    text_index = TextIndex()
+    text_index.docx_file_paths = docx_file_paths
+    text_index.identifiers = identifiers
+    text_index.heading_paths = heading_paths
+    text_index.postings = postings
+
+    return text_index
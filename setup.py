@@ -1,8 +1,15 @@
+import os
+import re
+
 from setuptools import setup, find_packages
 
+# Library version defined once in enhanced_md/config.py (read as text, the package dependencies may not be installed)
+with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "enhanced_md", "config.py")) as config_file:
+    version = re.search(r'^ENHANCED_MD_VERSION = "([^"]+)"', config_file.read(), re.MULTILINE).group(1)
+
 setup(
     name='enhanced_md',
-    version='0.1',
+    version=version,
     packages=find_packages(exclude=['tests*']),
     license='MIT',
     description='A package to enhance the markdown language',